@@ -89,6 +89,108 @@ def cmd_debug(config_path: str | None):
         cv2.destroyAllWindows()
 
 
+def cmd_reindex_events(config_path: str | None, compress: bool = False):
+    import glob
+    import os
+
+    from src.storage.event_log import reindex_camera_dir
+
+    cfg = load_settings(config_path)
+    base_dir = os.path.join(cfg.storage.data_dir, cfg.storage.sim_output_subdir)
+    cam_dirs = sorted({os.path.dirname(p) for p in glob.glob(os.path.join(base_dir, "*", "events*.jsonl*"))})
+    if not cam_dirs:
+        print(f"No event logs found under {base_dir}.")
+        return
+    print("Stop run_outlet first: the active events.idx is also maintained by the writer.")
+    for cam_dir in cam_dirs:
+        result = reindex_camera_dir(cam_dir, span_bytes=cfg.storage.event_index_span_bytes, compress=compress)
+        print(
+            f"{os.path.basename(cam_dir)}: {result['logs']} log(s), "
+            f"{result['spans']} span(s), {result['compressed']} compressed"
+        )
+
+
+def cmd_backfill_presence(
+    config_path: str | None,
+    since: str | None = None,
+    rebuild: bool = False,
+    from_seen: bool = False,
+):
+    import glob
+    import os
+    import time
+
+    from src.storage.event_log import index_path_for, log_paths, read_index, read_range
+    from src.storage.presence_analytics import INTERVAL_EVENT_TYPE, PresenceAnalyticsStore, day_start, parse_day
+
+    cfg = load_settings(config_path)
+    base_dir = os.path.join(cfg.storage.data_dir, cfg.storage.sim_output_subdir)
+    cam_dirs = sorted({os.path.dirname(p) for p in glob.glob(os.path.join(base_dir, "*", "events*.jsonl*"))})
+    if not cam_dirs:
+        print(f"No event logs found under {base_dir}.")
+        return
+    print("Stop run_outlet first: live segments would move the watermark past the history being replayed.")
+
+    store = PresenceAnalyticsStore(
+        os.path.join(base_dir, cfg.storage.presence_analytics_filename),
+        merge_gap_sec=cfg.storage.presence_interval_gap_sec,
+    )
+    if rebuild:
+        store.clear()
+
+    if since:
+        start_ts = day_start(parse_day(since, since))
+    else:
+        mins = [
+            span.min_ts
+            for cam_dir in cam_dirs
+            for path in log_paths(cam_dir)
+            for span in read_index(index_path_for(path))[:1]
+        ]
+        # Unindexed logs: one pass over everything (reindex-events makes this day-by-day).
+        start_ts = day_start(parse_day(min(mins), "")) if mins else 0.0
+    end_ts = time.time() + 86400.0
+
+    compactors = {}
+    if from_seen:
+        from src.domain.events import Event
+        from src.pipeline.presence_compactor import PresenceCompactor
+
+    wanted = "SPG_SEEN" if from_seen else INTERVAL_EVENT_TYPE
+    consumed = 0
+    read = 0
+    window_start = start_ts
+    while window_start < end_ts:
+        # Day windows keep memory flat on long histories (raw SPG_SEEN in particular).
+        window_end = end_ts if start_ts == 0.0 else window_start + 86400.0
+        events = [
+            ev
+            for cam_dir in cam_dirs
+            for ev in read_range(cam_dir, window_start, window_end - 1e-6)
+            if ev.get("event_type") == wanted
+        ]
+        events.sort(key=lambda ev: ev.get("ts", 0))
+        read += len(events)
+        records = events
+        if from_seen:
+            records = []
+            for ev in events:
+                outlet_id = str(ev.get("outlet_id") or "")
+                compactor = compactors.get(outlet_id)
+                if compactor is None:
+                    compactor = compactors[outlet_id] = PresenceCompactor(
+                        outlet_id, gap_sec=cfg.storage.presence_interval_gap_sec
+                    )
+                records += [r.model_dump() for r in compactor.ingest(Event(**ev))]
+        consumed += store.ingest_many(records)
+        window_start = window_end
+
+    for compactor in compactors.values():
+        consumed += store.ingest_many([r.model_dump() for r in compactor.close_all()])
+    store.close()
+    print(f"{len(cam_dirs)} camera dir(s), {read} {wanted} event(s) read, {consumed} segment(s) aggregated.")
+
+
 def main():
     parser = argparse.ArgumentParser(prog="face_recog")
     subparsers = parser.add_subparsers(dest="command", required=True)
@@ -108,6 +210,20 @@ def main():
     p_enroll.add_argument("--name", required=True)
     p_enroll.add_argument("--samples", type=int, default=30)
 
+    # reindex-events
+    p_reindex = subparsers.add_parser("reindex-events")
+    p_reindex.add_argument("--config", type=str, default=None)
+    p_reindex.add_argument("--compress", action="store_true", help="gzip uncompressed rotated segments")
+
+    # backfill-presence
+    p_backfill = subparsers.add_parser("backfill-presence")
+    p_backfill.add_argument("--config", type=str, default=None)
+    p_backfill.add_argument("--since", type=str, default=None, help="YYYY-MM-DD; default: oldest indexed event")
+    p_backfill.add_argument("--rebuild", action="store_true", help="clear the analytics database first")
+    p_backfill.add_argument(
+        "--from-seen", action="store_true", help="build intervals from raw SPG_SEEN (logs from before interval records)"
+    )
+
     args = parser.parse_args()
 
     if args.command == "debug":
@@ -176,6 +292,14 @@ def main():
         )
         return
 
+    if args.command == "reindex-events":
+        cmd_reindex_events(args.config, compress=args.compress)
+        return
+
+    if args.command == "backfill-presence":
+        cmd_backfill_presence(args.config, since=args.since, rebuild=args.rebuild, from_seen=args.from_seen)
+        return
+
 
 if __name__ == "__main__":
     main()
@@ -9,83 +9,114 @@ import json
 import re
 from collections import deque
 import cv2
+import numpy as np
 
 from src.pipeline.inference_server import InferenceServer
-from src.pipeline.shared_frame_buffer import SharedFrameBuffer
+from src.pipeline.shared_frame_buffer import NegotiatedFrameBuffer, fit_frame_size
+from src.pipeline.shared_result_slot import SharedLabelTable, SharedResultSlot
+from src.pipeline.shared_preview_slot import SharedPreviewSlot
+from src.pipeline.preview_encoder import PreviewEncoder, PreviewJob, draw_faces
+from src.pipeline.shared_state_segment import STATE_DOCUMENTS, SharedStateSegment
+from src.pipeline.state_publisher import StatePublisher
 from src.pipeline.outlet_aggregator import OutletAggregator
+from src.pipeline.presence_compactor import PresenceCompactor
 from src.domain.events import Event
+from src.notification.alert_coalescer import AlertCoalescer, format_alert_digest
+from src.notification.notification_dispatcher import NotificationDispatcher
 from src.notification.telegram_notifier import TelegramNotifier
 from src.pipeline.webcam_reader import WebcamReader
-from src.pipeline.rtsp_reader import RTSPReader
+from src.pipeline.rtsp_reader import RTSPReader, CONN_OPEN, CONN_STATE_CODES, CONN_STATE_NAMES
 from src.storage.event_store import EventStore
+from src.storage.event_writer import EventWriter
+from src.storage.presence_analytics import PresenceAnalyticsStore
+from src.storage.sqlite_event_store import SqliteEventStore
 from src.settings.settings import load_settings
 
 from src.settings.logger import logger
 from src.storage.snapshot_cleaner import SnapshotCleaner
 
 from src.storage.snapshot_store import SnapshotStore
+from src.storage.evidence_cache import EvidenceCache
 
 _UNRESOLVED_ENV_PATTERN = re.compile(r"\$\{[A-Za-z_][A-Za-z0-9_]*\}|%[A-Za-z_][A-Za-z0-9_]*%")
 
-
-def _safe_write_json(filepath: str, payload: dict, retries: int = 3, retry_sleep_sec: float = 0.05) -> None:
-    """Best-effort JSON write with simple retry to handle transient file locks."""
-    for attempt in range(retries):
-        try:
-            with open(filepath, "w", encoding="utf-8") as f:
-                json.dump(payload, f, indent=2)
-            return
-        except PermissionError:
-            if attempt < retries - 1:
-                time.sleep(retry_sleep_sec)
-        except OSError as e:
-            logger.warning(f"[Main] Failed writing {filepath}: {e}")
-            return
-
-
-def _write_jpeg_atomic(
-    filepath: str,
-    frame,
+# Worker -> main connection status slots (multiprocessing.Array("d", _WORKER_STATUS_SIZE)):
+#   [0] connection state code (see rtsp_reader.CONN_STATE_CODES)
+#   [1] last connect latency ms (-1 = unknown)
+#   [2] connect attempts
+#   [3] seconds spent in the current connect attempt (-1 = not connecting)
+# Preview / stage timing slots (written by the worker after each preview tick):
+#   [4] dashboard viewers (ai + raw)
+#   [5] preview frames encoded
+#   [6] preview ticks skipped (no viewers)
+#   [7] preview encode ms per frame (EMA: resize + overlay + encode, encoder thread)
+#   [8] estimated preview encode ms saved by skipping
+#   [9] capture read ms (EMA: reader.read_throttled for emitted frames)
+#   [10] frame write ms (EMA: shm write, or queue put in queue mode)
+#   [11] preview jobs dropped (encoder busy, replaced by a newer frame)
+_WORKER_STATUS_SIZE = 12
+_WORKER_STATUS_INIT = [0.0, -1.0, 0.0, -1.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
+
+
+def _preview_plan(
+    now: float,
+    last_frame_time: float,
+    last_disk_time: float,
+    slots: dict,
+    on_demand: bool,
+    demand_ttl_sec: float,
+    interval_sec: float,
     jpeg_quality: int,
-    retries: int = 2,
-    retry_sleep_sec: float = 0.01,
-) -> bool:
-    """
-    Encode to JPEG in-memory and atomically replace destination file.
-    This prevents readers from seeing partially-written JPEG bytes.
-    """
+    disk_interval_sec: float,
+    all_variants: set[str],
+    stats: dict,
+) -> tuple[int, set[str]]:
+    """(jpeg quality, variants to produce now) for one worker preview tick."""
+    if not slots or not on_demand:
+        due = (now - last_frame_time) > interval_sec
+        return jpeg_quality, set(all_variants) if due else set()
+
+    demand = {}
+    for variant, slot in slots.items():
+        viewers, req_interval, req_quality = slot.demand(now, demand_ttl_sec)
+        if viewers > 0:
+            demand[variant] = (viewers, req_interval, req_quality)
+    stats["viewers"] = sum(v for v, _, _ in demand.values())
+
+    variants: set[str] = set()
+    if demand:
+        # Never faster than the pipeline's own cap; the dashboard may ask for slower.
+        interval_sec = max(interval_sec, min(iv for _, iv, _ in demand.values()))
+        requested_q = max(q for _, _, q in demand.values())
+        if requested_q > 0:
+            jpeg_quality = requested_q
+        if (now - last_frame_time) > interval_sec:
+            variants = set(demand)
+    if disk_interval_sec > 0 and (now - last_disk_time) >= disk_interval_sec:
+        variants |= all_variants
+    return jpeg_quality, variants
+
+
+def _ema_ms(prev: float, value: float) -> float:
+    return value if prev <= 0 else (0.2 * value + 0.8 * prev)
+
+
+def _publish_preview_status(status_array, stats: dict, encoder_stats: dict) -> None:
+    if status_array is None:
+        return
     try:
-        ok, encoded = cv2.imencode(
-            ".jpg",
-            frame,
-            [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)],
-        )
-        if not ok:
-            return False
-        payload = encoded.tobytes()
+        status_array[4:12] = [
+            float(stats["viewers"]),
+            float(encoder_stats["encoded"]),
+            float(stats["skipped"]),
+            float(encoder_stats["encode_ms"]),
+            float(stats["saved_ms"]),
+            float(stats["capture_ms"]),
+            float(stats["write_ms"]),
+            float(encoder_stats["dropped"]),
+        ]
     except Exception:
-        return False
-
-    tmp_path = f"{filepath}.tmp"
-    for attempt in range(retries):
-        try:
-            with open(tmp_path, "wb") as f:
-                f.write(payload)
-            os.replace(tmp_path, filepath)
-            return True
-        except PermissionError:
-            if attempt < retries - 1:
-                time.sleep(retry_sleep_sec)
-        except OSError:
-            if attempt < retries - 1:
-                time.sleep(retry_sleep_sec)
-
-    try:
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
-    except OSError:
         pass
-    return False
 
 
 def _source_type(source_url: str) -> str:
@@ -114,6 +145,28 @@ def _restart_allowed(restart_history: deque[float], max_restarts_per_minute: int
     return True
 
 
+def _publish_reader_status(status_array, reader) -> None:
+    """Copy reader connection status into the shared status slots (best-effort)."""
+    if status_array is None:
+        return
+    status_fn = getattr(reader, "status", None)
+    if status_fn is None:
+        st = {"state": CONN_OPEN if getattr(reader, "cap", None) is not None else "idle"}
+    else:
+        st = status_fn()
+    latency = st.get("last_connect_latency_ms")
+    connecting_for = st.get("connecting_for_sec")
+    try:
+        status_array[:4] = [
+            float(CONN_STATE_CODES.get(st.get("state"), 0)),
+            -1.0 if latency is None else float(latency),
+            float(st.get("connect_attempts", 0)),
+            -1.0 if connecting_for is None else float(connecting_for),
+        ]
+    except Exception:
+        pass
+
+
 def _terminate_process(proc: multiprocessing.Process | None, name: str = "process", timeout_sec: float = 1.0) -> None:
     if proc is None:
         return
@@ -135,24 +188,37 @@ def worker_camera_capture(
     feedback_queue: multiprocessing.Queue,
     data_dir: str,
     outlet_id: str,
-    shm_name: str | None = None,
+    shm_spec: tuple | None = None,
     shm_max_h: int = 720,
     shm_max_w: int = 1280,
-    shm_lock: multiprocessing.Lock | None = None,
+    shm_resize_queue: multiprocessing.Queue | None = None,
     preview_frame_save_interval_sec: float = 0.2,
     preview_frame_width: int = 640,
     preview_jpeg_quality: int = 80,
     save_raw_preview: bool = True,
+    preview_slot_specs: dict[str, tuple] | None = None,
+    preview_disk_interval_sec: float = 0.0,
+    preview_on_demand: bool = True,
+    preview_demand_ttl_sec: float = 5.0,
     idle_sleep_sec: float = 0.05,
     preview: bool = False,
+    rtsp_open_timeout_sec: float = 10.0,
+    status_array=None,
+    result_slot_spec: tuple | None = None,
+    label_table_spec: tuple | None = None,
 ):
     """
     Lightweight camera capture process:
-    1. Reads frame from RTSP/Webcam/File
-    2. Writes frame to Shared Memory (zero-copy) or Queue (fallback)
+    1. Reads frame from RTSP/Webcam/File (RTSP connects in background, loop never blocks)
+    2. Writes frame to Shared Memory (zero-copy) or Queue (fallback);
+       asks main to resize the shm slot when the stream resolution differs from it
     3. Sends lightweight metadata to input_queue
-    4. Reads inference results from feedback_queue -> Draws visualization
-    5. Saves preview thumbnail for dashboard
+    4. Reads inference results from its shared result slot (or feedback_queue fallback) -> Draws visualization
+    5. Publishes preview thumbnail for dashboard (resize/overlay/encode run in a
+       PreviewEncoder thread so they never delay the next capture): shared-memory preview slots when
+       given (files only every preview_disk_interval_sec), otherwise JPEG files.
+       With preview_on_demand, overlay/resize/encode only run while the dashboard
+       reports viewers in the slot, at the interval/quality it asks for.
     """
     logger.info(f"[CamWorker {camera_id}] Starting capture process...")
     
@@ -162,57 +228,143 @@ def worker_camera_capture(
         idx = int(source_url) if source_url.isdigit() else 0
         reader = WebcamReader(idx, process_fps)
     else:
-        reader = RTSPReader(source_url, process_fps)
+        reader = RTSPReader(source_url, process_fps, open_timeout_sec=rtsp_open_timeout_sec)
         reader.set_loop(loop_video)
         
     reader.start()
+    _publish_reader_status(status_array, reader)
     
     # Attach to Shared Memory (if available)
-    shm_buf = None
-    if shm_name:
+    shm_slot = None
+    if shm_spec:
         try:
-            shm_buf = SharedFrameBuffer.attach(shm_name, shm_max_h, shm_max_w, shm_lock)
+            shm_slot = NegotiatedFrameBuffer.attach(*shm_spec)
+            shm_slot.current()
             logger.info(f"[CamWorker {camera_id}] Using shared memory.")
         except Exception as e:
+            shm_slot = None
             logger.warning(f"[CamWorker {camera_id}] Shared memory failed, falling back to queue: {e}")
+    requested_shm_size: tuple[int, int] | None = None
+
+    # Attach to shared result slot (overlay source); feedback_queue is the fallback
+    result_slot = None
+    label_table = None
+    if result_slot_spec and label_table_spec:
+        try:
+            result_slot = SharedResultSlot.attach(*result_slot_spec)
+            label_table = SharedLabelTable.attach(*label_table_spec)
+        except Exception as e:
+            result_slot = None
+            label_table = None
+            logger.warning(f"[CamWorker {camera_id}] Result slot failed, falling back to feedback queue: {e}")
+    last_result_seq = 0
+
+    # Preview slots ("ai" / "raw"): dashboard streams from memory, disk is a low-rate fallback
+    preview_slots: dict[str, SharedPreviewSlot] = {}
+    for variant, spec in (preview_slot_specs or {}).items():
+        try:
+            preview_slots[variant] = SharedPreviewSlot.attach(*spec)
+        except Exception as e:
+            logger.warning(f"[CamWorker {camera_id}] Preview slot {variant} failed, writing preview files: {e}")
+    preview_all_variants = {"ai", "raw"} if save_raw_preview else {"ai"}
+    preview_stats = {"viewers": 0, "skipped": 0, "saved_ms": 0.0, "capture_ms": 0.0, "write_ms": 0.0}
     
     frame_id = 0
     last_frame_time = 0
+    last_disk_preview_time = 0.0
+    last_preview_tick = 0.0
     preview_path = os.path.join(data_dir, "snapshots", "latest_frame.jpg")
     raw_preview_path = os.path.join(data_dir, "snapshots", "latest_raw_frame.jpg")
     os.makedirs(os.path.dirname(preview_path), exist_ok=True)
+    preview_encoder = PreviewEncoder(
+        camera_id,
+        width=preview_frame_width,
+        slots=preview_slots,
+        paths={"ai": preview_path, "raw": raw_preview_path},
+    )
+    preview_encoder.start()
 
     latest_faces = []
 
     try:
         while True:
+            capture_t0 = time.perf_counter()
             frame = reader.read_throttled()
+            capture_ms = (time.perf_counter() - capture_t0) * 1000.0
             now = time.time()
+            _publish_reader_status(status_array, reader)
             
-            try:
-                while True:
-                    res = feedback_queue.get_nowait()
-                    if res['camera_id'] == camera_id:
-                        latest_faces = res['faces']
-            except (queue.Empty, AttributeError):
-                pass
+            if result_slot is not None:
+                snap = result_slot.read(since_seq=last_result_seq)
+                if snap is not None:
+                    last_result_seq = snap.seq
+                    latest_faces = snap.faces(label_table.snapshot())
+            else:
+                try:
+                    while True:
+                        res = feedback_queue.get_nowait()
+                        if res['camera_id'] == camera_id:
+                            latest_faces = res['faces']
+                except (queue.Empty, AttributeError):
+                    pass
             
             if frame is not None:
                 frame_id += 1
-                raw_frame = frame.copy() if save_raw_preview else None
+                preview_stats["capture_ms"] = _ema_ms(preview_stats["capture_ms"], capture_ms)
+                jpeg_quality, preview_variants = _preview_plan(
+                    now,
+                    last_frame_time,
+                    last_disk_preview_time,
+                    preview_slots,
+                    preview_on_demand,
+                    preview_demand_ttl_sec,
+                    preview_frame_save_interval_sec,
+                    preview_jpeg_quality,
+                    preview_disk_interval_sec,
+                    preview_all_variants,
+                    preview_stats,
+                )
+                preview_due = bool(preview_variants) and preview_frame_width > 0
+                if preview_due:
+                    last_preview_tick = now
+                elif (now - last_preview_tick) > preview_frame_save_interval_sec:
+                    # No viewer wants a frame at the configured rate: the whole tick is skipped.
+                    last_preview_tick = now
+                    preview_stats["skipped"] += 1
+                    encoder_stats = preview_encoder.stats()
+                    preview_stats["saved_ms"] += encoder_stats["encode_ms"] * len(preview_all_variants)
+                    _publish_preview_status(status_array, preview_stats, encoder_stats)
                 capture_ts = now
+                bbox_scale = 1.0
+                write_t0 = time.perf_counter()
                  
                 try:
-                    if shm_buf:
-                        inf_frame = frame
-                        h, w = inf_frame.shape[:2]
-                        bbox_scale = 1.0
-                        
-                        if h > shm_max_h or w > shm_max_w:
-                            bbox_scale = min(shm_max_h / h, shm_max_w / w)
-                            inf_frame = cv2.resize(inf_frame, (int(w * bbox_scale), int(h * bbox_scale)))
-                         
-                        shm_buf.write(inf_frame, frame_id, now)
+                    if shm_slot:
+                        shm_buf = shm_slot.current()
+                        h, w = frame.shape[:2]
+                        want_h, want_w, _ = fit_frame_size(h, w, shm_max_h, shm_max_w)
+                        slot_size = (shm_buf.max_height, shm_buf.max_width)
+                        if (want_h, want_w) != slot_size and (want_h, want_w) != requested_shm_size:
+                            if shm_resize_queue is not None:
+                                try:
+                                    shm_resize_queue.put_nowait((camera_id, want_h, want_w))
+                                    requested_shm_size = (want_h, want_w)
+                                    logger.info(
+                                        f"[CamWorker {camera_id}] Stream {w}x{h}: requesting shm slot "
+                                        f"{want_w}x{want_h} (current {slot_size[1]}x{slot_size[0]})"
+                                    )
+                                except queue.Full:
+                                    pass
+                        dst_h, dst_w, bbox_scale = shm_buf.fit_size(h, w)
+                        # Single write of the inference-size image straight into shm.
+                        with shm_buf.write_view(dst_h, dst_w, frame_id, now) as dst:
+                            if bbox_scale == 1.0:
+                                np.copyto(dst, frame)
+                            else:
+                                cv2.resize(frame, (dst_w, dst_h), dst=dst)
+                        preview_stats["write_ms"] = _ema_ms(
+                            preview_stats["write_ms"], (time.perf_counter() - write_t0) * 1000.0
+                        )
                         enqueue_ts = time.time()
                         input_queue.put((camera_id, frame_id, capture_ts, enqueue_ts), timeout=0.1)
                     else:
@@ -228,42 +380,42 @@ def worker_camera_capture(
                              
                         enqueue_ts = time.time()
                         input_queue.put((camera_id, frame_id, inf_frame, capture_ts, enqueue_ts), timeout=0.1)
+                        preview_stats["write_ms"] = _ema_ms(
+                            preview_stats["write_ms"], (time.perf_counter() - write_t0) * 1000.0
+                        )
                 except queue.Full:
                     pass
                 except Exception:
                     pass
 
-                inv_scale = 1.0 / bbox_scale if bbox_scale > 0 else 1.0
-                for f in latest_faces:
-                    bbox = f['bbox']
-                    x1 = int(bbox[0] * inv_scale)
-                    y1 = int(bbox[1] * inv_scale)
-                    x2 = int(bbox[2] * inv_scale)
-                    y2 = int(bbox[3] * inv_scale)
-                    
-                    color = (0, 255, 0) if f['matched'] else (0, 0, 255)
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                    
-                    label = f"{f['name']} ({f['similarity']:.2f})"
-                    cv2.putText(frame, label, (x1, max(0, y1 - 10)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-
-                if now - last_frame_time > preview_frame_save_interval_sec:
-                    try:
-                        h, w = frame.shape[:2]
-                        if w > 0 and preview_frame_width > 0:
-                            target_h = max(1, int(h * preview_frame_width / w))
-                            if save_raw_preview and raw_frame is not None:
-                                raw_small = cv2.resize(raw_frame, (preview_frame_width, target_h))
-                                _write_jpeg_atomic(raw_preview_path, raw_small, preview_jpeg_quality)
-
-                            ai_small = cv2.resize(frame, (preview_frame_width, target_h))
-                            if _write_jpeg_atomic(preview_path, ai_small, preview_jpeg_quality):
-                                last_frame_time = now
-                    except Exception:
-                        pass
+                if preview:
+                    # Local window gets its own copy: the encoder thread owns `frame` once submitted.
+                    shown = frame.copy()
+                    draw_faces(shown, latest_faces, bbox_scale)
+
+                if preview_due:
+                    disk_due = (
+                        preview_disk_interval_sec > 0
+                        and (now - last_disk_preview_time) >= preview_disk_interval_sec
+                    )
+                    preview_encoder.submit(
+                        PreviewJob(
+                            frame=frame,
+                            faces=latest_faces,
+                            bbox_scale=bbox_scale,
+                            variants=preview_variants,
+                            jpeg_quality=jpeg_quality,
+                            ts=now,
+                            write_disk=disk_due,
+                        )
+                    )
+                    last_frame_time = now
+                    if disk_due:
+                        last_disk_preview_time = now
+                    _publish_preview_status(status_array, preview_stats, preview_encoder.stats())
 
                 if preview:
-                    cv2.imshow(f"face_recog | {camera_id}", frame)
+                    cv2.imshow(f"face_recog | {camera_id}", shown)
                     cv2.waitKey(1)
 
             else:
@@ -274,8 +426,14 @@ def worker_camera_capture(
     except Exception as e:
         logger.error(f"[CamWorker {camera_id}] Error: {e}")
     finally:
-        if shm_buf:
-            shm_buf.close()
+        if shm_slot:
+            shm_slot.close()
+        if result_slot is not None:
+            result_slot.close()
+            label_table.close()
+        preview_encoder.stop()
+        for slot in preview_slots.values():
+            slot.close()
         reader.stop()
         if preview:
             cv2.destroyAllWindows()
@@ -293,9 +451,10 @@ def run_outlet(
     Architecture:
       Camera Workers → SharedMemory + metadata Queue → InferenceServer (1 model)
                                                               ↓
-      Main Process ← output_queue ← InferenceServer
-        ├→ feedback_queues[cam_id] → Workers (visualization)
+      InferenceServer → SharedResultSlot[cam_id] → Workers (visualization) + Main (metrics)
+                      → output_queue (matches only) → Main
         └→ OutletAggregator → Events → Alerts
+      (feedback_queues[cam_id] are only used when result slots are unavailable)
     """
     settings = load_settings(config_path)
     
@@ -341,6 +500,7 @@ def run_outlet(
         sys.exit(1)
 
     roi_by_camera = {cam_id: configured_roi_by_camera.get(cam_id) for cam_id, _ in camera_sources}
+    configured_cameras = {cam.id: cam for cam in outlet.cameras}
     roi_enabled_cameras = [cam_id for cam_id, roi in roi_by_camera.items() if roi is not None]
 
     # Directories
@@ -364,12 +524,21 @@ def run_outlet(
     output_queue = multiprocessing.Queue()
     
     worker_feedback_queues = {}
+    worker_status_arrays = {}
     for cam_id, _ in camera_sources:
         worker_feedback_queues[cam_id] = multiprocessing.Queue(maxsize=5)
+        worker_status_arrays[cam_id] = multiprocessing.Array("d", _WORKER_STATUS_INIT)
 
     # Shared Memory Buffers (per camera)
     max_h = settings.inference.max_frame_height
     max_w = settings.inference.max_frame_width
+    frame_ring_slots = max(1, int(settings.inference.frame_ring_slots))
+    shm_limits: dict[str, tuple[int, int]] = {}
+    for cam_id, _ in camera_sources:
+        cam_cfg = configured_cameras.get(cam_id)
+        cam_h = cam_cfg.max_frame_height if cam_cfg and cam_cfg.max_frame_height else max_h
+        cam_w = cam_cfg.max_frame_width if cam_cfg and cam_cfg.max_frame_width else max_w
+        shm_limits[cam_id] = (max(1, int(cam_h)), max(1, int(cam_w)))
     frame_skip_base = max(0, int(settings.inference.frame_skip))
     frame_skip_control = multiprocessing.Value("i", frame_skip_base)
     min_det_score_base = max(0.0, float(settings.recognition.min_det_score))
@@ -378,23 +547,30 @@ def run_outlet(
     min_face_width_control = multiprocessing.Value("i", min_face_width_base)
     min_hits_control = multiprocessing.Value("i", min_hits_base)
     
-    shared_buffers = {}
-    shared_locks = {}
+    # Each slot starts at the camera's cap and is renegotiated to the actual stream
+    # resolution once the worker sees its first frame (see shm_resize_queue).
+    shared_buffers: dict[str, NegotiatedFrameBuffer] = {}
     shared_buffer_configs = {}
+    shm_resize_queue = multiprocessing.Queue(maxsize=32)
     
     for cam_id, _ in camera_sources:
         lock = multiprocessing.Lock()
+        cam_h, cam_w = shm_limits[cam_id]
         try:
-            buf = SharedFrameBuffer.create(cam_id, max_h, max_w, lock)
+            buf = NegotiatedFrameBuffer.create(cam_id, cam_h, cam_w, lock, slots=frame_ring_slots)
             shared_buffers[cam_id] = buf
-            shared_locks[cam_id] = lock
-            shared_buffer_configs[cam_id] = (cam_id, max_h, max_w, lock)
+            shared_buffer_configs[cam_id] = buf.spec()
         except Exception as e:
             logger.warning(f"[SharedMem] Failed to create buffer for {cam_id}: {e}. Using queue fallback.")
 
     use_shm = len(shared_buffers) == len(camera_sources)
     if use_shm:
-        logger.info(f"[SharedMem] Created {len(shared_buffers)} buffers ({max_h}x{max_w})")
+        logger.info(
+            "[SharedMem] Created %s buffers x %s slot(s) (%s)",
+            len(shared_buffers),
+            frame_ring_slots,
+            ", ".join(f"{cid}={h}x{w}" for cid, (h, w) in shm_limits.items()),
+        )
     else:
         # Cleanup partial buffers
         for buf in shared_buffers.values():
@@ -404,6 +580,44 @@ def run_outlet(
         shared_buffer_configs.clear()
         logger.info("[SharedMem] Disabled, using queue mode.")
 
+    # Shared result slots (per camera) + gallery label table
+    result_slots: dict[str, SharedResultSlot] = {}
+    label_table: SharedLabelTable | None = None
+    try:
+        label_table = SharedLabelTable.create(outlet_id)
+        for cam_id, _ in camera_sources:
+            result_slots[cam_id] = SharedResultSlot.create(cam_id)
+    except Exception as e:
+        logger.warning(f"[SharedMem] Failed to create result slots: {e}. Using result queues.")
+
+    use_result_slots = label_table is not None and len(result_slots) == len(camera_sources)
+    if use_result_slots:
+        logger.info(f"[SharedMem] Created {len(result_slots)} result slots")
+    else:
+        for slot in result_slots.values():
+            slot.close()
+            slot.unlink()
+        result_slots.clear()
+        if label_table is not None:
+            label_table.close()
+            label_table.unlink()
+            label_table = None
+
+    # Preview slots (per camera, "ai" + optional "raw"): dashboard reads JPEGs from memory
+    preview_slots: dict[str, dict[str, SharedPreviewSlot]] = {}
+    if settings.runtime.preview_transport == "shm":
+        variants = ["ai", "raw"] if settings.runtime.preview_raw_enabled else ["ai"]
+        for cam_id, _ in camera_sources:
+            try:
+                preview_slots[cam_id] = {
+                    v: SharedPreviewSlot.create(cam_id, v, capacity=settings.runtime.preview_shm_capacity_bytes)
+                    for v in variants
+                }
+            except Exception as e:
+                logger.warning(f"[SharedMem] Failed to create preview slot for {cam_id}: {e}. Using preview files.")
+        if preview_slots:
+            logger.info(f"[SharedMem] Created preview slots for {len(preview_slots)} camera(s)")
+
     # Runtime control file (optional hot-tuning from dashboard)
     control_path = os.path.join(base_data_dir, "runtime_control.json")
     control_last_mtime = 0.0
@@ -496,6 +710,30 @@ def run_outlet(
             logger.info("[RuntimeControl] Applied: %s", ", ".join(changed))
 
     # Start / restart helpers
+    def _apply_shm_resize_requests() -> None:
+        for _ in range(len(shared_buffers) * 2 or 1):
+            try:
+                cam_id, req_h, req_w = shm_resize_queue.get_nowait()
+            except queue.Empty:
+                return
+            slot = shared_buffers.get(cam_id)
+            if slot is None:
+                continue
+            lim_h, lim_w = shm_limits.get(cam_id, (max_h, max_w))
+            req_h = max(1, min(int(req_h), lim_h))
+            req_w = max(1, min(int(req_w), lim_w))
+            if (req_h, req_w) == slot.shape:
+                continue
+            old_h, old_w = slot.shape
+            try:
+                slot.resize(req_h, req_w)
+                logger.info(
+                    f"[SharedMem] {cam_id} resized {old_w}x{old_h} -> {req_w}x{req_h} "
+                    f"(gen={slot.generation}, {slot.nbytes / (1024 * 1024):.2f} MB)"
+                )
+            except Exception as e:
+                logger.warning(f"[SharedMem] Failed to resize buffer for {cam_id}: {e}")
+
     def _spawn_inference() -> multiprocessing.Process:
         server = InferenceServer(
             input_queue=input_queue,
@@ -514,6 +752,8 @@ def run_outlet(
             min_det_score_value=min_det_score_control,
             min_face_width_px_value=min_face_width_control,
             roi_by_camera=roi_by_camera,
+            result_slots={cid: slot.spec() for cid, slot in result_slots.items()} if use_result_slots else None,
+            label_table=label_table.spec() if use_result_slots else None,
         )
         proc = multiprocessing.Process(target=server.run, name="inference_server")
         proc.daemon = True
@@ -560,14 +800,30 @@ def run_outlet(
             save_raw_preview=settings.runtime.preview_raw_enabled,
             idle_sleep_sec=settings.runtime.worker_idle_sleep_sec,
             preview=preview,
+            rtsp_open_timeout_sec=settings.runtime.rtsp_open_timeout_sec,
+            status_array=worker_status_arrays[cam_id],
         )
 
         if use_shm:
             worker_kwargs.update(
-                shm_name=cam_id,
-                shm_max_h=max_h,
-                shm_max_w=max_w,
-                shm_lock=shared_locks[cam_id],
+                shm_spec=shared_buffer_configs[cam_id],
+                shm_max_h=shm_limits[cam_id][0],
+                shm_max_w=shm_limits[cam_id][1],
+                shm_resize_queue=shm_resize_queue,
+            )
+
+        if use_result_slots:
+            worker_kwargs.update(
+                result_slot_spec=result_slots[cam_id].spec(),
+                label_table_spec=label_table.spec(),
+            )
+
+        if cam_id in preview_slots:
+            worker_kwargs.update(
+                preview_slot_specs={v: slot.spec() for v, slot in preview_slots[cam_id].items()},
+                preview_disk_interval_sec=settings.runtime.preview_disk_interval_sec,
+                preview_on_demand=settings.runtime.preview_on_demand,
+                preview_demand_ttl_sec=settings.runtime.preview_demand_ttl_sec,
             )
 
         worker_configs[cam_id] = worker_kwargs
@@ -580,7 +836,40 @@ def run_outlet(
         target_spg_ids=target_spg_ids
     )
     
-    event_stores = {cid: EventStore(d) for cid, d in cam_dirs.items()}
+    # Event lines are serialized and written in batches off the coordinator thread.
+    event_writer = EventWriter(
+        flush_interval_sec=settings.storage.event_flush_interval_sec,
+        flush_max_bytes=settings.storage.event_flush_max_bytes,
+        queue_max_size=settings.storage.event_queue_max_size,
+        durability=settings.storage.event_durability,
+        rotate=settings.storage.event_rotate,
+        rotate_max_bytes=settings.storage.event_rotate_max_bytes,
+        compress_segments=settings.storage.event_compress_segments,
+        index_span_bytes=settings.storage.event_index_span_bytes,
+        sqlite_store=SqliteEventStore(
+            os.path.join(base_data_dir, settings.storage.sqlite_filename),
+            synchronous="FULL" if settings.storage.event_durability == "fsync" else "NORMAL",
+        ) if settings.storage.sqlite_enabled else None,
+        presence_store=PresenceAnalyticsStore(
+            os.path.join(base_data_dir, settings.storage.presence_analytics_filename),
+            merge_gap_sec=settings.storage.presence_interval_gap_sec,
+        ) if settings.storage.presence_analytics_enabled else None,
+    )
+    event_writer.start()
+    event_stores = {cid: EventStore(d, writer=event_writer) for cid, d in cam_dirs.items()}
+    # SPG_SEEN is persisted as presence intervals; the per-frame stream is opt-in.
+    raw_seen_events = bool(settings.storage.raw_seen_events)
+    presence_compactor = PresenceCompactor(
+        outlet_id,
+        gap_sec=settings.storage.presence_interval_gap_sec,
+        checkpoint_sec=settings.storage.presence_checkpoint_sec,
+    )
+
+    def _store_records(records: list[Event]) -> None:
+        for rec in records:
+            store = event_stores.get(rec.camera_id)
+            if store is not None:
+                store.append(rec)
     snapshot_store = SnapshotStore(settings.storage.data_dir) # Initialize snapshot store
     source_by_camera = {cam_id: src for cam_id, src in camera_sources}
     camera_metrics = {
@@ -610,18 +899,30 @@ def run_outlet(
     high_lag_streak = 0
     low_lag_streak = 0
     
-    # Telegram
+    # Telegram (delivered by a background dispatcher; the main loop only enqueues)
     notifier = None
     if settings.notification.telegram_enabled:
         try:
-            notifier = TelegramNotifier.from_env(
+            telegram = TelegramNotifier.from_env(
                 token_env=settings.notification.telegram_bot_token_env,
                 chat_id_env=settings.notification.telegram_chat_id_env,
                 timeout_sec=settings.notification.timeout_sec,
                 max_retries=settings.notification.max_retries,
                 retry_backoff_base_sec=settings.notification.retry_backoff_base_sec,
                 retry_after_default_sec=settings.notification.retry_after_default_sec,
+                api_base=settings.notification.api_base_url,
             )
+            notifier = NotificationDispatcher(
+                telegram,
+                outbox_path=os.path.join(base_data_dir, "notification_outbox.json"),
+                max_outbox=settings.notification.outbox_max_size,
+                max_attempts=settings.notification.dispatcher_max_attempts,
+                retry_backoff_base_sec=settings.notification.retry_backoff_base_sec,
+                retry_backoff_max_sec=settings.notification.retry_backoff_max_sec,
+                min_send_interval_sec=settings.notification.rate_limit_min_interval_sec,
+                max_sends_per_minute=settings.notification.rate_limit_per_minute,
+            )
+            notifier.start()
             # Send startup signal
             mode_str = "SIMULATION" if use_simulation else "PRODUCTION"
             startup_msg = (
@@ -631,203 +932,375 @@ def run_outlet(
                 f"Cameras: {len(camera_sources)}\n"
                 f"Time: {time.strftime('%Y-%m-%d %H:%M:%S')}"
             )
-            try:
-                notifier.send_message(startup_msg)
-            except Exception as e:
-                logger.warning(f"Failed to send startup telegram: {e}")
+            notifier.submit_message(startup_msg)
 
         except Exception as e:
             logger.warning(f"Telegram notifier disabled: {e}")
     else:
         logger.info("Telegram notification disabled in config.")
-    
+
+    # Bursts of absence alerts (shift change, dark camera) go out as one digest + one photo.
+    alert_coalescer = AlertCoalescer(
+        window_sec=settings.notification.alert_coalesce_window_sec,
+        max_items=settings.notification.alert_digest_max_items,
+    )
+
+    # Alert photos come from in-memory JPEGs sampled from the shm rings (encoded once).
+    evidence_cache = EvidenceCache(
+        frames_per_camera=settings.notification.evidence_frames_per_camera,
+        max_width=settings.notification.evidence_max_width,
+        jpeg_quality=settings.notification.evidence_jpeg_quality,
+    ) if notifier else None
+    if evidence_cache is not None:
+        evidence_cache.start()
+    evidence_interval_sec = max(0.1, float(settings.notification.evidence_interval_sec))
+    next_evidence_ts = 0.0
+
+    def _refresh_evidence(cam_ids, force: bool = False) -> None:
+        for cid in cam_ids:
+            buf = shared_buffers.get(cid)
+            if buf is None:
+                continue
+            latest = evidence_cache.latest(cid)
+            try:
+                # Peek: sampling evidence must not mark ring slots as consumed by inference.
+                frame, meta = buf.peek()
+                if frame is None or (latest is not None and latest.frame_id == meta.frame_id):
+                    continue
+                if force:
+                    # Alert path: the photo is read right after, so encode here.
+                    evidence_cache.capture(cid, frame, frame_id=meta.frame_id, ts=meta.timestamp)
+                    continue
+                if latest is not None and (meta.timestamp - latest.ts) < evidence_interval_sec:
+                    continue
+                if evidence_cache.pending_frame_id(cid) == meta.frame_id:
+                    continue
+                # Periodic sampling: the full-size encode runs on the cache's thread, not the coordinator.
+                evidence_cache.submit(cid, frame, frame_id=meta.frame_id, ts=meta.timestamp)
+            except Exception as e:
+                logger.debug(f"[Evidence] {cid} capture failed: {e}")
+
+    def _alert_photos(group: list[Event]) -> list[tuple[str, str, bytes, float]]:
+        """One (camera_id, path, jpeg, ts) per camera where the alerted SPGs were last seen."""
+        cams = []
+        for al in group:
+            cid = aggregator.last_seen_camera.get(al.spg_id)
+            if cid and cid not in cams:
+                cams.append(cid)
+        if not cams:
+            # Never seen anywhere: show the first camera that has something.
+            cams = [cid for cid in cam_dirs if evidence_cache.latest(cid) is not None][:1] or list(cam_dirs)[:1]
+        _refresh_evidence(cams, force=True)
+
+        photos = []
+        for cid in cams:
+            item = evidence_cache.latest(cid)
+            preview_slot = preview_slots.get(cid, {}).get("ai")
+            latest_preview = preview_slot.read() if item is None and preview_slot is not None else None
+            if item is not None:
+                jpeg, ts = item.jpeg, item.ts
+            elif latest_preview is not None:
+                # No shm frame ring (queue mode): worker preview from memory, bytes used as-is.
+                jpeg, ts = latest_preview[1], preview_slot.info()["ts"]
+            else:
+                # No shm (queue mode): worker preview on disk, bytes used as-is.
+                possible_path = os.path.join(cam_dirs[cid], "snapshots", "latest_frame.jpg") if cid in cam_dirs else ""
+                try:
+                    with open(possible_path, "rb") as f:
+                        jpeg = f.read()
+                    ts = os.path.getmtime(possible_path)
+                except OSError:
+                    continue
+            try:
+                path = snapshot_store.save_alert_bytes(outlet_id, cid, jpeg, ts=ts)
+            except OSError as e:
+                logger.warning(f"[Evidence] Failed to persist alert frame for {cid}: {e}")
+                path = None
+            photos.append((cid, path, jpeg, ts))
+        return photos
+
+    def _ema(prev: float | None, value: float) -> float:
+        return value if prev is None else (0.2 * value + 0.8 * prev)
+
+    def _record_result_metrics(
+        cid: str,
+        now_ts: float,
+        result_ts: float,
+        frame_id: int,
+        inference_time_ms: float,
+        capture_to_inference_ms: float | None,
+        input_queue_wait_ms: float,
+        inference_done_ts: float,
+        processed: int = 1,
+    ) -> None:
+        metrics = camera_metrics.get(cid)
+        if metrics is None:
+            return
+        metrics["processed_frames"] += processed
+        metrics["last_result_ts"] = result_ts
+        metrics["last_frame_id"] = frame_id
+        window = result_windows[cid]
+        for _ in range(min(processed, window.maxlen or processed)):
+            window.append(now_ts)
+
+        metrics["inference_time_ema_ms"] = _ema(metrics["inference_time_ema_ms"], inference_time_ms)
+
+        lag_ms = max(0.0, (now_ts - result_ts) * 1000.0)
+        metrics["queue_lag_ema_ms"] = _ema(metrics["queue_lag_ema_ms"], lag_ms)
+
+        cap_to_inf_ms = lag_ms if capture_to_inference_ms is None else float(capture_to_inference_ms)
+        metrics["capture_to_inference_ema_ms"] = _ema(metrics["capture_to_inference_ema_ms"], cap_to_inf_ms)
+        metrics["input_queue_wait_ema_ms"] = _ema(metrics["input_queue_wait_ema_ms"], input_queue_wait_ms)
+
+        post_inf_q_ms = max(0.0, (now_ts - inference_done_ts) * 1000.0)
+        metrics["post_inference_queue_ema_ms"] = _ema(metrics["post_inference_queue_ema_ms"], post_inf_q_ms)
+
+    def _ingest_matches(cid: str, frame_id: int, result_ts: float, faces: list[dict]) -> list[Event]:
+        """Update per-camera hit streaks from one result and return confirmed SPG_SEEN events."""
+        candidates_by_spg: dict[str, dict] = {}
+        for f in faces:
+            if not f.get("matched"):
+                continue
+            spg_id = f.get("spg_id")
+            if spg_id not in target_spg_set:
+                continue
+
+            prev = candidates_by_spg.get(spg_id)
+            if prev is None or float(f.get("similarity", 0.0)) > float(prev.get("similarity", 0.0)):
+                candidates_by_spg[spg_id] = f
+
+        streaks = hit_streaks_by_camera.setdefault(cid, {})
+        seen_spg_ids = set(candidates_by_spg.keys())
+        metrics = camera_metrics.get(cid)
+        out: list[Event] = []
+
+        for spg_id, f in candidates_by_spg.items():
+            streak_now = streaks.get(spg_id, 0) + 1
+            streaks[spg_id] = streak_now
+            current_min_hits = max(1, int(min_hits_control.value))
+            if streak_now < current_min_hits:
+                continue
+
+            ev = Event(
+                event_type="SPG_SEEN",
+                outlet_id=outlet_id,
+                camera_id=cid,
+                spg_id=spg_id,
+                name=f.get("name"),
+                similarity=float(f.get("similarity", 0.0)),
+                ts=result_ts,
+                details={"frame_id": frame_id, "consecutive_hits": streak_now},
+            )
+            if raw_seen_events and cid in event_stores:
+                event_stores[cid].append(ev)
+            _store_records(presence_compactor.ingest(ev))
+            out.append(ev)
+            if metrics is not None:
+                metrics["events_count"] += 1
+                metrics["last_event_ts"] = float(result_ts)
+
+        for spg_id in list(streaks.keys()):
+            if spg_id not in seen_spg_ids:
+                streaks.pop(spg_id, None)
+        return out
+
+    last_slot_seq: dict[str, int] = {cid: slot.seq for cid, slot in result_slots.items()}
+    last_match_seq: dict[str, int] = dict(last_slot_seq)
+
+    def _handle_output(res) -> list[Event]:
+        """Process one output_queue item (match tuple or legacy result dict)."""
+        if isinstance(res, tuple):
+            # Result-slot mode: (camera_id, seq, frame_id, capture_ts, [(spg_id, name, similarity), ...])
+            cid, seq, frame_id, capture_ts, matches = res
+            if seq != last_match_seq.get(cid, 0) + 1:
+                # Results in between had no matches -> every streak on this camera is broken.
+                hit_streaks_by_camera.setdefault(cid, {}).clear()
+            last_match_seq[cid] = seq
+            matched_faces = [
+                {"matched": True, "spg_id": spg_id, "name": name, "similarity": sim}
+                for spg_id, name, sim in matches
+            ]
+            return _ingest_matches(cid, int(frame_id), float(capture_ts), matched_faces)
+
+        cid = res['camera_id']
+        now_ts = time.time()
+        _record_result_metrics(
+            cid,
+            now_ts=now_ts,
+            result_ts=float(res.get("timestamp", now_ts)),
+            frame_id=int(res.get("frame_id", 0)),
+            inference_time_ms=float(res.get("inference_time_ms", 0.0)),
+            capture_to_inference_ms=res.get("capture_to_inference_ms"),
+            input_queue_wait_ms=float(res.get("input_queue_wait_ms", 0.0)),
+            inference_done_ts=float(res.get("inference_done_ts", now_ts)),
+        )
+
+        if cid in worker_feedback_queues:
+            try:
+                worker_feedback_queues[cid].put_nowait(res)
+            except queue.Full:
+                pass
+
+        return _ingest_matches(cid, res['frame_id'], res['timestamp'], res['faces'])
+
+    supervisor_interval_sec = max(0.05, float(settings.runtime.supervisor_interval_sec))
+    aggregator_tick_interval_sec = max(0.05, float(settings.runtime.aggregator_tick_interval_sec))
+    state_publish_interval_sec = max(0.05, float(settings.runtime.state_publish_interval_sec))
+    next_supervise_ts = next_tick_ts = next_publish_ts = time.monotonic()
+
     logger.info("[Main] Centralized Loop active.")
     state_path = os.path.join(base_data_dir, "outlet_state.json")
     health_path = os.path.join(base_data_dir, "camera_health.json")
+
+    # State/health go to versioned shm segments every publish; JSON files are a low-rate export.
+    state_segments: dict[str, SharedStateSegment] = {}
+    if settings.runtime.state_transport == "shm":
+        for doc in STATE_DOCUMENTS:
+            try:
+                state_segments[doc] = SharedStateSegment.create(
+                    base_data_dir, doc, capacity=settings.runtime.state_shm_capacity_bytes
+                )
+            except Exception as e:
+                logger.warning(f"[SharedMem] Failed to create {doc} segment: {e}. Writing {doc} JSON every publish.")
+    # Change-driven: unchanged documents are only republished as a staleness heartbeat.
+    publisher_kwargs = dict(
+        min_interval_sec=settings.runtime.state_min_publish_interval_sec,
+        max_staleness_sec=settings.runtime.state_max_staleness_sec,
+        export_interval_sec=settings.runtime.state_export_interval_sec,
+    )
+    state_publisher = StatePublisher(
+        "state",
+        state_path,
+        segment=state_segments.get("state"),
+        volatile_keys={"timestamp", "seconds_since_last_event"},
+        **publisher_kwargs,
+    )
+    health_publisher = StatePublisher(
+        "health",
+        health_path,
+        segment=state_segments.get("health"),
+        volatile_keys={"timestamp", "last_result_age_sec", "connecting_for_sec", "state_publisher"},
+        **publisher_kwargs,
+    )
     
     try:
         while True:
-            loop_now = time.time()
-            _apply_runtime_control()
-
-            # Inference process
-            if not p_server.is_alive():
-                if (loop_now - inference_last_restart_ts) >= restart_cooldown_sec and _restart_allowed(
-                    inference_restart_history, max_restarts_per_minute
-                ):
-                    logger.error("[Supervisor] Inference process died. Restarting...")
-                    _terminate_process(p_server, "inference_server")
-                    p_server = _spawn_inference()
-                    inference_last_restart_ts = loop_now
-                elif (loop_now - inference_last_restart_ts) >= restart_cooldown_sec:
-                    logger.critical("[Supervisor] Inference restart budget exhausted. Stopping pipeline.")
-                    break
-
-            # Camera workers (per-camera recovery)
-            for cam_id, proc in list(worker_processes.items()):
-                if cam_id in worker_restart_exhausted:
-                    continue
-                if proc.is_alive():
-                    continue
-
-                if (loop_now - worker_last_restart_ts.get(cam_id, 0.0)) < restart_cooldown_sec:
-                    continue
-
-                hist = worker_restart_histories.get(cam_id)
-                if hist is None:
-                    hist = deque()
-                    worker_restart_histories[cam_id] = hist
+            # Block until a result arrives or the next timer is due (no fixed-sleep polling).
+            wait_sec = max(0.0, min(next_supervise_ts, next_tick_ts, next_publish_ts) - time.monotonic())
+            events_batch = []
+            try:
+                res = output_queue.get(timeout=wait_sec) if wait_sec > 0 else output_queue.get_nowait()
+                events_batch.extend(_handle_output(res))
+                for _ in range(49):
+                    events_batch.extend(_handle_output(output_queue.get_nowait()))
+            except queue.Empty:
+                pass
 
-                if not _restart_allowed(hist, max_restarts_per_minute):
-                    worker_restart_exhausted.add(cam_id)
-                    logger.critical(f"[Supervisor] Worker {cam_id} restart budget exhausted.")
-                    continue
+            if events_batch:
+                aggregator.ingest_events(events_batch)
 
-                logger.error(f"[Supervisor] Worker {cam_id} died. Restarting...")
-                _terminate_process(proc, f"worker_{cam_id}")
-                worker_last_restart_ts[cam_id] = loop_now
-                _spawn_worker(cam_id)
+            mono_now = time.monotonic()
+            loop_now = time.time()
 
-            # Drain output queue
-            events_batch = []
-            for _ in range(50):
-                try:
-                    res = output_queue.get_nowait()
-                    cid = res['camera_id']
-                    now_ts = time.time()
-
-                    metrics = camera_metrics.get(cid)
-                    if metrics is not None:
-                        metrics["processed_frames"] += 1
-                        result_ts = float(res.get("timestamp", now_ts))
-                        metrics["last_result_ts"] = result_ts
-                        metrics["last_frame_id"] = int(res.get("frame_id", 0))
-                        result_windows[cid].append(now_ts)
-
-                        inf_ms = float(res.get("inference_time_ms", 0.0))
-                        prev_inf = metrics["inference_time_ema_ms"]
-                        metrics["inference_time_ema_ms"] = inf_ms if prev_inf is None else (0.2 * inf_ms + 0.8 * prev_inf)
-
-                        lag_ms = max(0.0, (now_ts - result_ts) * 1000.0)
-                        prev_lag = metrics["queue_lag_ema_ms"]
-                        metrics["queue_lag_ema_ms"] = lag_ms if prev_lag is None else (0.2 * lag_ms + 0.8 * prev_lag)
-
-                        cap_to_inf_ms = float(res.get("capture_to_inference_ms", lag_ms))
-                        prev_cap_inf = metrics["capture_to_inference_ema_ms"]
-                        metrics["capture_to_inference_ema_ms"] = (
-                            cap_to_inf_ms
-                            if prev_cap_inf is None
-                            else (0.2 * cap_to_inf_ms + 0.8 * prev_cap_inf)
-                        )
+            if mono_now >= next_supervise_ts:
+                next_supervise_ts = mono_now + supervisor_interval_sec
+                _apply_runtime_control()
+                if use_shm:
+                    _apply_shm_resize_requests()
+
+                # Inference process
+                if not p_server.is_alive():
+                    if (loop_now - inference_last_restart_ts) >= restart_cooldown_sec and _restart_allowed(
+                        inference_restart_history, max_restarts_per_minute
+                    ):
+                        logger.error("[Supervisor] Inference process died. Restarting...")
+                        _terminate_process(p_server, "inference_server")
+                        p_server = _spawn_inference()
+                        inference_last_restart_ts = loop_now
+                    elif (loop_now - inference_last_restart_ts) >= restart_cooldown_sec:
+                        logger.critical("[Supervisor] Inference restart budget exhausted. Stopping pipeline.")
+                        break
+
+                # Camera workers (per-camera recovery)
+                for cam_id, proc in list(worker_processes.items()):
+                    if cam_id in worker_restart_exhausted:
+                        continue
+                    if proc.is_alive():
+                        continue
 
-                        in_q_wait_ms = float(res.get("input_queue_wait_ms", 0.0))
-                        prev_in_q = metrics["input_queue_wait_ema_ms"]
-                        metrics["input_queue_wait_ema_ms"] = (
-                            in_q_wait_ms
-                            if prev_in_q is None
-                            else (0.2 * in_q_wait_ms + 0.8 * prev_in_q)
-                        )
+                    if (loop_now - worker_last_restart_ts.get(cam_id, 0.0)) < restart_cooldown_sec:
+                        continue
 
-                        inf_done_ts = float(res.get("inference_done_ts", now_ts))
-                        post_inf_q_ms = max(0.0, (now_ts - inf_done_ts) * 1000.0)
-                        prev_post_q = metrics["post_inference_queue_ema_ms"]
-                        metrics["post_inference_queue_ema_ms"] = (
-                            post_inf_q_ms
-                            if prev_post_q is None
-                            else (0.2 * post_inf_q_ms + 0.8 * prev_post_q)
-                        )
-                    
-                    if cid in worker_feedback_queues:
-                        try:
-                            worker_feedback_queues[cid].put_nowait(res)
-                        except queue.Full:
-                            pass
-
-                    candidates_by_spg: dict[str, dict] = {}
-                    for f in res['faces']:
-                        if not f.get("matched"):
-                            continue
-                        spg_id = f.get("spg_id")
-                        if spg_id not in target_spg_set:
-                            continue
-
-                        prev = candidates_by_spg.get(spg_id)
-                        if prev is None or float(f.get("similarity", 0.0)) > float(prev.get("similarity", 0.0)):
-                            candidates_by_spg[spg_id] = f
-
-                    streaks = hit_streaks_by_camera.setdefault(cid, {})
-                    seen_spg_ids = set(candidates_by_spg.keys())
-
-                    for spg_id, f in candidates_by_spg.items():
-                        streak_now = streaks.get(spg_id, 0) + 1
-                        streaks[spg_id] = streak_now
-                        current_min_hits = max(1, int(min_hits_control.value))
-                        if streak_now < current_min_hits:
-                            continue
-
-                        ev = Event(
-                            event_type="SPG_SEEN",
-                            outlet_id=outlet_id,
-                            camera_id=cid,
-                            spg_id=spg_id,
-                            name=f.get("name"),
-                            similarity=float(f.get("similarity", 0.0)),
-                            ts=res['timestamp'],
-                            details={"frame_id": res['frame_id'], "consecutive_hits": streak_now},
-                        )
-                        if cid in event_stores:
-                            event_stores[cid].append(ev)
-                        events_batch.append(ev)
-                        if metrics is not None:
-                            metrics["events_count"] += 1
-                            metrics["last_event_ts"] = float(res.get("timestamp", now_ts))
+                    hist = worker_restart_histories.get(cam_id)
+                    if hist is None:
+                        hist = deque()
+                        worker_restart_histories[cam_id] = hist
 
-                    for spg_id in list(streaks.keys()):
-                        if spg_id not in seen_spg_ids:
-                            streaks.pop(spg_id, None)
+                    if not _restart_allowed(hist, max_restarts_per_minute):
+                        worker_restart_exhausted.add(cam_id)
+                        logger.critical(f"[Supervisor] Worker {cam_id} restart budget exhausted.")
+                        continue
 
-                except queue.Empty:
-                    break
+                    logger.error(f"[Supervisor] Worker {cam_id} died. Restarting...")
+                    _terminate_process(proc, f"worker_{cam_id}")
+                    worker_last_restart_ts[cam_id] = loop_now
+                    _spawn_worker(cam_id)
 
-            if events_batch:
-                aggregator.ingest_events(events_batch)
+            if mono_now >= next_tick_ts:
+                next_tick_ts = mono_now + aggregator_tick_interval_sec
+                alerts = aggregator.tick()
+                _store_records(presence_compactor.flush_due())
             
-            alerts = aggregator.tick()
-            
-            for al in alerts:
-                reason = al.details.get("reason", "unknown")
-                spg = al.name or al.spg_id
-                ts_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(al.ts))
-                txt = (
-                    "SPG ABSENCE DETECTED\n"
-                    f"Outlet: {al.outlet_id}\n"
-                    f"SPG: {spg} ({al.spg_id})\n"
-                    f"Reason: {reason}\n"
-                    f"Time: {ts_str}"
-                )
-                logger.info(f"[Alert] Sending Telegram: ABSENCE {spg} ({reason})")
-                if notifier:
+                for al in alerts:
+                    reason = al.details.get("reason", "unknown")
+                    logger.info(f"[Alert] ABSENCE {al.name or al.spg_id} ({reason})")
+                    # Logged with the camera where the SPG was last seen (dashboard event feed).
+                    alert_cam = aggregator.last_seen_camera.get(al.spg_id) or next(iter(event_stores), None)
+                    if alert_cam in event_stores:
+                        event_stores[alert_cam].append(al)
+                    if notifier:
+                        alert_coalescer.add(al)
+
+                for group in alert_coalescer.pop_due():
+                    logger.info(f"[Alert] Queueing Telegram digest ({len(group)} alert(s))")
                     try:
-                        notifier.send_message(txt)
-
-                        snapshot_path = None
-                        for cid in cam_dirs:
-                             possible_path = os.path.join(cam_dirs[cid], "snapshots", "latest_frame.jpg")
-                             if os.path.exists(possible_path):
-                                 try:
-                                     frame = cv2.imread(possible_path)
-                                     if frame is not None:
-                                         snapshot_path = snapshot_store.save_alert_frame(outlet_id, cid, frame)
-                                         break
-                                 except Exception:
-                                     pass
-                        
-                        if snapshot_path:
-                            notifier.send_photo(snapshot_path, caption=f"📸 Snapshot at {ts_str}")
-                            
+                        notifier.submit_message(format_alert_digest(group))
+                        for cid, path, jpeg, ts in _alert_photos(group):
+                            ts_str = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
+                            notifier.submit_photo(path, caption=f"📸 {cid} at {ts_str}", photo_bytes=jpeg)
                     except Exception as e:
-                        logger.warning(f"Failed to send telegram alert: {e}")
-                        pass
+                        logger.warning(f"Failed to queue telegram alert: {e}")
+
+            if evidence_cache is not None and mono_now >= next_evidence_ts:
+                next_evidence_ts = mono_now + evidence_interval_sec
+                _refresh_evidence(shared_buffers.keys())
+
+            if mono_now < next_publish_ts:
+                continue
+            next_publish_ts = mono_now + state_publish_interval_sec
+
+            # Poll shared result slots (metrics for every result, no unpickling).
+            # Latencies are measured at inference_done_ts: the slot is visible to readers
+            # immediately, so there is no post-inference queue to account for.
+            if use_result_slots:
+                for cid, slot in result_slots.items():
+                    prev_seq = last_slot_seq.get(cid, 0)
+                    snap = slot.read(since_seq=prev_seq)
+                    if snap is None:
+                        continue
+                    processed = snap.seq - prev_seq if prev_seq > 0 else 1
+                    last_slot_seq[cid] = snap.seq
+                    _record_result_metrics(
+                        cid,
+                        now_ts=snap.inference_done_ts,
+                        result_ts=snap.capture_ts,
+                        frame_id=snap.frame_id,
+                        inference_time_ms=snap.inference_time_ms,
+                        capture_to_inference_ms=snap.capture_to_inference_ms,
+                        input_queue_wait_ms=snap.input_queue_wait_ms,
+                        inference_done_ts=snap.inference_done_ts,
+                        processed=max(1, processed),
+                    )
 
             if auto_degrade_enabled:
                 lag_samples = []
@@ -887,6 +1360,16 @@ def run_outlet(
                     "inference_restarts_last_minute": len(inference_restart_history),
                     "worker_restart_exhausted": sorted(worker_restart_exhausted),
                 },
+                "notifications": notifier.stats() if notifier else {"enabled": False},
+                "event_writer": event_writer.stats(),
+                "evidence_cache": evidence_cache.stats() if evidence_cache else {"cameras": 0, "frames": 0, "bytes": 0, "dropped": 0},
+                "shared_memory": {
+                    "enabled": use_shm,
+                    "ring_slots": frame_ring_slots,
+                    "total_bytes": sum(buf.nbytes for buf in shared_buffers.values()),
+                    "preview_transport": "shm" if preview_slots else "file",
+                    "preview_on_demand": bool(preview_slots) and settings.runtime.preview_on_demand,
+                },
                 "cameras": [],
             }
             for cam_id, src in source_by_camera.items():
@@ -917,6 +1400,20 @@ def run_outlet(
                 if cam_id in worker_restart_exhausted:
                     status = "OFFLINE"
 
+                conn = worker_status_arrays.get(cam_id)
+                conn_vals = list(conn[:]) if conn is not None else list(_WORKER_STATUS_INIT)
+                slot = shared_buffers.get(cam_id)
+                shm_resolution = None
+                shm_ring_drops = 0
+                if slot is not None:
+                    slot_h, slot_w = slot.shape
+                    shm_resolution = f"{slot_w}x{slot_h}"
+                    shm_ring_drops = slot.stats()["dropped"]
+
+                connection_state = CONN_STATE_NAMES.get(int(conn_vals[0]), "idle")
+                connect_latency_ms = None if conn_vals[1] < 0 else round(conn_vals[1], 1)
+                connecting_for_sec = None if conn_vals[3] < 0 else round(conn_vals[3], 1)
+
                 health_payload["cameras"].append(
                     {
                         "camera_id": cam_id,
@@ -925,6 +1422,21 @@ def run_outlet(
                         "worker_alive": worker_alive,
                         "restart_exhausted": cam_id in worker_restart_exhausted,
                         "worker_restarts_last_minute": len(worker_restart_histories.get(cam_id, deque())),
+                        "connection_state": connection_state,
+                        "connect_latency_ms": connect_latency_ms,
+                        "connect_attempts": int(conn_vals[2]),
+                        "connecting_for_sec": connecting_for_sec,
+                        "shm_resolution": shm_resolution,
+                        "shm_bytes": slot.nbytes if slot is not None else 0,
+                        "shm_ring_drops": shm_ring_drops,
+                        "preview_viewers": int(conn_vals[4]),
+                        "preview_frames_encoded": int(conn_vals[5]),
+                        "preview_ticks_skipped": int(conn_vals[6]),
+                        "preview_encode_ms": round(conn_vals[7], 2),
+                        "preview_cpu_saved_sec": round(conn_vals[8] / 1000.0, 2),
+                        "preview_frames_dropped": int(conn_vals[11]),
+                        "capture_read_ms": round(conn_vals[9], 2),
+                        "frame_write_ms": round(conn_vals[10], 2),
                         "processed_fps": round(processed_fps, 2),
                         "inference_time_ms": round(float(m.get("inference_time_ema_ms") or 0.0), 1),
                         "queue_lag_ms": round(float(m.get("queue_lag_ema_ms") or 0.0), 1),
@@ -936,21 +1448,43 @@ def run_outlet(
                         "events_count": int(m.get("events_count") or 0),
                     }
                 )
-            _safe_write_json(health_path, health_payload)
-            
-            aggregator.dump_state(state_path)
-                
-            time.sleep(settings.runtime.main_loop_sleep_sec)
+            health_payload["state_publisher"] = {
+                "state": state_publisher.stats(),
+                "health": health_publisher.stats(),
+            }
+            health_publisher.publish(health_payload)
+            state_publisher.publish(aggregator.get_state())
 
     except KeyboardInterrupt:
         logger.info("Stopping...")
     finally:
+        _store_records(presence_compactor.close_all())
+        event_writer.stop()
+        if notifier:
+            for group in alert_coalescer.pop_due(now=float("inf")):
+                notifier.submit_message(format_alert_digest(group))
+            notifier.stop()
+        if evidence_cache is not None:
+            evidence_cache.stop()
         _terminate_process(p_server, "inference_server")
         for cam_id, proc in worker_processes.items():
             _terminate_process(proc, f"worker_{cam_id}")
         for buf in shared_buffers.values():
             buf.close()
             buf.unlink()
+        for slot in result_slots.values():
+            slot.close()
+            slot.unlink()
+        if label_table is not None:
+            label_table.close()
+            label_table.unlink()
+        for slots in preview_slots.values():
+            for slot in slots.values():
+                slot.close()
+                slot.unlink()
+        for seg in state_segments.values():
+            seg.close()
+            seg.unlink()
 
 if __name__ == "__main__":
     import argparse
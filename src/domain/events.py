@@ -8,6 +8,7 @@ from typing import Any, Literal, Optional
 EventType = Literal[
     "SYSTEM_START",
     "SPG_SEEN",
+    "SPG_SEEN_INTERVAL",
     "SPG_PRESENT",
     "SPG_ABSENT",
     "ABSENT_ALERT_FIRED",
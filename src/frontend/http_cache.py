@@ -0,0 +1,127 @@
+"""
+Dashboard response helpers: short TTL caches and ETag / If-None-Match handling.
+
+Handlers run their filesystem work in the threadpool (`asyncio.to_thread`) so the
+event loop keeps serving MJPEG streams and SSE. A TTLCache in front of each
+payload builder lets concurrent requests (several tabs, several polls landing in
+the same tick) share one build, and serializes the payload once: the cached entry
+holds the JSON body and its ETag, so a 304 costs neither a rebuild nor a
+serialization.
+
+Usage:
+    cache = TTLCache(ttl_sec=0.5)
+    entry = await cache.get_async("state", build_state_payload)   # JsonEntry(payload, body, etag)
+    return json_response(request, entry)                          # 200 with ETag, or 304
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+
+from fastapi import Request, Response
+
+
+@dataclass(frozen=True)
+class JsonEntry:
+    payload: Any
+    body: bytes
+    etag: str
+
+    @classmethod
+    def build(cls, payload: Any) -> JsonEntry:
+        body = json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+        return cls(payload, body, f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"')
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison, as browsers may echo W/"..." after compression proxies.
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def json_response(
+    request: Request, entry: JsonEntry, cache_control: str = "no-cache", headers: dict | None = None
+) -> Response:
+    headers = {**(headers or {}), "ETag": entry.etag, "Cache-Control": cache_control}
+    if etag_matches(request, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+class TTLCache:
+    """Per-key memo with a time-to-live; concurrent misses on one key run the loader once."""
+
+    def __init__(self, ttl_sec: float = 0.5, max_entries: int = 256):
+        self.ttl_sec = max(0.0, float(ttl_sec))
+        self.max_entries = max(1, int(max_entries))
+        self._lock = threading.Lock()
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        self._key_locks: dict[Hashable, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _fresh(self, key: Hashable, now: float):
+        item = self._entries.get(key)
+        if item is not None and now - item[0] < self.ttl_sec:
+            return item
+        return None
+
+    def get(self, key: Hashable, loader: Callable[[], Any], as_json: bool = False) -> Any:
+        """Blocking; call from a worker thread. as_json=True caches a JsonEntry."""
+        with self._lock:
+            item = self._fresh(key, time.monotonic())
+            if item is not None:
+                self.hits += 1
+                return item[1]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                item = self._fresh(key, time.monotonic())
+                if item is not None:
+                    self.hits += 1
+                    return item[1]
+            try:
+                value = loader()
+                if as_json:
+                    value = JsonEntry.build(value)
+            except Exception:
+                with self._lock:
+                    if key not in self._entries:
+                        # Failed first load (e.g. a bad query key): nothing cached, keep no lock either.
+                        self._key_locks.pop(key, None)
+                raise
+            with self._lock:
+                self.misses += 1
+                if len(self._entries) >= self.max_entries and key not in self._entries:
+                    self._drop(next(iter(self._entries)))
+                self._entries[key] = (time.monotonic(), value)
+            return value
+
+    def _drop(self, key: Hashable) -> None:
+        """Forget an entry and its lock. Caller holds self._lock."""
+        self._entries.pop(key, None)
+        lock = self._key_locks.get(key)
+        # A held lock has a loader running; it is dropped again on the next evict/invalidate.
+        if lock is not None and not lock.locked():
+            del self._key_locks[key]
+
+    async def get_async(self, key: Hashable, loader: Callable[[], Any], as_json: bool = True) -> Any:
+        return await asyncio.to_thread(self.get, key, loader, as_json)
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        with self._lock:
+            for k in list(self._entries) if key is None else [key]:
+                self._drop(k)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "locks": len(self._key_locks), "hits": self.hits, "misses": self.misses}
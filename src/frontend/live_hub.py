@@ -0,0 +1,147 @@
+"""
+LiveHub: server-side watchers for dashboard resources, fanned out to SSE / WebSocket clients.
+
+Polling makes every browser re-read outlet_state.json, camera_health.json and the
+event logs every 2 seconds. Here each resource has ONE watcher task per dashboard
+process: it checks a cheap fingerprint (file stat) on an interval, rebuilds the
+payload only when the fingerprint changes, and pushes a diff to all subscribers
+only when the payload actually changed. Cost is O(changes), not O(clients x polls).
+
+Messages (JSON):
+    {"resource": "state", "op": "snapshot", "data": {...}}              full value
+    {"resource": "state", "op": "patch", "data": {...}, "removed": []}  changed top-level keys
+
+Each subscriber has a small bounded queue. A client that falls behind has its
+queue discarded and receives fresh snapshots instead of an unbounded backlog.
+
+Usage:
+    hub = LiveHub(queue_size=16)
+    hub.register("state", load=build_state, fingerprint=state_fingerprint, interval_sec=0.5)
+    sub = hub.subscribe(["state"])
+    msg = await sub.queue.get()
+    hub.unsubscribe(sub)
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Callable
+
+from src.settings.logger import logger
+
+
+def diff_payload(resource: str, old: Any, new: Any) -> dict | None:
+    """Message turning `old` into `new`, or None if nothing changed."""
+    if old is None or not isinstance(old, dict) or not isinstance(new, dict):
+        if old == new:
+            return None
+        return {"resource": resource, "op": "snapshot", "data": new}
+    changed = {k: v for k, v in new.items() if k not in old or old[k] != v}
+    removed = [k for k in old if k not in new]
+    if not changed and not removed:
+        return None
+    return {"resource": resource, "op": "patch", "data": changed, "removed": removed}
+
+
+class Subscriber:
+    def __init__(self, resources: list[str], queue_size: int):
+        self.resources = resources
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.resyncs = 0
+
+
+class ResourceWatcher:
+    def __init__(
+        self,
+        hub: LiveHub,
+        name: str,
+        load: Callable[[], Any],
+        fingerprint: Callable[[], Any],
+        interval_sec: float,
+    ):
+        self.hub = hub
+        self.name = name
+        self.load = load
+        self.fingerprint = fingerprint
+        self.interval_sec = max(0.05, float(interval_sec))
+        self.subscribers: set[Subscriber] = set()
+        self.value: Any = None
+        self._fingerprint: Any = object()
+        self._task: asyncio.Task | None = None
+
+    def ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name=f"live_watch_{self.name}")
+
+    async def _run(self) -> None:
+        while self.subscribers:
+            try:
+                fp = await asyncio.to_thread(self.fingerprint)
+                if fp != self._fingerprint:
+                    self._fingerprint = fp
+                    new_value = await asyncio.to_thread(self.load)
+                    msg = diff_payload(self.name, self.value, new_value)
+                    self.value = new_value
+                    if msg is not None:
+                        for sub in list(self.subscribers):
+                            self.hub.deliver(sub, msg)
+            except Exception as e:
+                logger.warning(f"[LiveHub] Watcher {self.name} failed: {e}")
+            await asyncio.sleep(self.interval_sec)
+        # No subscribers left: forget the value so the next subscriber gets a fresh load.
+        self.value = None
+        self._fingerprint = object()
+        self._task = None
+
+    def snapshot(self) -> dict | None:
+        if self.value is None:
+            return None
+        return {"resource": self.name, "op": "snapshot", "data": self.value}
+
+
+class LiveHub:
+    def __init__(self, queue_size: int = 16):
+        self.queue_size = max(8, int(queue_size))
+        self._watchers: dict[str, ResourceWatcher] = {}
+
+    def register(self, name: str, load: Callable[[], Any], fingerprint: Callable[[], Any], interval_sec: float) -> None:
+        self._watchers[name] = ResourceWatcher(self, name, load, fingerprint, interval_sec)
+
+    @property
+    def resources(self) -> list[str]:
+        return list(self._watchers.keys())
+
+    def subscribe(self, resources: list[str]) -> Subscriber:
+        """Must be called from the event loop. Current values (if any) are queued as snapshots."""
+        names = [r for r in resources if r in self._watchers] or self.resources
+        sub = Subscriber(names, self.queue_size)
+        for name in names:
+            watcher = self._watchers[name]
+            watcher.subscribers.add(sub)
+            snap = watcher.snapshot()
+            if snap is not None:
+                sub.queue.put_nowait(snap)
+            watcher.ensure_running()
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        for name in sub.resources:
+            self._watchers[name].subscribers.discard(sub)
+
+    def deliver(self, sub: Subscriber, msg: dict) -> None:
+        try:
+            sub.queue.put_nowait(msg)
+            return
+        except asyncio.QueueFull:
+            pass
+        # Slow client: drop its backlog and resync with full snapshots.
+        sub.resyncs += 1
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        for name in sub.resources:
+            snap = self._watchers[name].snapshot()
+            if snap is not None:
+                sub.queue.put_nowait(snap)
+
+    def stats(self) -> dict:
+        return {name: {"subscribers": len(w.subscribers), "running": w._task is not None} for name, w in self._watchers.items()}
@@ -1,16 +1,26 @@
+import asyncio
+import datetime as dt
 import json
 import os
 import glob
 import time
-from collections import deque
 from typing import TYPE_CHECKING
 
-from fastapi import FastAPI, Request, Response
+from fastapi import FastAPI, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse, FileResponse
 from src.settings.settings import load_settings
+from src.frontend.http_cache import TTLCache, etag_matches, json_response
+from src.frontend.live_hub import LiveHub
+from src.frontend.mjpeg_hub import FileFrameSource, MjpegHub, ShmFrameSource
+from src.frontend.snapshot_index import SnapshotIndex
+from src.frontend.state_source import StateDocument
+from src.storage.event_log import RecentEventReader, read_range
+from src.storage.presence_analytics import PresenceAnalyticsReader, day_of, parse_day
+from src.storage.sqlite_event_store import SqliteEventReader
+from src.storage.thumbnail_cache import ThumbnailCache
 
 if TYPE_CHECKING:
     from src.pipeline.face_detector import FaceDetector
@@ -19,6 +29,28 @@ SETTINGS = load_settings()
 DATA_DIR = os.path.join(SETTINGS.storage.data_dir, SETTINGS.storage.sim_output_subdir)
 GALLERY_DIR = os.path.join(SETTINGS.storage.data_dir, SETTINGS.storage.gallery_subdir)
 HEALTH_PATH = os.path.join(DATA_DIR, "camera_health.json")
+STATE_PATH = os.path.join(DATA_DIR, "outlet_state.json")
+_STATE_SHM = SETTINGS.runtime.state_transport == "shm"
+# Unchanged documents are republished only every state_max_staleness_sec: don't re-attach before that.
+_STATE_REATTACH_SEC = max(2.0, 2 * SETTINGS.runtime.state_max_staleness_sec)
+STATE_DOC = StateDocument(DATA_DIR, "state", STATE_PATH, use_shm=_STATE_SHM, reattach_sec=_STATE_REATTACH_SEC)
+HEALTH_DOC = StateDocument(DATA_DIR, "health", HEALTH_PATH, use_shm=_STATE_SHM, reattach_sec=_STATE_REATTACH_SEC)
+EVENT_DB = (
+    SqliteEventReader(os.path.join(DATA_DIR, SETTINGS.storage.sqlite_filename))
+    if SETTINGS.storage.sqlite_enabled
+    else None
+)
+RECENT_EVENTS = RecentEventReader()
+PRESENCE_DB = PresenceAnalyticsReader(os.path.join(DATA_DIR, SETTINGS.storage.presence_analytics_filename))
+# Filesystem work runs in the threadpool; concurrent requests share one build per TTL.
+API_CACHE = TTLCache(ttl_sec=SETTINGS.dashboard.api_cache_ttl_sec)
+SNAPSHOTS = SnapshotIndex(DATA_DIR)
+THUMBS = ThumbnailCache(
+    os.path.join(GALLERY_DIR, ".thumbs"),
+    sizes=SETTINGS.dashboard.gallery_thumb_sizes,
+    max_bytes=SETTINGS.dashboard.gallery_thumb_cache_mb * 1024 * 1024,
+    jpeg_quality=SETTINGS.dashboard.gallery_thumb_jpeg_quality,
+)
 
 if not os.path.exists(DATA_DIR):
     print(f"Warning: {DATA_DIR} does not exist yet. Dashboard might be empty.")
@@ -54,75 +86,93 @@ templates = Jinja2Templates(directory=os.path.join(os.path.dirname(__file__), "t
 
 
 def get_state():
-    path = os.path.join(DATA_DIR, "outlet_state.json")
-    if not os.path.exists(path):
-        return {"status": "waiting", "outlet_id": "Unknown", "spgs": []}
-
+    # Parsed only when the coordinator published a new version (shm) or the file changed.
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        state = STATE_DOC.load()
     except Exception as e:
         return {"status": "error", "error": str(e)}
+    if not isinstance(state, dict):
+        return {"status": "waiting", "outlet_id": "Unknown", "spgs": []}
+    return dict(state)
 
 
 def get_health():
-    if not os.path.exists(HEALTH_PATH):
-        return {"timestamp": 0, "outlet_id": "Unknown", "cameras": []}
-
     try:
-        with open(HEALTH_PATH, "r", encoding="utf-8") as f:
-            payload = json.load(f)
+        payload = HEALTH_DOC.load()
     except Exception:
-        return {"timestamp": 0, "outlet_id": "Unknown", "cameras": []}
-
+        payload = None
     if not isinstance(payload, dict):
         return {"timestamp": 0, "outlet_id": "Unknown", "cameras": []}
+    payload = dict(payload)
     payload.setdefault("cameras", [])
     payload.setdefault("timestamp", 0)
     payload.setdefault("outlet_id", "Unknown")
     return payload
 
 
+def _event_db():
+    """SQLite reader when enabled and already created by the pipeline, else None (JSONL fallback)."""
+    if EVENT_DB is not None and EVENT_DB.available():
+        return EVENT_DB
+    return None
+
+
 def get_recent_events(limit: int | None = None):
     limit = limit or SETTINGS.dashboard.recent_events_limit
-    events = []
-    pattern = os.path.join(DATA_DIR, "cam_*", "events.jsonl")
-    files = glob.glob(pattern)
-
-    active_ids = _get_configured_camera_ids()
-    valid_files = []
-    for ef in files:
-        cam_id = os.path.basename(os.path.dirname(ef))
-        if cam_id in active_ids:
-            valid_files.append(ef)
-            
-    for ef in valid_files:
-        cam_id = os.path.basename(os.path.dirname(ef))
+    db = _event_db()
+    if db is not None:
         try:
-            with open(ef, "r", encoding="utf-8") as f:
-                recent_lines = deque(f, maxlen=limit)
+            return db.recent(limit=limit, sources=sorted(_get_configured_camera_ids()))
+        except Exception:
+            pass
 
-            for line in recent_lines:
-                if not line.strip():
-                    continue
-                try:
-                    ev = json.loads(line)
-                    ev["_camera"] = cam_id
-                    events.append(ev)
-                except json.JSONDecodeError:
-                    continue
+    # Tail-seeked per file and cached by (size, mtime); unchanged logs cost one stat().
+    cam_dirs = {
+        cam_id: os.path.join(DATA_DIR, cam_id)
+        for cam_id in sorted(_get_configured_camera_ids())
+        if os.path.isdir(os.path.join(DATA_DIR, cam_id))
+    }
+    try:
+        return RECENT_EVENTS.recent(cam_dirs, limit)
+    except Exception:
+        return []
+
+
+def query_events(
+    start_ts: float | None = None,
+    end_ts: float | None = None,
+    spg_id: str | None = None,
+    camera_id: str | None = None,
+    limit: int = 1000,
+) -> list[dict]:
+    """Time-range / per-SPG / per-camera events, newest first."""
+    start_ts = 0.0 if start_ts is None else start_ts
+    end_ts = time.time() if end_ts is None else end_ts
+    db = _event_db()
+    if db is not None:
+        try:
+            return db.query(start_ts=start_ts, end_ts=end_ts, spg_id=spg_id, camera_id=camera_id, limit=limit)
         except Exception:
             pass
 
+    events = []
+    for cam_id in _get_configured_camera_ids():
+        cam_dir = os.path.join(DATA_DIR, cam_id)
+        if not os.path.isdir(cam_dir):
+            continue
+        for ev in read_range(cam_dir, start_ts, end_ts):
+            if spg_id is not None and ev.get("spg_id") != spg_id:
+                continue
+            if camera_id is not None and ev.get("camera_id") != camera_id:
+                continue
+            ev["_camera"] = cam_id
+            events.append(ev)
     events.sort(key=lambda x: x.get("ts", 0), reverse=True)
     return events[:limit]
 
 def find_spg_snapshot(spg_id):
-    pattern = os.path.join(DATA_DIR, "cam_*", "snapshots", f"latest_{spg_id}.jpg")
-    files = glob.glob(pattern)
-    if not files:
-        return None
-    return max(files, key=os.path.getmtime)
+    entry = SNAPSHOTS.get(spg_id)
+    return entry.path if entry else None
 
 def get_camera_frame(cam_id):
     path = os.path.join(DATA_DIR, cam_id, "snapshots", "latest_frame.jpg")
@@ -134,46 +184,200 @@ def get_camera_frame(cam_id):
 async def index(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
-@app.get("/api/state")
-async def api_state():
+def build_state_payload():
     state = get_state()
     health = get_health()
+    now = time.time()
     if "spgs" in state:
+        # Copies: the parsed document is cached and shared between requests.
+        spgs = []
         for spg in state["spgs"]:
+            spg = dict(spg)
             spg_id = spg.get("id")
-            snap_path = find_spg_snapshot(spg_id)
-            if snap_path:
-                spg["snapshot_url"] = f"/api/snapshot/{spg_id}"
+            snap = SNAPSHOTS.get(spg_id)
+            if snap:
+                # Version in the URL: the <img> only reloads when the face actually changed.
+                spg["snapshot_url"] = f"/api/snapshot/{spg_id}?v={snap.version}"
             else:
                 spg["snapshot_url"] = None
+            spgs.append(spg)
+        state["spgs"] = spgs
     
     last_ts = state.get("timestamp", 0)
-    is_live = (time.time() - last_ts) < SETTINGS.dashboard.live_window_seconds
+    is_live = (now - last_ts) < SETTINGS.dashboard.live_window_seconds
     state["system_status"] = "LIVE" if is_live else "OFFLINE"
     state["camera_health"] = health.get("cameras", [])
     state["camera_health_timestamp"] = health.get("timestamp", 0)
     
     return state
 
+
+def _with_server_time(msg: dict) -> str:
+    # Clock for the page to tick ages locally; kept out of the payload so diffs stay empty when nothing changed.
+    return json.dumps({**msg, "server_time": time.time()}, separators=(",", ":"))
+
+
+def _stat_fingerprint(paths) -> tuple:
+    out = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            out.append((path, st.st_size, st.st_mtime_ns))
+        except OSError:
+            out.append((path, None, None))
+    return tuple(out)
+
+
+def _state_fingerprint() -> tuple:
+    fp = (STATE_DOC.fingerprint(), HEALTH_DOC.fingerprint())
+    # LIVE/OFFLINE flips without a new version once the pipeline stops publishing.
+    is_live = (time.time() - STATE_DOC.updated_ts()) < SETTINGS.dashboard.live_window_seconds
+    return fp + (is_live,)
+
+
+def _events_fingerprint() -> tuple:
+    paths = [os.path.join(DATA_DIR, cam_id, "events.jsonl") for cam_id in sorted(_get_configured_camera_ids())]
+    if EVENT_DB is not None:
+        paths += [EVENT_DB.db_path, EVENT_DB.db_path + "-wal"]
+    return _stat_fingerprint(paths)
+
+
+LIVE_HUB = LiveHub(queue_size=SETTINGS.dashboard.stream_client_queue_size)
+LIVE_HUB.register("state", build_state_payload, _state_fingerprint, SETTINGS.dashboard.stream_watch_interval_sec)
+LIVE_HUB.register("health", get_health, HEALTH_DOC.fingerprint, SETTINGS.dashboard.stream_watch_interval_sec)
+LIVE_HUB.register("events", get_recent_events, _events_fingerprint, SETTINGS.dashboard.stream_watch_interval_sec)
+
+
+def _parse_resources(resources: str | None) -> list[str]:
+    if not resources:
+        return LIVE_HUB.resources
+    return [r.strip() for r in resources.split(",") if r.strip()]
+
+
+@app.get("/api/state")
+async def api_state(request: Request):
+    entry = await API_CACHE.get_async("state", build_state_payload)
+    # Outside the body (and the ETag): the clock changes on every request, the state does not.
+    return json_response(request, entry, headers={"X-Server-Time": f"{time.time():.3f}"})
+
+
+@app.get("/api/stream")
+async def api_stream(request: Request, resources: str | None = None):
+    """Server-Sent Events: snapshot per resource on connect, then patches on change only."""
+    sub = LIVE_HUB.subscribe(_parse_resources(resources))
+    keepalive_sec = SETTINGS.dashboard.stream_keepalive_sec
+
+    async def event_source():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    msg = await asyncio.wait_for(sub.queue.get(), timeout=keepalive_sec)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {msg['op']}\ndata: {_with_server_time(msg)}\n\n"
+        finally:
+            LIVE_HUB.unsubscribe(sub)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.websocket("/api/ws")
+async def api_ws(websocket: WebSocket):
+    """WebSocket variant of /api/stream (same JSON messages)."""
+    await websocket.accept()
+    sub = LIVE_HUB.subscribe(_parse_resources(websocket.query_params.get("resources")))
+    keepalive_sec = SETTINGS.dashboard.stream_keepalive_sec
+    try:
+        while True:
+            try:
+                msg = await asyncio.wait_for(sub.queue.get(), timeout=keepalive_sec)
+            except asyncio.TimeoutError:
+                msg = {"op": "keepalive"}
+            await websocket.send_text(_with_server_time(msg))
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        LIVE_HUB.unsubscribe(sub)
+
 @app.get("/api/events")
-async def api_events():
-    return get_recent_events()
+async def api_events(request: Request):
+    return json_response(request, await API_CACHE.get_async("events", get_recent_events))
+
+
+@app.get("/api/events/query")
+async def api_events_query(
+    start: float | None = None,
+    end: float | None = None,
+    spg_id: str | None = None,
+    camera_id: str | None = None,
+    limit: int = 1000,
+):
+    return await asyncio.to_thread(
+        query_events, start, end, spg_id=spg_id, camera_id=camera_id, limit=min(max(1, limit), 10000)
+    )
+
+
+def get_presence(from_day: str, to_day: str, spg_id: str | None = None, intervals: bool = False) -> dict:
+    payload = {"from": from_day, "to": to_day, "available": PRESENCE_DB.available(), "spgs": []}
+    if payload["available"]:
+        try:
+            payload["spgs"] = PRESENCE_DB.presence(from_day, to_day, spg_id=spg_id, intervals=intervals)
+        except Exception:
+            payload["available"] = False
+    return payload
+
+
+@app.get("/api/analytics/presence")
+async def api_analytics_presence(
+    request: Request,
+    from_: str | None = Query(None, alias="from"),
+    to: str | None = None,
+    spg_id: str | None = None,
+    intervals: bool = False,
+):
+    """Daily presence per SPG from the pre-aggregates. from/to: YYYY-MM-DD or unix ts; default last 7 days."""
+    try:
+        to_day = parse_day(to, day_of(time.time()))
+        from_day = parse_day(from_, (dt.date.fromisoformat(to_day) - dt.timedelta(days=6)).isoformat())
+    except ValueError:
+        return Response(status_code=400)
+    entry = await API_CACHE.get_async(
+        ("presence", from_day, to_day, spg_id, intervals),
+        lambda: get_presence(from_day, to_day, spg_id=spg_id, intervals=intervals),
+    )
+    return json_response(request, entry)
 
 
 @app.get("/api/health")
-async def api_health():
-    return get_health()
+async def api_health(request: Request):
+    return json_response(request, await API_CACHE.get_async("health", get_health))
 
 
 @app.get("/api/snapshot/{spg_id}")
-async def api_snapshot(spg_id: str):
-    path = find_spg_snapshot(spg_id)
-    if path:
-        return FileResponse(path)
-    return Response(status_code=404)
+async def api_snapshot(spg_id: str, request: Request):
+    snap = await asyncio.to_thread(SNAPSHOTS.get, spg_id)
+    if snap is None:
+        return Response(status_code=404)
+    headers = {"ETag": snap.etag, "Last-Modified": snap.last_modified, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == snap.etag:
+        return Response(status_code=304, headers=headers)
+    if not await asyncio.to_thread(os.path.exists, snap.path):
+        await asyncio.to_thread(SNAPSHOTS.refresh, True)
+        return Response(status_code=404)
+    return FileResponse(snap.path, headers=headers)
 
 @app.get("/api/cameras")
 async def api_cameras():
+    return await asyncio.to_thread(API_CACHE.get, "cameras", list_cameras)
+
+
+def list_cameras() -> list[dict]:
     cams = []
     active_ids = _get_configured_camera_ids()
     
@@ -194,33 +398,40 @@ async def api_cameras():
     return cams
 
 
+MJPEG_HUB = MjpegHub(
+    interval_sec=SETTINGS.dashboard.stream_frame_interval_sec,
+    missing_sleep_sec=SETTINGS.dashboard.stream_missing_frame_sleep_sec,
+    error_sleep_sec=SETTINGS.dashboard.stream_error_sleep_sec,
+)
+
+
+PREVIEW_VARIANTS = {"latest_frame.jpg": "ai", "latest_raw_frame.jpg": "raw"}
+
+
+def _frame_source(cam_id: str, filename: str):
+    file_source = FileFrameSource(os.path.join(DATA_DIR, cam_id, "snapshots", filename))
+    if SETTINGS.runtime.preview_transport != "shm":
+        return file_source
+    return ShmFrameSource(
+        cam_id,
+        PREVIEW_VARIANTS[filename],
+        fallback=file_source,
+        demand_interval_sec=SETTINGS.dashboard.stream_frame_interval_sec,
+        demand_quality=SETTINGS.dashboard.stream_jpeg_quality,
+    )
+
+
 async def mjpeg_generator(cam_id: str, request: Request, filename: str):
-    """Yields MJPEG stream from a snapshot file. Stops when client disconnects."""
-    import asyncio
-    file_path = os.path.join(DATA_DIR, cam_id, "snapshots", filename)
-    last_good_frame: bytes | None = None
-
-    while not await request.is_disconnected():
-        frame_data = None
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, "rb") as f:
-                    candidate = f.read()
-                if candidate.startswith(b"\xff\xd8") and candidate.endswith(b"\xff\xd9"):
-                    frame_data = candidate
-                    last_good_frame = candidate
-            except Exception:
-                frame_data = None
-
-        if frame_data is None:
-            frame_data = last_good_frame
-
-        if frame_data is not None:
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_data + b'\r\n')
-            await asyncio.sleep(SETTINGS.dashboard.stream_frame_interval_sec)
-        else:
-            await asyncio.sleep(SETTINGS.dashboard.stream_missing_frame_sleep_sec)
+    """Yields MJPEG frames from the camera's shared broadcaster. Stops when client disconnects."""
+    sub = MJPEG_HUB.subscribe((cam_id, filename), lambda: _frame_source(cam_id, filename))
+    try:
+        while not await request.is_disconnected():
+            # Frames only arrive when they change; the timeout just re-checks the connection.
+            chunk = await sub.get(timeout=SETTINGS.dashboard.stream_missing_frame_sleep_sec)
+            if chunk is not None:
+                yield chunk
+    finally:
+        MJPEG_HUB.unsubscribe(sub)
 
 @app.get("/stream/{cam_id}")
 async def stream_feed(cam_id: str, request: Request):
@@ -272,32 +483,105 @@ async def manage_page(request: Request):
 @app.get("/api/gallery")
 async def api_gallery_list():
     """List all enrolled SPGs."""
-    from src.storage.gallery_store import GalleryStore
-    store = GalleryStore(SETTINGS.storage.data_dir, gallery_subdir=SETTINGS.storage.gallery_subdir)
-    gallery = store.load_all()
+    return await asyncio.to_thread(API_CACHE.get, "gallery", list_gallery)
+
+
+# gallery json path -> ((size, mtime_ns), summary); embeddings are only parsed when a file changes.
+_GALLERY_SUMMARIES: dict[str, tuple[tuple[int, int], dict]] = {}
+
+
+def _gallery_summary(path: str) -> dict | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    fp = (st.st_size, st.st_mtime_ns)
+    cached = _GALLERY_SUMMARIES.get(path)
+    if cached is not None and cached[0] == fp:
+        return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    summary = {
+        "name": data.get("name", "Unknown"),
+        "num_samples": len(data.get("embeddings", [])),
+        "created_at": data.get("meta", {}).get("created_at"),
+    }
+    _GALLERY_SUMMARIES[path] = (fp, summary)
+    return summary
+
+
+def list_gallery() -> list[dict]:
+    try:
+        names = [e.name for e in os.scandir(GALLERY_DIR) if e.name.endswith(".json") and e.is_file()]
+    except OSError:
+        return []
 
     result = []
-    for spg_id, data in gallery.items():
-        photo_path = os.path.join(GALLERY_DIR, f"{spg_id}_last_face.jpg")
+    for filename in names:
+        spg_id = filename[: -len(".json")]
+        summary = _gallery_summary(os.path.join(GALLERY_DIR, filename))
+        if summary is None:
+            continue
+        version = THUMBS.content_hash(os.path.join(GALLERY_DIR, f"{spg_id}_last_face.jpg"))
         result.append({
             "spg_id": spg_id,
-            "name": data.get("name", "Unknown"),
-            "num_samples": len(data.get("embeddings", [])),
-            "has_photo": os.path.exists(photo_path),
-            "created_at": data.get("meta", {}).get("created_at"),
+            **summary,
+            "has_photo": version is not None,
+            "photo_version": version,
+            # Content hash in the URL: served immutable, re-fetched only when the photo changes.
+            "thumb_url": f"/api/gallery/{spg_id}/photo?size={THUMBS.sizes[0]}&v={version}" if version else None,
         })
 
     result.sort(key=lambda x: x["spg_id"])
     return result
 
 
+@app.get("/api/gallery/page")
+async def api_gallery_page(offset: int = 0, limit: int | None = None, q: str | None = None):
+    """Paginated gallery listing for the manage page; totals cover the whole gallery."""
+    gallery = await asyncio.to_thread(API_CACHE.get, "gallery", list_gallery)
+    items = gallery
+    if q:
+        needle = q.strip().lower()
+        items = [g for g in gallery if needle in g["spg_id"].lower() or needle in str(g["name"]).lower()]
+    offset = max(0, offset)
+    limit = min(max(1, limit or SETTINGS.dashboard.gallery_page_size), 500)
+    return {
+        "registered": len(gallery),
+        "with_photo": sum(1 for g in gallery if g["has_photo"]),
+        "total_samples": sum(g["num_samples"] for g in gallery),
+        "total": len(items),
+        "offset": offset,
+        "limit": limit,
+        "items": items[offset: offset + limit],
+    }
+
+
 @app.get("/api/gallery/{spg_id}/photo")
-async def api_gallery_photo(spg_id: str):
-    """Serve the face crop photo for an SPG."""
+async def api_gallery_photo(spg_id: str, request: Request, size: int | None = None, v: str | None = None):
+    """Serve the face crop photo for an SPG; `size` serves a cached thumbnail instead."""
     path = os.path.join(GALLERY_DIR, f"{spg_id}_last_face.jpg")
-    if os.path.exists(path):
-        return FileResponse(path)
-    return Response(status_code=404)
+    if size:
+        thumb = await asyncio.to_thread(THUMBS.get, path, size)
+        if thumb is None:
+            return Response(status_code=404)
+        file_path, content_hash, etag = thumb.path, thumb.content_hash, thumb.etag
+    else:
+        content_hash = await asyncio.to_thread(THUMBS.content_hash, path)
+        if content_hash is None:
+            return Response(status_code=404)
+        file_path, etag = path, f'"{content_hash}"'
+    headers = {
+        "ETag": etag,
+        # A URL carrying the current hash can never change content; unversioned URLs revalidate.
+        "Cache-Control": "public, max-age=31536000, immutable" if v == content_hash else "no-cache",
+    }
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(file_path, media_type="image/jpeg", headers=headers)
 
 
 @app.post("/api/gallery/enroll")
@@ -336,7 +620,7 @@ async def api_gallery_enroll(request: Request):
     if len(images) > 5:
         images = images[:5]
 
-    try:
+    def _enroll():
         detector = _get_detector()
         payload, face_crop = enroll_from_photos(
             images=images,
@@ -349,7 +633,14 @@ async def api_gallery_enroll(request: Request):
         store.save_person(spg_id, payload)
 
         if face_crop is not None:
-            store.save_face_crop(spg_id, face_crop)
+            photo_path = store.save_face_crop(spg_id, face_crop)
+            THUMBS.get(str(photo_path), THUMBS.sizes[0])
+        return payload
+
+    try:
+        # Model load + detection + file writes: keep them off the event loop.
+        payload = await asyncio.to_thread(_enroll)
+        API_CACHE.invalidate("gallery")
 
         return {
             "success": True,
@@ -367,6 +658,12 @@ async def api_gallery_enroll(request: Request):
 @app.delete("/api/gallery/{spg_id}")
 async def api_gallery_delete(spg_id: str):
     """Delete an SPG from gallery."""
+    result = await asyncio.to_thread(delete_gallery_entry, spg_id)
+    API_CACHE.invalidate("gallery")
+    return result
+
+
+def delete_gallery_entry(spg_id: str) -> dict:
     json_path = os.path.join(GALLERY_DIR, f"{spg_id}.json")
     photo_path = os.path.join(GALLERY_DIR, f"{spg_id}_last_face.jpg")
 
@@ -375,6 +672,7 @@ async def api_gallery_delete(spg_id: str):
         os.remove(json_path)
         deleted = True
     if os.path.exists(photo_path):
+        THUMBS.discard(photo_path)
         os.remove(photo_path)
 
     if deleted:
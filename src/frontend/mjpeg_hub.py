@@ -0,0 +1,256 @@
+"""
+MjpegHub: one frame reader per camera stream, fanned out to every viewer.
+
+Previously every /stream client ran its own loop that opened, read and validated
+latest_frame.jpg each interval, so N viewers meant N identical reads. Here each
+(camera, variant) has a single broadcaster task that:
+
+- checks the source only every `interval_sec` and skips unchanged frames
+  (file stat fingerprint, then byte comparison),
+- validates the JPEG markers once,
+- builds the multipart chunk once and hands the same bytes object to all
+  subscriber queues.
+
+Sources: ShmFrameSource reads the pipeline's in-memory preview slot (no disk I/O)
+and falls back to FileFrameSource when the slot does not exist (preview_transport
+"file", or the pipeline is not running). It also publishes the viewer count (and
+the interval / quality the dashboard wants) into the slot, so capture workers only
+encode previews while somebody is watching.
+
+Subscriber queues hold one frame: a slow client simply skips to the newest frame
+instead of buffering. The task stops when the last viewer disconnects.
+
+Usage:
+    hub = MjpegHub(interval_sec=0.2, missing_sleep_sec=1.0)
+    sub = hub.subscribe(("cam_01", "latest_frame.jpg"), source)
+    chunk = await sub.get()
+    hub.unsubscribe(sub)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from typing import Callable, Hashable, Union
+
+from src.pipeline.shared_preview_slot import SharedPreviewSlot
+from src.settings.logger import logger
+
+
+def is_complete_jpeg(data: bytes | None) -> bool:
+    return bool(data) and data.startswith(b"\xff\xd8") and data.endswith(b"\xff\xd9")
+
+
+def mjpeg_chunk(frame: bytes) -> bytes:
+    return b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + frame + b"\r\n"
+
+
+class FileFrameSource:
+    """Reads a JPEG file written by the pipeline, only when its stat changes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fingerprint = None
+
+    def read_changed(self) -> bytes | None:
+        """New complete JPEG bytes, or None when unchanged / missing / partially written."""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        fp = (st.st_size, st.st_mtime_ns)
+        if fp == self._fingerprint:
+            return None
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if not is_complete_jpeg(data):
+            # Caught mid-write: retry on the next tick without remembering the stat.
+            return None
+        self._fingerprint = fp
+        return data
+
+    def set_viewers(self, viewers: int) -> None:
+        """Files carry no demand channel; the pipeline writes them regardless."""
+
+
+class ShmFrameSource:
+    """
+    Reads the latest preview JPEG from the pipeline's shared-memory slot, only when
+    its sequence number changes. Without a slot it delegates to `fallback`.
+    """
+
+    def __init__(
+        self,
+        camera_id: str,
+        variant: str,
+        fallback: FileFrameSource | None = None,
+        reattach_sec: float = 2.0,
+        demand_interval_sec: float = 0.0,
+        demand_quality: int = 0,
+    ):
+        self.camera_id = camera_id
+        self.variant = variant
+        self.fallback = fallback
+        self.reattach_sec = max(0.5, float(reattach_sec))
+        self.demand_interval_sec = float(demand_interval_sec)
+        self.demand_quality = int(demand_quality)
+        self.viewers = 0
+        self._slot: SharedPreviewSlot | None = None
+        self._seq = -1
+        self._last_change = 0.0
+        self._last_attach_try = 0.0
+
+    def _attach(self, now: float) -> None:
+        if now - self._last_attach_try < self.reattach_sec:
+            return
+        self._last_attach_try = now
+        try:
+            # Not our segment: the pipeline owns (and unlinks) it.
+            self._slot = SharedPreviewSlot.attach(self.camera_id, self.variant, track=False)
+            self._seq = -1
+            self._last_change = now
+        except (FileNotFoundError, OSError, ValueError):
+            self._slot = None
+
+    def set_viewers(self, viewers: int) -> None:
+        """Heartbeat: called every broadcaster tick, and with 0 when the last viewer leaves."""
+        self.viewers = viewers
+        if self._slot is not None:
+            try:
+                self._slot.set_demand(viewers, self.demand_interval_sec, self.demand_quality)
+            except Exception:
+                pass
+
+    def read_changed(self) -> bytes | None:
+        now = time.monotonic()
+        if self._slot is not None and now - self._last_change > self.reattach_sec:
+            # No new frame for a while: the pipeline may have restarted with a fresh segment.
+            self.close()
+        if self._slot is None:
+            self._attach(now)
+            if self._slot is not None:
+                self.set_viewers(self.viewers)
+        if self._slot is None:
+            return self.fallback.read_changed() if self.fallback is not None else None
+
+        got = self._slot.read(since_seq=self._seq)
+        if got is None:
+            return None
+        self._seq, data = got
+        self._last_change = now
+        return data if is_complete_jpeg(data) else None
+
+    def close(self) -> None:
+        if self._slot is not None:
+            self._slot.close()
+            self._slot = None
+
+
+FrameSource = Union[FileFrameSource, ShmFrameSource]
+
+
+class Subscriber:
+    def __init__(self, key: Hashable):
+        self.key = key
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.dropped = 0
+
+    async def get(self, timeout: float | None = None) -> bytes | None:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class FrameBroadcaster:
+    def __init__(self, hub: MjpegHub, key: Hashable, source: FrameSource):
+        self.hub = hub
+        self.key = key
+        self.source = source
+        self.subscribers: set[Subscriber] = set()
+        self.last_frame: bytes | None = None
+        self.last_chunk: bytes | None = None
+        self.frames_read = 0
+        self.frames_sent = 0
+        self._task: asyncio.Task | None = None
+
+    def ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run(), name=f"mjpeg_{self.key}")
+
+    async def _run(self) -> None:
+        while self.subscribers:
+            sleep_sec = self.hub.interval_sec
+            try:
+                self.source.set_viewers(len(self.subscribers))
+                frame = await asyncio.to_thread(self.source.read_changed)
+                if frame is not None:
+                    self.frames_read += 1
+                    if frame != self.last_frame:
+                        self.last_frame = frame
+                        self.last_chunk = mjpeg_chunk(frame)
+                        for sub in list(self.subscribers):
+                            self._offer(sub, self.last_chunk)
+                elif self.last_chunk is None:
+                    sleep_sec = self.hub.missing_sleep_sec
+            except Exception as e:
+                logger.warning(f"[MjpegHub] {self.key} read failed: {e}")
+                sleep_sec = self.hub.error_sleep_sec
+            await asyncio.sleep(sleep_sec)
+        try:
+            self.source.set_viewers(0)
+        except Exception:
+            pass
+        self._task = None
+
+    def _offer(self, sub: Subscriber, chunk: bytes) -> None:
+        if sub.queue.full():
+            # Slow client: replace the frame it has not picked up yet.
+            try:
+                sub.queue.get_nowait()
+                sub.dropped += 1
+            except asyncio.QueueEmpty:
+                pass
+        sub.queue.put_nowait(chunk)
+        self.frames_sent += 1
+
+
+class MjpegHub:
+    def __init__(self, interval_sec: float = 0.2, missing_sleep_sec: float = 1.0, error_sleep_sec: float = 0.5):
+        self.interval_sec = max(0.02, float(interval_sec))
+        self.missing_sleep_sec = max(self.interval_sec, float(missing_sleep_sec))
+        self.error_sleep_sec = max(self.interval_sec, float(error_sleep_sec))
+        self._broadcasters: dict[Hashable, FrameBroadcaster] = {}
+
+    def subscribe(self, key: Hashable, source_factory: Callable[[], FrameSource]) -> Subscriber:
+        """Must be called from the event loop. A late joiner gets the current frame right away."""
+        bc = self._broadcasters.get(key)
+        if bc is None:
+            bc = FrameBroadcaster(self, key, source_factory())
+            self._broadcasters[key] = bc
+        sub = Subscriber(key)
+        bc.subscribers.add(sub)
+        if bc.last_chunk is not None:
+            sub.queue.put_nowait(bc.last_chunk)
+        bc.ensure_running()
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        bc = self._broadcasters.get(sub.key)
+        if bc is not None:
+            bc.subscribers.discard(sub)
+
+    def stats(self) -> dict:
+        return {
+            str(key): {
+                "viewers": len(bc.subscribers),
+                "frames_read": bc.frames_read,
+                "frames_sent": bc.frames_sent,
+                "running": bc._task is not None,
+            }
+            for key, bc in self._broadcasters.items()
+        }
@@ -0,0 +1,137 @@
+"""
+SnapshotIndex: spg_id -> newest `latest_{spg_id}.jpg` across camera snapshot dirs.
+
+`find_spg_snapshot` used to glob `cam_*/snapshots/latest_{spg_id}.jpg` and stat
+every match, once per SPG per /api/state call (SPG count x camera count
+filesystem operations per poll). The index instead keeps one scan per camera
+snapshot directory and re-lists a directory only when its mtime changes.
+SnapshotStore replaces `latest_*.jpg` via rename, which bumps the directory
+mtime, so an overwritten face is picked up by that same check. `max_age_sec`
+forces a rescan now and then for writers that overwrite in place.
+
+Each entry carries a version (mtime_ns + size) used for ETag / Last-Modified and
+as a cache-busting query parameter in snapshot_url.
+
+Usage:
+    index = SnapshotIndex(data_dir)
+    entry = index.get("001")    # SnapshotEntry(path, mtime_ns, size) or None
+    entry.etag, entry.last_modified
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import formatdate
+
+_PREFIX = "latest_"
+_SUFFIX = ".jpg"
+# Files in snapshots/ that share the prefix but are not SPG faces.
+_NOT_SPG = {"frame", "raw_frame"}
+
+
+@dataclass(frozen=True)
+class SnapshotEntry:
+    path: str
+    mtime_ns: int
+    size: int
+
+    @property
+    def version(self) -> str:
+        return f"{self.mtime_ns:x}-{self.size:x}"
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.version}"'
+
+    @property
+    def last_modified(self) -> str:
+        return formatdate(self.mtime_ns / 1e9, usegmt=True)
+
+
+class SnapshotIndex:
+    def __init__(self, data_dir: str, min_rescan_sec: float = 1.0, max_age_sec: float = 30.0):
+        self.data_dir = data_dir
+        self.min_rescan_sec = max(0.0, float(min_rescan_sec))
+        self.max_age_sec = max(self.min_rescan_sec, float(max_age_sec))
+        self._lock = threading.Lock()
+        # snapshots dir -> (dir mtime_ns, scanned_at, {spg_id: SnapshotEntry})
+        self._dirs: dict[str, tuple[int, float, dict[str, SnapshotEntry]]] = {}
+        self._index: dict[str, SnapshotEntry] = {}
+        self._camera_dirs_mtime: int | None = None
+        self._checked_at = 0.0
+        self.scans = 0
+
+    def _snapshot_dirs(self) -> list[str]:
+        try:
+            return [
+                os.path.join(e.path, "snapshots")
+                for e in os.scandir(self.data_dir)
+                if e.name.startswith("cam_") and e.is_dir()
+            ]
+        except OSError:
+            return []
+
+    @staticmethod
+    def _scan(snap_dir: str) -> dict[str, SnapshotEntry]:
+        found = {}
+        with os.scandir(snap_dir) as it:
+            for e in it:
+                name = e.name
+                if not (name.startswith(_PREFIX) and name.endswith(_SUFFIX)):
+                    continue
+                spg_id = name[len(_PREFIX):-len(_SUFFIX)]
+                if not spg_id or spg_id in _NOT_SPG:
+                    continue
+                try:
+                    st = e.stat()
+                except OSError:
+                    continue
+                found[spg_id] = SnapshotEntry(e.path, st.st_mtime_ns, st.st_size)
+        return found
+
+    def refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._checked_at < self.min_rescan_sec:
+                return
+            self._checked_at = now
+            changed = False
+            seen = set()
+            for snap_dir in self._snapshot_dirs():
+                seen.add(snap_dir)
+                try:
+                    dir_mtime = os.stat(snap_dir).st_mtime_ns
+                except OSError:
+                    continue
+                cached = self._dirs.get(snap_dir)
+                if cached is not None and cached[0] == dir_mtime and now - cached[1] < self.max_age_sec:
+                    continue
+                try:
+                    entries = self._scan(snap_dir)
+                except OSError:
+                    continue
+                self.scans += 1
+                if cached is None or cached[2] != entries:
+                    changed = True
+                self._dirs[snap_dir] = (dir_mtime, now, entries)
+            for gone in [d for d in self._dirs if d not in seen]:
+                del self._dirs[gone]
+                changed = True
+            if changed:
+                index: dict[str, SnapshotEntry] = {}
+                for _, _, entries in self._dirs.values():
+                    for spg_id, entry in entries.items():
+                        cur = index.get(spg_id)
+                        if cur is None or entry.mtime_ns > cur.mtime_ns:
+                            index[spg_id] = entry
+                self._index = index
+
+    def get(self, spg_id: str) -> SnapshotEntry | None:
+        self.refresh()
+        return self._index.get(str(spg_id))
+
+    def stats(self) -> dict:
+        return {"dirs": len(self._dirs), "spgs": len(self._index), "scans": self.scans}
@@ -0,0 +1,137 @@
+"""
+StateDocument: dashboard view of one coordinator document (outlet_state / camera_health).
+
+Reads the coordinator's SharedStateSegment and parses the JSON only when its
+version changes; every other call is a header check. Falls back to the exported
+JSON file (parsed only when its size/mtime changes) when the segment does not
+exist, overflowed, or `state_transport` is "file".
+
+If the version stops moving for `reattach_sec` the segment is re-attached by
+name, since a restarted pipeline creates a fresh one.
+
+The returned dict is shared: callers copy before modifying it.
+
+Usage:
+    doc = StateDocument(data_dir, "state", path=".../outlet_state.json")
+    value = doc.load()         # dict or None
+    doc.fingerprint()          # changes exactly when load() would return a new value
+    doc.updated_ts()           # publish time (segment) or file mtime
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+
+from src.pipeline.shared_state_segment import SharedStateSegment
+
+
+class StateDocument:
+    def __init__(self, data_dir: str, doc: str, path: str, use_shm: bool = True, reattach_sec: float = 2.0):
+        self.data_dir = data_dir
+        self.doc = doc
+        self.path = path
+        self.use_shm = use_shm
+        self.reattach_sec = max(0.5, float(reattach_sec))
+        self._lock = threading.Lock()
+        self._seg: SharedStateSegment | None = None
+        self._version = -1
+        self._shm_version = -1
+        self._shm_ts = 0.0
+        self._overflow = False
+        self._last_change = 0.0
+        self._last_attach_try = 0.0
+        self._file_fp = None
+        self._value: dict | None = None
+        self._source = "none"
+        self._ts = 0.0
+        self.parses = 0
+
+    def _attach(self, now: float) -> None:
+        if now - self._last_attach_try < self.reattach_sec:
+            return
+        self._last_attach_try = now
+        try:
+            self._seg = SharedStateSegment.attach(self.data_dir, self.doc, track=False)
+            self._version = -1
+            self._last_change = now
+        except (FileNotFoundError, OSError, ValueError):
+            self._seg = None
+
+    def _detach(self) -> None:
+        if self._seg is not None:
+            self._seg.close()
+            self._seg = None
+
+    def _poll_shm(self, now: float) -> bool:
+        """True when the segment is the current source (value may be unchanged)."""
+        if self._seg is not None and now - self._last_change > self.reattach_sec:
+            self._detach()
+        if self._seg is None:
+            self._attach(now)
+        if self._seg is None:
+            return False
+        got = self._seg.read(since_version=self._version)
+        if got is None:
+            return not self._overflow and self._source == "shm"
+        version, data, ts = got
+        same_document = version == self._shm_version and ts == self._shm_ts
+        self._version = self._shm_version = version
+        self._shm_ts = ts
+        self._last_change = now
+        self._overflow = data is None
+        if data is None:
+            return False
+        if same_document and self._source == "shm":
+            # Re-attached to the same, unchanged segment: nothing to parse.
+            return True
+        try:
+            value = json.loads(data)
+        except ValueError:
+            return False
+        self.parses += 1
+        self._value, self._source, self._ts = value, "shm", ts
+        return True
+
+    def _poll_file(self) -> None:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            if self._source == "file":
+                self._value, self._source, self._file_fp = None, "none", None
+            return
+        fp = (st.st_size, st.st_mtime_ns)
+        if fp == self._file_fp and self._source == "file":
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+        except (OSError, ValueError):
+            # Caught mid-write: keep the previous value, retry on the next call.
+            return
+        self.parses += 1
+        self._file_fp = fp
+        self._value, self._source, self._ts = value, "file", st.st_mtime
+
+    def _poll(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if self.use_shm and self._poll_shm(now):
+                return
+            self._poll_file()
+
+    def load(self) -> dict | None:
+        self._poll()
+        return self._value
+
+    def fingerprint(self) -> tuple:
+        self._poll()
+        return (self._source, self._version if self._source == "shm" else self._file_fp)
+
+    def updated_ts(self) -> float:
+        return self._ts
+
+    def stats(self) -> dict:
+        return {"source": self._source, "version": self._version, "parses": self.parses}
@@ -0,0 +1,78 @@
+"""
+AlertCoalescer: groups absence alerts that fire close together into one digest.
+
+A shift change or a dark camera can make OutletAggregator.tick() emit many
+ABSENT_ALERT_FIRED events at once. Instead of one message + one photo per SPG,
+alerts arriving within `window_sec` of the first pending alert are released
+together as a single group (or earlier, once `max_items` is reached).
+"""
+
+from __future__ import annotations
+
+import time
+
+from src.domain.events import Event
+
+
+class AlertCoalescer:
+    def __init__(self, window_sec: float = 5.0, max_items: int = 30):
+        self.window_sec = max(0.0, float(window_sec))
+        self.max_items = max(1, int(max_items))
+        self._pending: list[Event] = []
+        self._first_ts = 0.0
+
+    def add(self, alert: Event, now: float | None = None) -> None:
+        if not self._pending:
+            self._first_ts = time.time() if now is None else now
+        self._pending.append(alert)
+
+    def pop_due(self, now: float | None = None) -> list[list[Event]]:
+        """Return groups ready to send (window elapsed or group full)."""
+        if not self._pending:
+            return []
+        now = time.time() if now is None else now
+        groups: list[list[Event]] = []
+        while len(self._pending) >= self.max_items:
+            groups.append(self._pending[: self.max_items])
+            self._pending = self._pending[self.max_items :]
+        if self._pending and (now - self._first_ts) >= self.window_sec:
+            groups.append(self._pending)
+            self._pending = []
+        if self._pending and groups:
+            # Remainder after splitting a full group starts a fresh window.
+            self._first_ts = now
+        return groups
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+def format_alert_digest(alerts: list[Event]) -> str:
+    """One Telegram message for a group of ABSENT_ALERT_FIRED events."""
+    if len(alerts) == 1:
+        al = alerts[0]
+        ts_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(al.ts))
+        return (
+            "SPG ABSENCE DETECTED\n"
+            f"Outlet: {al.outlet_id}\n"
+            f"SPG: {al.name or al.spg_id} ({al.spg_id})\n"
+            f"Reason: {al.details.get('reason', 'unknown')}\n"
+            f"Time: {ts_str}"
+        )
+
+    first_ts = min(al.ts for al in alerts)
+    last_ts = max(al.ts for al in alerts)
+    fmt = "%Y-%m-%d %H:%M:%S"
+    time_str = time.strftime(fmt, time.localtime(first_ts))
+    if int(last_ts) != int(first_ts):
+        time_str += f" - {time.strftime('%H:%M:%S', time.localtime(last_ts))}"
+
+    lines = [
+        f"SPG ABSENCE DETECTED ({len(alerts)} SPG)",
+        f"Outlet: {alerts[0].outlet_id}",
+        f"Time: {time_str}",
+        "",
+    ]
+    for al in sorted(alerts, key=lambda a: a.spg_id or ""):
+        lines.append(f"- {al.name or al.spg_id} ({al.spg_id}): {al.details.get('reason', 'unknown')}")
+    return "\n".join(lines)
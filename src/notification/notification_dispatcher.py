@@ -0,0 +1,281 @@
+"""
+NotificationDispatcher: background delivery of Telegram notifications.
+
+The pipeline only enqueues; a daemon thread owns the HTTP session and all
+retry/backoff scheduling, so a Telegram outage never blocks result draining,
+supervision or health writes.
+
+- Bounded outbox (oldest-first); submissions beyond the bound are dropped and counted.
+- Outbox is persisted to JSON (atomic replace) so pending alerts survive a restart.
+- 429 Retry-After pauses the whole chat; other failures back off per job.
+- Proactive per-chat pacing (min interval + per-minute cap) keeps bursts under Telegram limits.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+
+from src.notification.telegram_notifier import SendResult, TelegramNotifier
+from src.settings.logger import logger
+
+
+class NotificationDispatcher:
+    def __init__(
+        self,
+        notifier: TelegramNotifier,
+        outbox_path: str | None = None,
+        max_outbox: int = 200,
+        max_attempts: int = 5,
+        retry_backoff_base_sec: float = 2.0,
+        retry_backoff_max_sec: float = 300.0,
+        min_send_interval_sec: float = 1.0,
+        max_sends_per_minute: int = 20,
+    ):
+        self.notifier = notifier
+        self.outbox_path = outbox_path
+        self.max_outbox = max(1, int(max_outbox))
+        self.max_attempts = max(1, int(max_attempts))
+        self.retry_backoff_base_sec = max(1.0, float(retry_backoff_base_sec))
+        self.retry_backoff_max_sec = max(1.0, float(retry_backoff_max_sec))
+        self.min_send_interval_sec = max(0.0, float(min_send_interval_sec))
+        self.max_sends_per_minute = max(1, int(max_sends_per_minute))
+        self._send_history: deque[float] = deque()
+
+        self._jobs: deque[dict] = deque()
+        self._cond = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+        self._dirty = False
+        self._blocked_until = 0.0
+
+        self._metrics = {
+            "submitted": 0,
+            "sent": 0,
+            "failed": 0,
+            "dropped": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "last_success_ts": 0.0,
+            "last_error": None,
+            "last_error_ts": 0.0,
+            "send_time_ema_ms": None,
+        }
+
+        self._load_outbox()
+
+    # Public API (called from the pipeline thread; never blocks on I/O)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="notification_dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_sec: float = 2.0) -> None:
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_sec)
+            self._thread = None
+        self._persist_outbox()
+
+    def submit_message(self, text: str) -> bool:
+        return self._submit({"kind": "message", "text": text})
+
+    def submit_photo(
+        self,
+        photo_path: str | None = None,
+        caption: str | None = None,
+        photo_bytes: bytes | None = None,
+    ) -> bool:
+        """
+        Queue a photo. photo_bytes (if given) is sent directly and kept in memory only;
+        photo_path is what survives in the persisted outbox.
+        """
+        if photo_path is None and photo_bytes is None:
+            return False
+        return self._submit(
+            {"kind": "photo", "photo_path": photo_path, "caption": caption, "_photo_bytes": photo_bytes}
+        )
+
+    def stats(self) -> dict:
+        with self._cond:
+            out = dict(self._metrics)
+            out["enabled"] = True
+            out["outbox_depth"] = len(self._jobs)
+            out["outbox_max"] = self.max_outbox
+            out["blocked_for_sec"] = round(max(0.0, self._blocked_until - time.time()), 1)
+        if out["send_time_ema_ms"] is not None:
+            out["send_time_ema_ms"] = round(out["send_time_ema_ms"], 1)
+        return out
+
+    # Internals
+
+    def _submit(self, job: dict) -> bool:
+        now = time.time()
+        job.update({"id": uuid.uuid4().hex, "created_ts": now, "attempts": 0, "next_attempt_ts": now})
+        with self._cond:
+            self._metrics["submitted"] += 1
+            if len(self._jobs) >= self.max_outbox:
+                self._metrics["dropped"] += 1
+                logger.warning(f"[Notify] Outbox full ({self.max_outbox}); dropping {job['kind']}.")
+                return False
+            self._jobs.append(job)
+            self._dirty = True
+            self._cond.notify()
+        return True
+
+    def _next_due(self, now: float) -> tuple[dict | None, float]:
+        """Return (due job, seconds to wait). Caller holds the condition lock."""
+        if not self._jobs:
+            return None, 1.0
+        if now < self._blocked_until:
+            return None, self._blocked_until - now
+        pace_wait = self._pacing_wait(now)
+        if pace_wait > 0:
+            return None, pace_wait
+        job = min(self._jobs, key=lambda j: j["next_attempt_ts"])
+        wait = job["next_attempt_ts"] - now
+        if wait > 0:
+            return None, wait
+        return job, 0.0
+
+    def _pacing_wait(self, now: float) -> float:
+        """Seconds until the per-chat pacing allows another request. Caller holds the lock."""
+        hist = self._send_history
+        while hist and (now - hist[0]) > 60.0:
+            hist.popleft()
+        wait = 0.0
+        if hist:
+            wait = max(wait, hist[-1] + self.min_send_interval_sec - now)
+        if len(hist) >= self.max_sends_per_minute:
+            wait = max(wait, hist[0] + 60.0 - now)
+        return wait
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopping:
+                        return
+                    job, wait = self._next_due(time.time())
+                    if job is not None:
+                        break
+                    if self._dirty:
+                        break
+                    self._cond.wait(timeout=min(wait, 5.0))
+            if job is None:
+                self._persist_outbox()
+                continue
+
+            t0 = time.time()
+            with self._cond:
+                self._send_history.append(t0)
+            result = self._deliver(job)
+            elapsed_ms = (time.time() - t0) * 1000.0
+            self._complete(job, result, elapsed_ms)
+            self._persist_outbox()
+
+    def _deliver(self, job: dict) -> SendResult:
+        try:
+            if job["kind"] == "message":
+                return self.notifier.send_message_once(job["text"])
+            return self.notifier.send_photo_once(
+                job.get("photo_path"),
+                caption=job.get("caption"),
+                photo_bytes=job.get("_photo_bytes"),
+            )
+        except Exception as e:
+            return SendResult(ok=False, retryable=True, error=str(e))
+
+    def _complete(self, job: dict, result: SendResult, elapsed_ms: float) -> None:
+        now = time.time()
+        with self._cond:
+            m = self._metrics
+            prev = m["send_time_ema_ms"]
+            m["send_time_ema_ms"] = elapsed_ms if prev is None else (0.2 * elapsed_ms + 0.8 * prev)
+            self._dirty = True
+
+            if result.ok:
+                self._remove(job)
+                m["sent"] += 1
+                m["last_success_ts"] = now
+                return
+
+            m["last_error"] = result.error
+            m["last_error_ts"] = now
+
+            if result.retry_after_sec is not None:
+                # Rate limit applies to the whole chat, not just this job.
+                m["rate_limited"] += 1
+                self._blocked_until = now + result.retry_after_sec
+                logger.warning(f"[Notify] Rate limited (429). Pausing deliveries {result.retry_after_sec:.0f}s.")
+                return
+
+            job["attempts"] += 1
+            if not result.retryable or job["attempts"] >= self.max_attempts:
+                self._remove(job)
+                m["failed"] += 1
+                logger.error(f"[Notify] Giving up on {job['kind']} after {job['attempts']} attempt(s): {result.error}")
+                return
+
+            m["retries"] += 1
+            delay = min(self.retry_backoff_max_sec, self.retry_backoff_base_sec ** job["attempts"])
+            job["next_attempt_ts"] = now + delay
+            logger.warning(
+                f"[Notify] {job['kind']} attempt {job['attempts']}/{self.max_attempts} failed: "
+                f"{result.error}. Retry in {delay:.0f}s."
+            )
+
+    def _remove(self, job: dict) -> None:
+        try:
+            self._jobs.remove(job)
+        except ValueError:
+            pass
+
+    def _load_outbox(self) -> None:
+        if not self.outbox_path or not os.path.exists(self.outbox_path):
+            return
+        try:
+            with open(self.outbox_path, "r", encoding="utf-8") as f:
+                jobs = json.load(f) or []
+        except Exception as e:
+            logger.warning(f"[Notify] Failed reading outbox {self.outbox_path}: {e}")
+            return
+        now = time.time()
+        for job in jobs[-self.max_outbox:]:
+            if not isinstance(job, dict) or job.get("kind") not in ("message", "photo"):
+                continue
+            if job["kind"] == "photo" and not job.get("photo_path"):
+                continue
+            job["next_attempt_ts"] = min(float(job.get("next_attempt_ts", now)), now)
+            job.setdefault("attempts", 0)
+            self._jobs.append(job)
+        if self._jobs:
+            logger.info(f"[Notify] Restored {len(self._jobs)} pending notification(s) from outbox.")
+
+    def _persist_outbox(self) -> None:
+        if not self.outbox_path:
+            return
+        with self._cond:
+            if not self._dirty:
+                return
+            self._dirty = False
+            payload = [
+                {k: v for k, v in job.items() if not k.startswith("_")}
+                for job in self._jobs
+                if job["kind"] == "message" or job.get("photo_path")
+            ]
+        tmp_path = f"{self.outbox_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_path, self.outbox_path)
+        except OSError as e:
+            logger.warning(f"[Notify] Failed writing outbox {self.outbox_path}: {e}")
@@ -1,9 +1,23 @@
 import os
 import time
+from dataclasses import dataclass
+
 import requests
 from src.settings.logger import logger
 
 
+DEFAULT_API_BASE = "https://api.telegram.org"
+
+
+@dataclass(frozen=True)
+class SendResult:
+    """Outcome of a single delivery attempt (no sleeping, no retries)."""
+    ok: bool
+    retryable: bool = True
+    retry_after_sec: float | None = None
+    error: str | None = None
+
+
 class TelegramNotifier:
     def __init__(
         self,
@@ -13,6 +27,7 @@ class TelegramNotifier:
         max_retries: int = 3,
         retry_backoff_base_sec: int = 2,
         retry_after_default_sec: int = 5,
+        api_base: str = DEFAULT_API_BASE,
     ):
         self.token = token
         self.chat_id = chat_id
@@ -20,7 +35,9 @@ class TelegramNotifier:
         self.max_retries = max_retries
         self.retry_backoff_base_sec = retry_backoff_base_sec
         self.retry_after_default_sec = retry_after_default_sec
-        self.base = f"https://api.telegram.org/bot{token}"
+        self.base = f"{api_base.rstrip('/')}/bot{token}"
+        # Pooled keep-alive connections instead of a new TLS handshake per request.
+        self.session = requests.Session()
 
     @classmethod
     def from_env(
@@ -31,6 +48,7 @@ class TelegramNotifier:
         max_retries: int = 3,
         retry_backoff_base_sec: int = 2,
         retry_after_default_sec: int = 5,
+        api_base: str = DEFAULT_API_BASE,
     ):
         token = os.getenv(token_env, "").strip()
         chat_id = os.getenv(chat_id_env, "").strip()
@@ -43,6 +61,7 @@ class TelegramNotifier:
             max_retries=max_retries,
             retry_backoff_base_sec=retry_backoff_base_sec,
             retry_after_default_sec=retry_after_default_sec,
+            api_base=api_base,
         )
 
     def _get_retry_after_seconds(self, response: requests.Response) -> int:
@@ -52,64 +71,80 @@ class TelegramNotifier:
                 return max(1, int(raw))
             except (TypeError, ValueError):
                 pass
+        try:
+            retry_after = response.json().get("parameters", {}).get("retry_after")
+            if retry_after is not None:
+                return max(1, int(retry_after))
+        except Exception:
+            pass
         return self.retry_after_default_sec
 
     def _get_backoff_seconds(self, attempt: int) -> int:
         return self.retry_backoff_base_sec ** attempt
 
-    def _post_with_retry(self, endpoint: str, data=None, files=None):
+    def _post_once(self, endpoint: str, data=None, files=None) -> SendResult:
+        """Single POST attempt. Never sleeps; the caller decides when to retry."""
         url = f"{self.base}/{endpoint}"
-
+        try:
+            resp = self.session.post(url, data=data, files=files, timeout=self.timeout_sec)
+        except requests.exceptions.RequestException as e:
+            return SendResult(ok=False, retryable=True, error=str(e))
+
+        if resp.status_code == 429:
+            return SendResult(
+                ok=False,
+                retryable=True,
+                retry_after_sec=float(self._get_retry_after_seconds(resp)),
+                error="429 Too Many Requests",
+            )
+        if 400 <= resp.status_code < 500:
+            # Bad request / auth / chat not found: retrying will not help.
+            return SendResult(ok=False, retryable=False, error=f"HTTP {resp.status_code}: {resp.text[:200]}")
+        if resp.status_code >= 500:
+            return SendResult(ok=False, retryable=True, error=f"HTTP {resp.status_code}")
+        return SendResult(ok=True)
+
+    def send_message_once(self, text: str) -> SendResult:
+        return self._post_once("sendMessage", data={"chat_id": self.chat_id, "text": text})
+
+    def send_photo_once(
+        self,
+        photo_path: str | None = None,
+        caption: str | None = None,
+        photo_bytes: bytes | None = None,
+    ) -> SendResult:
+        data = {"chat_id": self.chat_id}
+        if caption:
+            data["caption"] = caption
+        if photo_bytes is not None:
+            return self._post_once("sendPhoto", data=data, files={"photo": ("snapshot.jpg", photo_bytes, "image/jpeg")})
+        try:
+            with open(photo_path, "rb") as f:
+                return self._post_once("sendPhoto", data=data, files={"photo": f})
+        except (OSError, TypeError) as e:
+            return SendResult(ok=False, retryable=False, error=f"photo unreadable: {e}")
+
+    def _send_with_retry(self, attempt_fn, label: str) -> None:
+        """Blocking retry loop (single-camera mode). run_outlet uses NotificationDispatcher instead."""
         for attempt in range(1, self.max_retries + 1):
-            try:
-                resp = requests.post(url, data=data, files=files, timeout=self.timeout_sec)
-
-                if resp.status_code == 429:
-                    retry_after = self._get_retry_after_seconds(resp)
-                    logger.warning(f"[Telegram] Rate limited (429). Waiting {retry_after}s...")
-                    time.sleep(retry_after)
-                    continue
-
-                resp.raise_for_status()
-                return resp
+            result = attempt_fn()
+            if result.ok:
+                return
 
-            except requests.exceptions.RequestException as e:
-                logger.warning(f"[Telegram] Attempt {attempt}/{self.max_retries} failed: {e}")
+            if result.retry_after_sec is not None:
+                logger.warning(f"[Telegram] Rate limited (429). Waiting {result.retry_after_sec:.0f}s...")
+                time.sleep(result.retry_after_sec)
+                continue
 
-                if attempt == self.max_retries:
-                    logger.error(f"[Telegram] Giving up after {self.max_retries} attempts.")
-                    raise e
+            logger.warning(f"[Telegram] {label} attempt {attempt}/{self.max_retries} failed: {result.error}")
+            if not result.retryable or attempt == self.max_retries:
+                logger.error(f"[Telegram] Giving up after {attempt} attempts.")
+                raise RuntimeError(f"Telegram {label} failed: {result.error}")
 
-                sleep_time = self._get_backoff_seconds(attempt)
-                time.sleep(sleep_time)
+            time.sleep(self._get_backoff_seconds(attempt))
 
     def send_message(self, text: str) -> None:
-        data = {"chat_id": self.chat_id, "text": text}
-        self._post_with_retry("sendMessage", data=data)
+        self._send_with_retry(lambda: self.send_message_once(text), "Message send")
 
     def send_photo(self, photo_path: str, caption: str | None = None) -> None:
-        url = f"{self.base}/sendPhoto"
-
-        for attempt in range(1, self.max_retries + 1):
-            try:
-                with open(photo_path, "rb") as f:
-                    files = {"photo": f}
-                    data = {"chat_id": self.chat_id}
-                    if caption:
-                        data["caption"] = caption
-                    
-                    resp = requests.post(url, data=data, files=files, timeout=self.timeout_sec)
-
-                    if resp.status_code == 429:
-                        retry_after = self._get_retry_after_seconds(resp)
-                        logger.warning(f"[Telegram] Rate limited (429). Waiting {retry_after}s...")
-                        time.sleep(retry_after)
-                        continue
-
-                    resp.raise_for_status()
-                    return
-            except (requests.exceptions.RequestException, IOError) as e:
-                logger.warning(f"[Telegram] Photo send attempt {attempt} failed: {e}")
-                if attempt == self.max_retries:
-                    raise e
-                time.sleep(self._get_backoff_seconds(attempt))
+        self._send_with_retry(lambda: self.send_photo_once(photo_path, caption=caption), "Photo send")
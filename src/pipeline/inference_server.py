@@ -29,6 +29,8 @@ class InferenceServer:
         min_det_score_value: Any | None = None,
         min_face_width_px_value: Any | None = None,
         roi_by_camera: dict[str, tuple[float, float, float, float] | None] | None = None,
+        result_slots: dict | None = None,
+        label_table: tuple | None = None,
     ):
         """
         Server process that consumes frames and produces inference results.
@@ -38,6 +40,12 @@ class InferenceServer:
           - Shared Memory Mode:   frame stored in shared_buffers[cam_id], 
                                   input_queue only carries metadata (cam_id, frame_id, timestamp)
         
+        Results:
+          - Result slots (result_slots/label_table given): every result is written to the
+            camera's SharedResultSlot; output_queue only carries results with matches as
+            (camera_id, seq, frame_id, capture_ts, [(spg_id, name, similarity), ...])
+          - Legacy: full result dict per frame on output_queue
+        
         frame_skip: 0 = process every frame, N = skip N frames between inferences.
         """
         self.input_queue = input_queue
@@ -59,8 +67,16 @@ class InferenceServer:
         self.roi_by_camera = roi_by_camera or {}
         
         # Shared Memory (optional)
-        self._shared_buffer_configs = shared_buffers  # dict of cam_id -> (name, max_h, max_w, lock)
-        self._buffers = {}  # Attached SharedFrameBuffer instances (created in run())
+        self._shared_buffer_configs = shared_buffers  # dict of cam_id -> NegotiatedFrameBuffer.spec()
+        self._buffers = {}  # Attached NegotiatedFrameBuffer instances (created in run())
+
+        # Shared result channel (optional)
+        self._result_slot_specs = result_slots  # dict of cam_id -> SharedResultSlot.spec()
+        self._label_table_spec = label_table  # SharedLabelTable.spec()
+        self._result_slots = {}  # Attached SharedResultSlot instances (created in run())
+        self._label_table = None
+        self._label_index: dict[str, int] = {}
+        self._labels_version = 0
         
         # State (initialized in run())
         self.detector = None
@@ -110,11 +126,25 @@ class InferenceServer:
             
             # 3. Attach to Shared Memory Buffers (if configured)
             if self._shared_buffer_configs:
-                from src.pipeline.shared_frame_buffer import SharedFrameBuffer
-                for cam_id, (name, max_h, max_w, lock) in self._shared_buffer_configs.items():
-                    self._buffers[cam_id] = SharedFrameBuffer.attach(name, max_h, max_w, lock)
+                from src.pipeline.shared_frame_buffer import NegotiatedFrameBuffer
+                for cam_id, spec in self._shared_buffer_configs.items():
+                    self._buffers[cam_id] = NegotiatedFrameBuffer.attach(*spec)
                 logger.info(f"[InferenceServer] Attached to {len(self._buffers)} shared memory buffers.")
             
+            # 3b. Attach to shared result slots and publish gallery labels
+            if self._result_slot_specs and self._label_table_spec:
+                from src.pipeline.shared_result_slot import SharedLabelTable, SharedResultSlot
+                self._label_table = SharedLabelTable.attach(*self._label_table_spec)
+                for cam_id, spec in self._result_slot_specs.items():
+                    self._result_slots[cam_id] = SharedResultSlot.attach(*spec)
+                labels = [(spg_id, person.get("name", spg_id)) for spg_id, person in self.matcher.gallery.items()]
+                self._label_index = {spg_id: i for i, (spg_id, _) in enumerate(labels)}
+                self._labels_version = self._label_table.publish(labels)
+                logger.info(
+                    f"[InferenceServer] Attached to {len(self._result_slots)} result slots "
+                    f"({len(labels)} labels, version={self._labels_version})."
+                )
+
             # 4. Processing Loop
             while True:
                 try:
@@ -135,10 +165,10 @@ class InferenceServer:
                     if len(item) == 3:
                         camera_id, frame_id, capture_ts = item
                         enqueue_ts = capture_ts
-                        frame_bgr = self._read_from_shared(camera_id)
+                        frame_bgr = self._read_from_shared(camera_id, frame_id)
                     elif len(item) == 4 and isinstance(item[2], (int, float)) and isinstance(item[3], (int, float)):
                         camera_id, frame_id, capture_ts, enqueue_ts = item
-                        frame_bgr = self._read_from_shared(camera_id)
+                        frame_bgr = self._read_from_shared(camera_id, frame_id)
                     elif len(item) == 4:
                         camera_id, frame_id, frame_bgr, capture_ts = item
                         enqueue_ts = capture_ts
@@ -231,6 +261,22 @@ class InferenceServer:
                     
                     dur_ms = (time.time() - t0) * 1000
                     inference_done_ts = time.time()
+
+                    result_slot = self._result_slots.get(camera_id)
+                    if result_slot is not None:
+                        self._publish_result_slot(
+                            result_slot,
+                            camera_id=camera_id,
+                            frame_id=frame_id,
+                            capture_ts=float(capture_ts),
+                            enqueue_ts=float(enqueue_ts),
+                            inference_done_ts=inference_done_ts,
+                            capture_to_inference_ms=capture_to_inference_ms,
+                            input_queue_wait_ms=input_queue_wait_ms,
+                            inference_time_ms=dur_ms,
+                            results=results,
+                        )
+                        continue
                      
                     self.output_queue.put({
                         "camera_id": camera_id,
@@ -260,16 +306,73 @@ class InferenceServer:
             # Cleanup shared memory attachments
             for buf in self._buffers.values():
                 buf.close()
+            for slot in self._result_slots.values():
+                slot.close()
+            if self._label_table is not None:
+                self._label_table.close()
             logger.info("[InferenceServer] Stopped.")
 
-    def _read_from_shared(self, camera_id: str) -> np.ndarray | None:
-        """Read frame from shared memory buffer for given camera."""
+    def _publish_result_slot(
+        self,
+        result_slot,
+        camera_id: str,
+        frame_id: int,
+        capture_ts: float,
+        enqueue_ts: float,
+        inference_done_ts: float,
+        capture_to_inference_ms: float,
+        input_queue_wait_ms: float,
+        inference_time_ms: float,
+        results: list[dict],
+    ) -> None:
+        """Write a result into the camera's shm slot; announce only matches on output_queue."""
+        from src.pipeline.shared_result_slot import NO_MATCH
+
+        faces = []
+        matches = []
+        for r in results:
+            match_index = NO_MATCH
+            if r["matched"]:
+                match_index = self._label_index.get(r["spg_id"], NO_MATCH)
+                matches.append((r["spg_id"], r["name"], r["similarity"]))
+            faces.append((tuple(r["bbox"]), r["det_score"], r["face_width_px"], match_index, r["similarity"]))
+
+        seq = result_slot.write(
+            frame_id=frame_id,
+            capture_ts=capture_ts,
+            enqueue_ts=enqueue_ts,
+            inference_done_ts=inference_done_ts,
+            capture_to_inference_ms=capture_to_inference_ms,
+            input_queue_wait_ms=input_queue_wait_ms,
+            inference_time_ms=inference_time_ms,
+            faces=faces,
+            labels_version=self._labels_version,
+        )
+        if matches:
+            self.output_queue.put((camera_id, seq, frame_id, capture_ts, matches))
+
+    def _read_from_shared(self, camera_id: str, frame_id: int | None = None) -> np.ndarray | None:
+        """
+        Read frame from shared memory buffer for given camera.
+        With a multi-slot ring the exact frame_id is claimed (None if already overwritten);
+        single-slot buffers always return the latest frame.
+        """
         buf = self._buffers.get(camera_id)
         if buf is None:
             return None
-        frame, _ = buf.read()
+        if frame_id is None:
+            frame, _ = buf.read()
+        else:
+            frame, _ = buf.read_frame(int(frame_id))
         return frame
 
+    def read_recent_frames(self, camera_id: str, k: int) -> list:
+        """Claim up to k most recent (frame, meta) pairs for camera_id, oldest first (temporal/batched use)."""
+        buf = self._buffers.get(camera_id)
+        if buf is None:
+            return []
+        return buf.read_latest(k)
+
     def _resolve_roi_rect(
         self,
         camera_id: str,
@@ -25,6 +25,9 @@ class OutletAggregator:
         # spg_id -> name (cache)
         self.spg_names: Dict[str, str] = {}
 
+        # spg_id -> camera_id of the most recent sighting (alert evidence)
+        self.last_seen_camera: Dict[str, str] = {}
+
     def ingest_events(self, events: List[Event]):
         """
         Ingest a batch of events from any camera in this outlet.
@@ -36,14 +39,16 @@ class OutletAggregator:
             
             if e.event_type == "SPG_SEEN":
                 if e.spg_id:
-                    self._update_seen(e.spg_id, e.ts)
+                    self._update_seen(e.spg_id, e.ts, e.camera_id)
                     if e.name:
                         self.spg_names[e.spg_id] = e.name
 
-    def _update_seen(self, spg_id: str, ts: float):
+    def _update_seen(self, spg_id: str, ts: float, camera_id: Optional[str] = None):
         # Update global last seen
         if ts > self.last_seen[spg_id]:
             self.last_seen[spg_id] = ts
+            if camera_id:
+                self.last_seen_camera[spg_id] = camera_id
             
             # Only reset absence if this is new information
             if self.is_absent[spg_id]:
@@ -120,6 +125,7 @@ class OutletAggregator:
         state = {
             "outlet_id": self.outlet_id,
             "timestamp": now,
+            "start_time": self.start_time,
             "spgs": []
         }
         
@@ -0,0 +1,141 @@
+"""
+PresenceCompactor: merges consecutive SPG_SEEN events into presence intervals.
+
+A staff member standing in view produces one SPG_SEEN per confirmed frame. Instead
+of persisting every one, the compactor keeps one open interval per SPG (across all
+cameras of the outlet) and emits a single SPG_SEEN_INTERVAL record:
+
+- when the SPG has not been seen for `gap_sec` (interval closed), or
+- every `checkpoint_sec` while the SPG stays visible (segment written, interval
+  continues in a new segment), so a crash loses at most one checkpoint.
+
+Record layout (Event, event_type="SPG_SEEN_INTERVAL"):
+    ts          = end of the segment (last sighting)
+    camera_id   = camera of the last sighting
+    similarity  = max similarity in the segment
+    details     = {start_ts, end_ts, duration_sec, hits, max_similarity, cameras, closed}
+
+Segments are disjoint, so durations and hit counts can be summed directly. A
+closed=false segment with no follow-up means the presence ended at its end_ts.
+
+Usage:
+    compactor = PresenceCompactor(outlet_id, gap_sec=10.0, checkpoint_sec=60.0)
+    records = compactor.ingest(seen_event)        # may close a stale interval
+    records += compactor.flush_due(time.time())   # periodic
+    records += compactor.close_all()              # shutdown
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+
+from src.domain.events import Event
+
+
+@dataclass
+class _OpenInterval:
+    spg_id: str
+    name: str | None
+    start_ts: float
+    end_ts: float
+    last_camera: str
+    segment_opened_at: float
+    hits: int = 0
+    max_similarity: float = 0.0
+    cameras: dict[str, int] = field(default_factory=dict)
+
+
+class PresenceCompactor:
+    def __init__(self, outlet_id: str, gap_sec: float = 10.0, checkpoint_sec: float = 60.0):
+        self.outlet_id = outlet_id
+        self.gap_sec = max(0.5, float(gap_sec))
+        self.checkpoint_sec = max(self.gap_sec, float(checkpoint_sec))
+        self._open: dict[str, _OpenInterval] = {}
+
+    def ingest(self, ev: Event) -> list[Event]:
+        """Add one SPG_SEEN event. Returns records for any interval it closed."""
+        if ev.event_type != "SPG_SEEN" or not ev.spg_id:
+            return []
+        out: list[Event] = []
+        cur = self._open.get(ev.spg_id)
+        if cur is not None and (ev.ts - cur.end_ts) > self.gap_sec:
+            rec = self._record(cur, closed=True)
+            if rec is not None:
+                out.append(rec)
+            cur = None
+        if cur is None:
+            cur = _OpenInterval(
+                spg_id=ev.spg_id,
+                name=ev.name,
+                start_ts=ev.ts,
+                end_ts=ev.ts,
+                last_camera=ev.camera_id,
+                segment_opened_at=time.time(),
+            )
+            self._open[ev.spg_id] = cur
+
+        # Results from different cameras can arrive slightly out of order.
+        cur.start_ts = min(cur.start_ts, ev.ts)
+        if ev.ts >= cur.end_ts:
+            cur.end_ts = ev.ts
+            cur.last_camera = ev.camera_id
+        cur.hits += 1
+        cur.max_similarity = max(cur.max_similarity, float(ev.similarity or 0.0))
+        cur.cameras[ev.camera_id] = cur.cameras.get(ev.camera_id, 0) + 1
+        if ev.name:
+            cur.name = ev.name
+        return out
+
+    def flush_due(self, now: float | None = None) -> list[Event]:
+        """Close intervals idle for gap_sec and checkpoint long-running ones."""
+        now = time.time() if now is None else now
+        out: list[Event] = []
+        for spg_id in list(self._open.keys()):
+            cur = self._open[spg_id]
+            if (now - cur.end_ts) > self.gap_sec:
+                out.append(self._record(cur, closed=True))
+                del self._open[spg_id]
+            elif (now - cur.segment_opened_at) >= self.checkpoint_sec:
+                out.append(self._record(cur, closed=False))
+                # Next segment starts with the next sighting; end_ts keeps gap detection continuous.
+                self._open[spg_id] = _OpenInterval(
+                    spg_id=spg_id,
+                    name=cur.name,
+                    start_ts=cur.end_ts,
+                    end_ts=cur.end_ts,
+                    last_camera=cur.last_camera,
+                    segment_opened_at=now,
+                )
+        return [r for r in out if r is not None]
+
+    def close_all(self) -> list[Event]:
+        out = [self._record(cur, closed=True) for cur in self._open.values()]
+        self._open.clear()
+        return [r for r in out if r is not None]
+
+    def open_count(self) -> int:
+        return len(self._open)
+
+    def _record(self, cur: _OpenInterval, closed: bool) -> Event | None:
+        if cur.hits == 0:
+            # Checkpointed segment with no sightings since; nothing new to write.
+            return None
+        return Event(
+            ts=cur.end_ts,
+            event_type="SPG_SEEN_INTERVAL",
+            outlet_id=self.outlet_id,
+            camera_id=cur.last_camera,
+            spg_id=cur.spg_id,
+            name=cur.name,
+            similarity=round(cur.max_similarity, 4),
+            details={
+                "start_ts": cur.start_ts,
+                "end_ts": cur.end_ts,
+                "duration_sec": round(max(0.0, cur.end_ts - cur.start_ts), 3),
+                "hits": cur.hits,
+                "max_similarity": round(cur.max_similarity, 4),
+                "cameras": sorted(cur.cameras.keys()),
+                "closed": closed,
+            },
+        )
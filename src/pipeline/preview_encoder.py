@@ -0,0 +1,229 @@
+"""
+PreviewEncoder: dashboard preview work off the capture loop.
+
+Resizing, drawing the overlay and JPEG-encoding the preview used to run inline in
+the worker loop, between `reader.read_throttled()` and the next capture, so every
+preview tick delayed the next frame (and inflated capture_to_inference_ms). The
+worker now hands the frame to this thread and moves on.
+
+The hand-off is a latest-only slot: if the thread is still busy with the previous
+frame, a newer job replaces the pending one (counted as `dropped`) instead of
+queueing. Preview is always "the newest frame", never a backlog.
+
+The thread owns the job's frame after submit(): the capture loop must not draw
+on it afterwards (the reader returns a new array per frame).
+
+Usage:
+    encoder = PreviewEncoder(camera_id, width=640, slots=preview_slots, paths={"ai": ..., "raw": ...})
+    encoder.start()
+    encoder.submit(PreviewJob(frame, faces, bbox_scale, variants={"ai"}, jpeg_quality=80, ts=now))
+    encoder.stats()  # {"encoded", "dropped", "encode_ms", ...}
+    encoder.stop()
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+import cv2
+
+from src.settings.logger import logger
+
+
+def encode_jpeg(frame, jpeg_quality: int) -> bytes | None:
+    try:
+        ok, encoded = cv2.imencode(
+            ".jpg",
+            frame,
+            [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)],
+        )
+        if not ok:
+            return None
+        return encoded.tobytes()
+    except Exception:
+        return None
+
+
+def write_bytes_atomic(
+    filepath: str,
+    payload: bytes,
+    retries: int = 2,
+    retry_sleep_sec: float = 0.01,
+) -> bool:
+    """
+    Atomically replace destination file with already-encoded bytes.
+    This prevents readers from seeing partially-written JPEG bytes.
+    """
+    tmp_path = f"{filepath}.tmp"
+    for attempt in range(retries):
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, filepath)
+            return True
+        except PermissionError:
+            if attempt < retries - 1:
+                time.sleep(retry_sleep_sec)
+        except OSError:
+            if attempt < retries - 1:
+                time.sleep(retry_sleep_sec)
+
+    try:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    except OSError:
+        pass
+    return False
+
+
+def draw_faces(frame, faces: list[dict], bbox_scale: float = 1.0) -> None:
+    """Draw recognition boxes/labels in place; bboxes are in inference-frame coordinates."""
+    inv_scale = 1.0 / bbox_scale if bbox_scale > 0 else 1.0
+    for f in faces:
+        bbox = f['bbox']
+        x1 = int(bbox[0] * inv_scale)
+        y1 = int(bbox[1] * inv_scale)
+        x2 = int(bbox[2] * inv_scale)
+        y2 = int(bbox[3] * inv_scale)
+
+        color = (0, 255, 0) if f['matched'] else (0, 0, 255)
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+
+        label = f"{f['name']} ({f['similarity']:.2f})"
+        cv2.putText(frame, label, (x1, max(0, y1 - 10)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+
+@dataclass
+class PreviewJob:
+    frame: object
+    faces: list[dict]
+    bbox_scale: float
+    variants: set[str]
+    jpeg_quality: int
+    ts: float
+    write_disk: bool = False
+    submitted_at: float = field(default_factory=time.perf_counter)
+
+
+class PreviewEncoder:
+    def __init__(
+        self,
+        camera_id: str,
+        width: int,
+        slots: dict | None = None,
+        paths: dict[str, str] | None = None,
+    ):
+        self.camera_id = camera_id
+        self.width = int(width)
+        self.slots = slots or {}
+        self.paths = paths or {}
+
+        self._cond = threading.Condition()
+        self._pending: PreviewJob | None = None
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+        self._slot_full_warned = False
+
+        self._encoded = 0
+        self._dropped = 0
+        self._encode_ms = 0.0
+        self._wait_ms = 0.0
+        self._last_ts = 0.0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=f"preview_{self.camera_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_sec: float = 2.0) -> None:
+        with self._cond:
+            self._stopping = True
+            self._pending = None
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_sec)
+            self._thread = None
+
+    def submit(self, job: PreviewJob) -> None:
+        """Never blocks: replaces a job the thread has not picked up yet."""
+        with self._cond:
+            if self._pending is not None:
+                self._dropped += 1
+            self._pending = job
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                job = self._pending
+                self._pending = None
+            try:
+                self._process(job)
+            except Exception as e:
+                logger.debug(f"[Preview {self.camera_id}] Encode failed: {e}")
+
+    def _process(self, job: PreviewJob) -> None:
+        t0 = time.perf_counter()
+        frame = job.frame
+        h, w = frame.shape[:2]
+        if w <= 0 or self.width <= 0:
+            return
+        target_h = max(1, int(h * self.width / w))
+
+        encoded = {}
+        # Raw is downscaled before the overlay is drawn so no full-size copy is needed.
+        if "raw" in job.variants:
+            encoded["raw"] = encode_jpeg(cv2.resize(frame, (self.width, target_h)), job.jpeg_quality)
+        if "ai" in job.variants:
+            draw_faces(frame, job.faces, job.bbox_scale)
+            encoded["ai"] = encode_jpeg(cv2.resize(frame, (self.width, target_h)), job.jpeg_quality)
+
+        n_encoded = sum(1 for jpeg in encoded.values() if jpeg is not None)
+        if n_encoded:
+            encode_ms = (time.perf_counter() - t0) * 1000.0 / n_encoded
+            wait_ms = (t0 - job.submitted_at) * 1000.0
+            self._encode_ms = encode_ms if self._encode_ms <= 0 else (0.2 * encode_ms + 0.8 * self._encode_ms)
+            self._wait_ms = wait_ms if self._wait_ms <= 0 else (0.2 * wait_ms + 0.8 * self._wait_ms)
+            self._encoded += n_encoded
+
+        published = set()
+        for variant, jpeg in encoded.items():
+            slot = self.slots.get(variant)
+            if jpeg is None or slot is None:
+                continue
+            if slot.write(jpeg, width=self.width, height=target_h, ts=job.ts):
+                published.add(variant)
+            elif not self._slot_full_warned:
+                self._slot_full_warned = True
+                logger.warning(
+                    f"[CamWorker {self.camera_id}] Preview JPEG ({len(jpeg)} B) exceeds slot "
+                    f"capacity ({slot.capacity} B); writing preview files instead"
+                )
+
+        for variant, jpeg in encoded.items():
+            path = self.paths.get(variant)
+            if jpeg is None or path is None:
+                continue
+            if variant in published and not job.write_disk:
+                continue
+            if write_bytes_atomic(path, jpeg):
+                published.add(variant)
+        if published:
+            self._last_ts = job.ts
+
+    def stats(self) -> dict:
+        return {
+            "encoded": self._encoded,
+            "dropped": self._dropped,
+            "encode_ms": self._encode_ms,
+            "wait_ms": self._wait_ms,
+            "last_ts": self._last_ts,
+        }
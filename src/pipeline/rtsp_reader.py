@@ -1,5 +1,6 @@
 import random
 import re
+import threading
 import time
 import os
 
@@ -10,6 +11,20 @@ from src.settings.logger import logger
 
 _CRED_IN_URL = re.compile(r"://([^/@:]+):([^/@]+)@")
 
+# Connection states reported through RTSPReader.status()
+CONN_IDLE = "idle"
+CONN_CONNECTING = "connecting"
+CONN_OPEN = "open"
+CONN_BACKOFF = "backoff"
+
+CONN_STATE_CODES = {
+    CONN_IDLE: 0,
+    CONN_CONNECTING: 1,
+    CONN_OPEN: 2,
+    CONN_BACKOFF: 3,
+}
+CONN_STATE_NAMES = {code: name for name, code in CONN_STATE_CODES.items()}
+
 
 def _mask_rtsp_url(url: str) -> str:
     """Mask credentials in URL before logging."""
@@ -19,7 +34,7 @@ def _mask_rtsp_url(url: str) -> str:
 
 
 class RTSPReader:
-    def __init__(self, rtsp_url: str, process_fps: int):
+    def __init__(self, rtsp_url: str, process_fps: int, open_timeout_sec: float = 10.0):
         self.rtsp_url = rtsp_url
         self._safe_url = _mask_rtsp_url(rtsp_url)
         self.process_fps = max(1, int(process_fps))
@@ -36,12 +51,34 @@ class RTSPReader:
         self._reconnect_attempt = 0
         self._next_reconnect_ts = 0.0
 
+        # Background connect (cv2.VideoCapture(url) can block for tens of seconds)
+        self.open_timeout_sec = max(0.5, float(open_timeout_sec))
+        self._connect_lock = threading.Lock()
+        self._connect_thread: threading.Thread | None = None
+        self._connect_started_ts = 0.0
+        self._connect_generation = 0
+        self._pending_cap: cv2.VideoCapture | None = None
+        self._pending_done = False
+
+        self.state = CONN_IDLE
+        self.connect_attempts = 0
+        self.last_connect_latency_ms: float | None = None
+
     def set_loop(self, loop: bool):
         self.loop = loop
 
     def _open_capture(self) -> cv2.VideoCapture:
         os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = "rtsp_transport;tcp"
-        cap = cv2.VideoCapture(self.rtsp_url)
+        timeout_ms = int(self.open_timeout_sec * 1000)
+        try:
+            cap = cv2.VideoCapture(
+                self.rtsp_url,
+                cv2.CAP_FFMPEG,
+                [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms, cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms],
+            )
+        except (AttributeError, TypeError, cv2.error):
+            # OpenCV < 4.5.2 has no open/read timeout params.
+            cap = cv2.VideoCapture(self.rtsp_url)
         try:
             cap.set(cv2.CAP_PROP_BUFFERSIZE, 2)
         except Exception:
@@ -61,52 +98,137 @@ class RTSPReader:
         jitter = random.uniform(0.0, delay * self.reconnect_jitter_ratio)
         wait_sec = delay + jitter
         self._next_reconnect_ts = time.time() + wait_sec
+        self.state = CONN_BACKOFF
         logger.warning(
             f"RTSP reconnect scheduled in {wait_sec:.1f}s "
             f"(attempt={self._reconnect_attempt}) for {self._safe_url}"
         )
 
-    def start(self):
-        logger.info(f"Connecting to RTSP stream: {self._safe_url}")
-        self.cap = self._open_capture()
-        if not self.cap.isOpened():
-            logger.error(f"Cannot open RTSP stream: {self._safe_url}")
+    def _connect_worker(self, generation: int):
+        cap = None
+        try:
+            cap = self._open_capture()
+        except Exception as e:
+            logger.warning(f"RTSP open raised for {self._safe_url}: {e}")
+
+        with self._connect_lock:
+            if generation == self._connect_generation:
+                self._pending_cap = cap
+                self._pending_done = True
+                return
+
+        # Attempt was abandoned (timeout/stop) while we were blocked in open.
+        if cap is not None:
             try:
-                self.cap.release()
+                cap.release()
             except Exception:
                 pass
-            self.cap = None
-            self._schedule_next_reconnect()
-        else:
-            self._reset_reconnect_state()
 
-    def _reconnect(self) -> bool:
-        now = time.time()
-        if now < self._next_reconnect_ts:
-            return False
+    def _begin_connect(self):
+        with self._connect_lock:
+            self._connect_generation += 1
+            generation = self._connect_generation
+            self._pending_cap = None
+            self._pending_done = False
 
-        logger.warning(f"Attempting to reconnect RTSP: {self._safe_url}")
-        if self.cap is not None:
+        self.connect_attempts += 1
+        self._connect_started_ts = time.time()
+        self.state = CONN_CONNECTING
+        self._connect_thread = threading.Thread(
+            target=self._connect_worker,
+            args=(generation,),
+            name="rtsp_connect",
+            daemon=True,
+        )
+        self._connect_thread.start()
+
+    def _abandon_connect(self):
+        with self._connect_lock:
+            self._connect_generation += 1
+            cap = self._pending_cap
+            self._pending_cap = None
+            self._pending_done = False
+        self._connect_thread = None
+        if cap is not None:
             try:
-                self.cap.release()
+                cap.release()
             except Exception:
                 pass
 
-        self.cap = self._open_capture()
+    def _poll_connect(self) -> bool:
+        """Advance the background connect state machine. Returns True once a capture is open."""
+        if self._connect_thread is None:
+            if time.time() < self._next_reconnect_ts:
+                return False
+            if self._reconnect_attempt > 0:
+                logger.warning(f"Attempting to reconnect RTSP: {self._safe_url}")
+            self._begin_connect()
+            return False
+
+        with self._connect_lock:
+            done = self._pending_done
+            cap = self._pending_cap
+            if done:
+                self._pending_cap = None
+                self._pending_done = False
+
+        now = time.time()
+        if not done:
+            if (now - self._connect_started_ts) > self.open_timeout_sec:
+                logger.error(
+                    f"RTSP open timed out after {self.open_timeout_sec:.1f}s: {self._safe_url}"
+                )
+                self._abandon_connect()
+                self._schedule_next_reconnect()
+            return False
 
-        if self.cap.isOpened():
-            logger.info("RTSP reconnected successfully.")
+        self._connect_thread = None
+        self.last_connect_latency_ms = (now - self._connect_started_ts) * 1000.0
+
+        if cap is not None and cap.isOpened():
+            if self._reconnect_attempt > 0:
+                logger.info("RTSP reconnected successfully.")
+            self.cap = cap
+            self.state = CONN_OPEN
             self._reset_reconnect_state()
             return True
 
-        try:
-            self.cap.release()
-        except Exception:
-            pass
-        self.cap = None
+        logger.error(f"Cannot open RTSP stream: {self._safe_url}")
+        if cap is not None:
+            try:
+                cap.release()
+            except Exception:
+                pass
         self._schedule_next_reconnect()
         return False
 
+    def start(self):
+        """Kick off the first connection attempt in the background; never blocks."""
+        logger.info(f"Connecting to RTSP stream: {self._safe_url}")
+        self._reset_reconnect_state()
+        self._begin_connect()
+
+    def _reconnect(self) -> bool:
+        if self.cap is not None:
+            try:
+                self.cap.release()
+            except Exception:
+                pass
+            self.cap = None
+        return self._poll_connect()
+
+    def status(self) -> dict:
+        """Connection snapshot for health reporting."""
+        connecting_for_sec = None
+        if self.state == CONN_CONNECTING:
+            connecting_for_sec = max(0.0, time.time() - self._connect_started_ts)
+        return {
+            "state": self.state,
+            "connect_attempts": self.connect_attempts,
+            "last_connect_latency_ms": self.last_connect_latency_ms,
+            "connecting_for_sec": connecting_for_sec,
+        }
+
     def read_throttled(self):
         # Auto-reconnect if connection is lost or not initialized.
         if self.cap is None or not self.cap.isOpened():
@@ -136,6 +258,8 @@ class RTSPReader:
         return None
 
     def stop(self):
+        self._abandon_connect()
         if self.cap is not None:
             self.cap.release()
             self.cap = None
+        self.state = CONN_IDLE
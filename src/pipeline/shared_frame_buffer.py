@@ -10,20 +10,31 @@ Usage:
 
     # In camera worker process:
     buf.write(frame_bgr)
+    # ...or resize straight into the slot (no temporary array):
+    with buf.write_view(h, w, frame_id, ts) as dst:
+        cv2.resize(frame_bgr, (w, h), dst=dst)
 
     # In inference server process:
     frame = buf.read()
+    # Side readers that must not count as consumers (rings track unclaimed drops):
+    frame = buf.peek()
 
     # Cleanup:
     buf.close()
     buf.unlink()  # Only in main process
+
+NegotiatedFrameBuffer wraps one camera's slot so it can be sized from the actual
+stream resolution and re-created (new generation) when a reconnect changes it.
 """
 
 from __future__ import annotations
 
+import multiprocessing
 import numpy as np
+from contextlib import contextmanager
 from multiprocessing import shared_memory, Lock
 from dataclasses import dataclass
+from typing import Iterator
 
 
 # Pre-calculated: 1280x720x3 = 2,764,800 bytes (~2.6MB)
@@ -113,27 +124,77 @@ class SharedFrameBuffer:
             is_creator=False,
         )
 
+    @property
+    def max_height(self) -> int:
+        return self._max_h
+
+    @property
+    def max_width(self) -> int:
+        return self._max_w
+
+    def fit_size(self, height: int, width: int) -> tuple[int, int, float]:
+        """
+        Return (h, w, scale) that fits (height, width) into this slot, keeping aspect ratio.
+        scale is 1.0 when the frame already fits.
+        """
+        return fit_frame_size(height, width, self._max_h, self._max_w)
+
+    def _pixel_view(self, h: int, w: int) -> np.ndarray:
+        return np.ndarray(
+            (h, w, _CHANNELS),
+            dtype=np.uint8,
+            buffer=self._shm.buf,
+            offset=self._pixel_offset,
+        )
+
+    def _write_header(self, h: int, w: int, frame_id: int, timestamp: float) -> None:
+        buf = self._shm.buf
+        np.frombuffer(buf, dtype=np.int32, count=1, offset=0)[:] = h
+        np.frombuffer(buf, dtype=np.int32, count=1, offset=4)[:] = w
+        np.frombuffer(buf, dtype=np.int64, count=1, offset=8)[:] = frame_id
+        np.frombuffer(buf, dtype=np.float64, count=1, offset=16)[:] = timestamp
+
+    @contextmanager
+    def write_view(
+        self,
+        height: int,
+        width: int,
+        frame_id: int = 0,
+        timestamp: float = 0.0,
+    ) -> Iterator[np.ndarray]:
+        """
+        Yield a writable (height, width, 3) uint8 view directly over the shm pixel slot.
+
+        The caller fills it in place (e.g. cv2.resize(..., dst=view) or np.copyto),
+        so the frame is written exactly once. The lock is held for the duration of
+        the block; the header and valid flag are published on successful exit.
+        If the block raises, the slot is left marked invalid.
+        """
+        if height > self._max_h or width > self._max_w or height <= 0 or width <= 0:
+            raise ValueError(
+                f"Frame {width}x{height} does not fit shared slot {self._max_w}x{self._max_h}"
+            )
+
+        with self._lock:
+            valid = np.frombuffer(self._shm.buf, dtype=np.int32, count=1, offset=24)
+            valid[:] = 0
+            view = self._pixel_view(height, width)
+            try:
+                yield view
+            finally:
+                del view
+            self._write_header(height, width, frame_id, timestamp)
+            # Set valid flag LAST (acts as memory fence)
+            valid[:] = 1
+
     def write(self, frame_bgr: np.ndarray, frame_id: int = 0, timestamp: float = 0.0) -> bool:
         """Write a frame into shared memory. Returns False if frame too large."""
         h, w = frame_bgr.shape[:2]
         if h > self._max_h or w > self._max_w:
             return False
 
-        with self._lock:
-            buf = self._shm.buf
-            
-            # Write header
-            np.frombuffer(buf, dtype=np.int32, count=1, offset=0)[:] = h
-            np.frombuffer(buf, dtype=np.int32, count=1, offset=4)[:] = w
-            np.frombuffer(buf, dtype=np.int64, count=1, offset=8)[:] = frame_id
-            np.frombuffer(buf, dtype=np.float64, count=1, offset=16)[:] = timestamp
-
-            # Write pixel data
-            flat = frame_bgr.tobytes()
-            buf[self._pixel_offset : self._pixel_offset + len(flat)] = flat
-
-            # Set valid flag LAST (acts as memory fence)
-            np.frombuffer(buf, dtype=np.int32, count=1, offset=24)[:] = 1
+        with self.write_view(h, w, frame_id, timestamp) as dst:
+            np.copyto(dst, frame_bgr.reshape(h, w, _CHANNELS))
 
         return True
 
@@ -164,6 +225,10 @@ class SharedFrameBuffer:
         meta = FrameMeta(height=h, width=w, frame_id=fid, timestamp=ts)
         return frame, meta
 
+    def peek(self) -> tuple[np.ndarray | None, FrameMeta | None]:
+        """Same as read(): a single slot has no claim bookkeeping."""
+        return self.read()
+
     def close(self):
         """Close this process's view. Safe to call multiple times."""
         try:
@@ -178,3 +243,415 @@ class SharedFrameBuffer:
                 self._shm.unlink()
             except Exception:
                 pass
+
+
+def fit_frame_size(height: int, width: int, max_height: int, max_width: int) -> tuple[int, int, float]:
+    """Return (h, w, scale) fitting (height, width) into (max_height, max_width), keeping aspect ratio."""
+    if height <= max_height and width <= max_width:
+        return height, width, 1.0
+    scale = min(max_height / height, max_width / width)
+    return max(1, int(height * scale)), max(1, int(width * scale)), scale
+
+
+class SharedFrameRing:
+    """
+    N-slot shared memory ring for one camera (temporal look-back / batched inference).
+
+    Same writer API as SharedFrameBuffer (write_view / write / fit_size), plus
+    readers can claim the latest frame, the last-k frames, or a specific frame_id.
+    A slot that is overwritten before any reader claimed it counts as a drop.
+
+    Memory layout:
+      [0:8]   - write_count (int64, total frames published)
+      [8:16]  - drop_count (int64, slots overwritten while unclaimed)
+      [16:20] - slot count (int32)
+      [20:24] - reserved
+      then per slot (32-byte header + max_h * max_w * 3 pixel bytes):
+        [0:4]   - height (int32)
+        [4:8]   - width (int32)
+        [8:16]  - frame_id (int64, monotonically increasing across slots)
+        [16:24] - timestamp (float64)
+        [24:28] - valid flag (int32)
+        [28:32] - claimed flag (int32, 1 once a reader has read this slot)
+    """
+
+    _RING_HEADER_SIZE = 24
+    _SLOT_HEADER_SIZE = 32
+
+    def __init__(
+        self,
+        shm: shared_memory.SharedMemory,
+        max_height: int,
+        max_width: int,
+        slots: int,
+        lock: Lock,
+        is_creator: bool = False,
+    ):
+        self._shm = shm
+        self._max_h = max_height
+        self._max_w = max_width
+        self._slots = slots
+        self._lock = lock
+        self._is_creator = is_creator
+        self._slot_stride = self._SLOT_HEADER_SIZE + max_height * max_width * _CHANNELS
+
+    @classmethod
+    def total_size(cls, max_height: int, max_width: int, slots: int) -> int:
+        return cls._RING_HEADER_SIZE + slots * (cls._SLOT_HEADER_SIZE + max_height * max_width * _CHANNELS)
+
+    @classmethod
+    def create(
+        cls,
+        name: str,
+        max_height: int = _DEFAULT_MAX_H,
+        max_width: int = _DEFAULT_MAX_W,
+        slots: int = 4,
+        lock: Lock | None = None,
+    ) -> SharedFrameRing:
+        """Create a NEW ring. Call from main process only."""
+        slots = max(1, int(slots))
+        shm = shared_memory.SharedMemory(
+            name=f"sfb_{name}", create=True, size=cls.total_size(max_height, max_width, slots)
+        )
+        ring = cls(shm, max_height, max_width, slots, lock or Lock(), is_creator=True)
+        buf = shm.buf
+        np.frombuffer(buf, dtype=np.int64, count=2, offset=0)[:] = 0
+        np.frombuffer(buf, dtype=np.int32, count=1, offset=16)[:] = slots
+        for i in range(slots):
+            np.frombuffer(buf, dtype=np.int32, count=2, offset=ring._slot_offset(i) + 24)[:] = 0
+        return ring
+
+    @classmethod
+    def attach(
+        cls,
+        name: str,
+        max_height: int = _DEFAULT_MAX_H,
+        max_width: int = _DEFAULT_MAX_W,
+        lock: Lock | None = None,
+    ) -> SharedFrameRing:
+        """Attach to an EXISTING ring. Call from child processes."""
+        shm = shared_memory.SharedMemory(name=f"sfb_{name}", create=False)
+        slots = int(np.frombuffer(shm.buf, dtype=np.int32, count=1, offset=16)[0])
+        return cls(shm, max_height, max_width, slots, lock or Lock(), is_creator=False)
+
+    @property
+    def max_height(self) -> int:
+        return self._max_h
+
+    @property
+    def max_width(self) -> int:
+        return self._max_w
+
+    @property
+    def slots(self) -> int:
+        return self._slots
+
+    def fit_size(self, height: int, width: int) -> tuple[int, int, float]:
+        return fit_frame_size(height, width, self._max_h, self._max_w)
+
+    def _slot_offset(self, index: int) -> int:
+        return self._RING_HEADER_SIZE + index * self._slot_stride
+
+    def _counters(self) -> np.ndarray:
+        return np.frombuffer(self._shm.buf, dtype=np.int64, count=2, offset=0)
+
+    @contextmanager
+    def write_view(
+        self,
+        height: int,
+        width: int,
+        frame_id: int = 0,
+        timestamp: float = 0.0,
+    ) -> Iterator[np.ndarray]:
+        """Yield a writable view over the next ring slot; publish it on successful exit."""
+        if height > self._max_h or width > self._max_w or height <= 0 or width <= 0:
+            raise ValueError(
+                f"Frame {width}x{height} does not fit shared slot {self._max_w}x{self._max_h}"
+            )
+
+        with self._lock:
+            buf = self._shm.buf
+            counters = self._counters()
+            base = self._slot_offset(int(counters[0]) % self._slots)
+            flags = np.frombuffer(buf, dtype=np.int32, count=2, offset=base + 24)
+            if flags[0] == 1 and flags[1] == 0:
+                counters[1] += 1
+            flags[:] = 0
+
+            view = np.ndarray(
+                (height, width, _CHANNELS),
+                dtype=np.uint8,
+                buffer=buf,
+                offset=base + self._SLOT_HEADER_SIZE,
+            )
+            try:
+                yield view
+            finally:
+                del view
+
+            np.frombuffer(buf, dtype=np.int32, count=2, offset=base)[:] = (height, width)
+            np.frombuffer(buf, dtype=np.int64, count=1, offset=base + 8)[:] = frame_id
+            np.frombuffer(buf, dtype=np.float64, count=1, offset=base + 16)[:] = timestamp
+            flags[0] = 1
+            counters[0] += 1
+
+    def write(self, frame_bgr: np.ndarray, frame_id: int = 0, timestamp: float = 0.0) -> bool:
+        """Write a frame into the next slot. Returns False if frame too large."""
+        h, w = frame_bgr.shape[:2]
+        if h > self._max_h or w > self._max_w:
+            return False
+        with self.write_view(h, w, frame_id, timestamp) as dst:
+            np.copyto(dst, frame_bgr.reshape(h, w, _CHANNELS))
+        return True
+
+    def _read_slot(self, index: int, claim: bool = True) -> tuple[np.ndarray | None, FrameMeta | None]:
+        """Copy one slot out. Caller must hold the lock."""
+        buf = self._shm.buf
+        base = self._slot_offset(index)
+        flags = np.frombuffer(buf, dtype=np.int32, count=2, offset=base + 24)
+        if flags[0] == 0:
+            return None, None
+        h, w = (int(v) for v in np.frombuffer(buf, dtype=np.int32, count=2, offset=base))
+        fid = int(np.frombuffer(buf, dtype=np.int64, count=1, offset=base + 8)[0])
+        ts = float(np.frombuffer(buf, dtype=np.float64, count=1, offset=base + 16)[0])
+        start = base + self._SLOT_HEADER_SIZE
+        frame = np.frombuffer(
+            bytes(buf[start : start + h * w * _CHANNELS]), dtype=np.uint8
+        ).reshape(h, w, _CHANNELS)
+        if claim:
+            flags[1] = 1
+        return frame, FrameMeta(height=h, width=w, frame_id=fid, timestamp=ts)
+
+    def read_latest(self, k: int = 1) -> list[tuple[np.ndarray, FrameMeta]]:
+        """Claim up to k most recent frames, oldest first."""
+        k = max(1, min(int(k), self._slots))
+        out: list[tuple[np.ndarray, FrameMeta]] = []
+        with self._lock:
+            written = int(self._counters()[0])
+            for back in range(min(k, written), 0, -1):
+                frame, meta = self._read_slot((written - back) % self._slots)
+                if frame is not None:
+                    out.append((frame, meta))
+        return out
+
+    def read(self) -> tuple[np.ndarray | None, FrameMeta | None]:
+        """Claim the latest frame (SharedFrameBuffer-compatible)."""
+        frames = self.read_latest(1)
+        if not frames:
+            return None, None
+        return frames[0]
+
+    def peek(self) -> tuple[np.ndarray | None, FrameMeta | None]:
+        """Copy the latest frame without claiming it (side readers, e.g. evidence sampling)."""
+        with self._lock:
+            written = int(self._counters()[0])
+            if written == 0:
+                return None, None
+            return self._read_slot((written - 1) % self._slots, claim=False)
+
+    def read_frame(self, frame_id: int) -> tuple[np.ndarray | None, FrameMeta | None]:
+        """Claim the slot holding frame_id, or (None, None) if it was already overwritten."""
+        with self._lock:
+            buf = self._shm.buf
+            for i in range(self._slots):
+                base = self._slot_offset(i)
+                if int(np.frombuffer(buf, dtype=np.int32, count=1, offset=base + 24)[0]) == 0:
+                    continue
+                if int(np.frombuffer(buf, dtype=np.int64, count=1, offset=base + 8)[0]) == frame_id:
+                    return self._read_slot(i)
+        return None, None
+
+    def stats(self) -> dict:
+        with self._lock:
+            written, dropped = (int(v) for v in self._counters())
+        return {"slots": self._slots, "written": written, "dropped": dropped}
+
+    def close(self):
+        """Close this process's view. Safe to call multiple times."""
+        try:
+            self._shm.close()
+        except Exception:
+            pass
+
+    def unlink(self):
+        """Remove the shared memory. Only call from the creator (main process)."""
+        if self._is_creator:
+            try:
+                self._shm.unlink()
+            except Exception:
+                pass
+
+
+def _slot_name(base_name: str, generation: int) -> str:
+    return base_name if generation == 0 else f"{base_name}_g{generation}"
+
+
+class NegotiatedFrameBuffer:
+    """
+    Per-camera SharedFrameBuffer whose size can be renegotiated at runtime.
+
+    The main process owns the segment and re-creates it (new generation, new shm name)
+    when a worker reports a different stream resolution. Workers and the inference
+    server hold attached views and transparently re-attach when the generation changes.
+
+    With slots > 1 each generation is a SharedFrameRing instead of a single slot.
+
+    Descriptor (multiprocessing.Array("q", 4), guarded by the frame lock):
+      [0] generation
+      [1] slot height
+      [2] slot width
+      [3] ring slots (1 = single SharedFrameBuffer)
+
+    Pass ``spec()`` to child processes and rebuild with ``attach(*spec)``.
+    """
+
+    def __init__(self, base_name: str, lock: Lock, descriptor, is_owner: bool = False):
+        self._base_name = base_name
+        self._lock = lock
+        self._descriptor = descriptor
+        self._is_owner = is_owner
+        self._buf: SharedFrameBuffer | SharedFrameRing | None = None
+        self._generation = -1
+        # Ring counters carried over from previous generations (owner side)
+        self._written_before = 0
+        self._dropped_before = 0
+
+    @classmethod
+    def create(
+        cls,
+        base_name: str,
+        height: int,
+        width: int,
+        lock: Lock | None = None,
+        slots: int = 1,
+    ) -> NegotiatedFrameBuffer:
+        """Create generation 0. Call from main process only."""
+        lock = lock or Lock()
+        slots = max(1, int(slots))
+        descriptor = multiprocessing.Array("q", [0, int(height), int(width), slots], lock=False)
+        slot = cls(base_name, lock, descriptor, is_owner=True)
+        slot._buf = slot._create_segment(0, height, width, slots)
+        slot._generation = 0
+        return slot
+
+    def _create_segment(self, generation: int, height: int, width: int, slots: int):
+        name = _slot_name(self._base_name, generation)
+        if slots > 1:
+            return SharedFrameRing.create(name, height, width, slots, self._lock)
+        return SharedFrameBuffer.create(name, height, width, self._lock)
+
+    @classmethod
+    def attach(cls, base_name: str, lock: Lock, descriptor) -> NegotiatedFrameBuffer:
+        """Attach from a child process; the segment itself is mapped lazily by current()."""
+        return cls(base_name, lock, descriptor, is_owner=False)
+
+    def spec(self) -> tuple:
+        return (self._base_name, self._lock, self._descriptor)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """(height, width) of the currently published slot."""
+        with self._lock:
+            return int(self._descriptor[1]), int(self._descriptor[2])
+
+    @property
+    def slots(self) -> int:
+        return int(self._descriptor[3])
+
+    @property
+    def nbytes(self) -> int:
+        h, w = self.shape
+        slots = self.slots
+        if slots > 1:
+            return SharedFrameRing.total_size(h, w, slots)
+        return SharedFrameBuffer._HEADER_SIZE + h * w * _CHANNELS
+
+    def current(self) -> SharedFrameBuffer | SharedFrameRing:
+        """Return the buffer for the published generation, re-attaching if it changed."""
+        with self._lock:
+            gen, h, w, slots = (int(v) for v in self._descriptor[:4])
+        if self._buf is None or gen != self._generation:
+            name = _slot_name(self._base_name, gen)
+            if slots > 1:
+                buf = SharedFrameRing.attach(name, h, w, self._lock)
+            else:
+                buf = SharedFrameBuffer.attach(name, h, w, self._lock)
+            if self._buf is not None:
+                self._buf.close()
+            self._buf = buf
+            self._generation = gen
+        return self._buf
+
+    def read(self) -> tuple[np.ndarray | None, FrameMeta | None]:
+        return self.current().read()
+
+    def peek(self) -> tuple[np.ndarray | None, FrameMeta | None]:
+        """Latest frame without claiming it, so ring drop counters stay accurate."""
+        return self.current().peek()
+
+    def read_frame(self, frame_id: int) -> tuple[np.ndarray | None, FrameMeta | None]:
+        """Read a specific frame_id from a ring; single-slot buffers fall back to latest."""
+        buf = self.current()
+        if isinstance(buf, SharedFrameRing):
+            return buf.read_frame(frame_id)
+        return buf.read()
+
+    def read_latest(self, k: int = 1) -> list[tuple[np.ndarray, FrameMeta]]:
+        """Claim up to k most recent frames, oldest first."""
+        buf = self.current()
+        if isinstance(buf, SharedFrameRing):
+            return buf.read_latest(k)
+        frame, meta = buf.read()
+        return [] if frame is None else [(frame, meta)]
+
+    def stats(self) -> dict:
+        """Ring counters for the current generation (zeros for single-slot buffers)."""
+        buf = self.current()
+        out = {"slots": 1, "written": 0, "dropped": 0}
+        if isinstance(buf, SharedFrameRing):
+            out = buf.stats()
+        out["written"] += self._written_before
+        out["dropped"] += self._dropped_before
+        return out
+
+    def resize(self, height: int, width: int) -> bool:
+        """
+        Re-create the segment at (height, width) as a new generation. Owner only.
+
+        Attached processes pick the new segment up on their next current() call;
+        the old segment is unlinked immediately (existing mappings stay valid until closed).
+        """
+        if not self._is_owner:
+            raise RuntimeError("Only the owner can resize a NegotiatedFrameBuffer")
+        if height <= 0 or width <= 0:
+            return False
+
+        new_gen = self._generation + 1
+        slots = self.slots
+        new_buf = self._create_segment(new_gen, height, width, slots)
+        with self._lock:
+            self._descriptor[:] = [new_gen, int(height), int(width), slots]
+
+        old = self._buf
+        self._buf = new_buf
+        self._generation = new_gen
+        if isinstance(old, SharedFrameRing):
+            old_stats = old.stats()
+            self._written_before += old_stats["written"]
+            self._dropped_before += old_stats["dropped"]
+        if old is not None:
+            old.close()
+            old.unlink()
+        return True
+
+    def close(self):
+        if self._buf is not None:
+            self._buf.close()
+
+    def unlink(self):
+        if self._is_owner and self._buf is not None:
+            self._buf.unlink()
@@ -0,0 +1,205 @@
+"""
+SharedPreviewSlot: latest preview JPEG per camera/variant in shared memory.
+
+Camera workers used to atomically replace latest_frame.jpg / latest_raw_frame.jpg
+several times per second only for the dashboard to read them back. With this slot
+the worker publishes the encoded bytes into shared memory and the dashboard
+streams straight from it; the JPEG files become an optional low-rate fallback.
+
+The dashboard is a separate program (not a multiprocessing child), so no Lock can
+be shared. The slot is a seqlock instead: the writer makes `seq` odd, copies the
+payload, updates the header and makes `seq` even again; readers copy the payload
+and retry if `seq` changed (or was odd) meanwhile. There is one writer per slot.
+
+The header also carries viewer demand in the other direction: the dashboard
+writes how many clients watch this variant plus the interval / JPEG quality it
+wants, refreshed as a heartbeat (`demand_ts`). Workers skip preview work when
+the count is zero or the heartbeat is older than the TTL (dashboard gone).
+
+Memory layout:
+    header (_HEADER_DTYPE): seq, length, width, height, viewers, ts,
+                            demand_ts, demand_interval_ms, demand_quality
+    payload: `capacity` bytes
+
+Usage:
+    # Main process (owner):
+    slot = SharedPreviewSlot.create("cam_01", "ai", capacity=1 << 20)
+
+    # Camera worker:
+    slot = SharedPreviewSlot.attach(*slot.spec())
+    slot.write(jpeg_bytes, width=640, height=360, ts=time.time())
+
+    # Dashboard (unrelated process):
+    slot = SharedPreviewSlot.attach("cam_01", "ai", track=False)
+    slot.set_demand(viewers=2, interval_sec=0.2)
+    seq, data = slot.read(since_seq=last_seq)
+
+    # Camera worker, before doing preview work:
+    viewers, interval_sec, quality = slot.demand(ttl_sec=5.0)
+
+    # Cleanup:
+    slot.close()
+    slot.unlink()  # Only in main process
+"""
+
+from __future__ import annotations
+
+import time
+
+import numpy as np
+from multiprocessing import shared_memory
+
+
+PREVIEW_VARIANTS = ("ai", "raw")
+
+_HEADER_DTYPE = np.dtype(
+    [
+        ("seq", "<u8"),
+        ("length", "<u4"),
+        ("width", "<u4"),
+        ("height", "<u4"),
+        ("viewers", "<u4"),
+        ("ts", "<f8"),
+        ("demand_ts", "<f8"),
+        ("demand_interval_ms", "<u4"),
+        ("demand_quality", "<u4"),
+    ]
+)
+
+
+def preview_slot_name(camera_id: str, variant: str) -> str:
+    return f"spv_{camera_id}_{variant}"
+
+
+class SharedPreviewSlot:
+    _HEADER_SIZE = _HEADER_DTYPE.itemsize
+
+    def __init__(self, shm: shared_memory.SharedMemory, camera_id: str, variant: str, is_creator: bool = False):
+        self._shm = shm
+        self.camera_id = camera_id
+        self.variant = variant
+        self._is_creator = is_creator
+        self._header = np.ndarray((1,), dtype=_HEADER_DTYPE, buffer=shm.buf, offset=0)
+        self.capacity = shm.size - self._HEADER_SIZE
+        self._payload = np.ndarray((self.capacity,), dtype=np.uint8, buffer=shm.buf, offset=self._HEADER_SIZE)
+
+    @classmethod
+    def create(cls, camera_id: str, variant: str, capacity: int = 1 << 20) -> SharedPreviewSlot:
+        """Create a NEW slot. Call from main process only."""
+        name = preview_slot_name(camera_id, variant)
+        size = cls._HEADER_SIZE + int(capacity)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a previous run that was killed; readers re-attach by name.
+            stale = shared_memory.SharedMemory(name=name, create=False)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        slot = cls(shm, camera_id, variant, is_creator=True)
+        slot._header[:] = 0
+        return slot
+
+    @classmethod
+    def attach(cls, camera_id: str, variant: str, track: bool = True) -> SharedPreviewSlot:
+        """
+        Attach to an EXISTING slot. Processes that are not children of the owner
+        (the dashboard) pass track=False so their resource tracker does not unlink
+        the segment when they exit.
+        """
+        shm = shared_memory.SharedMemory(name=preview_slot_name(camera_id, variant), create=False)
+        if not track:
+            try:
+                from multiprocessing import resource_tracker
+
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except Exception:
+                pass
+        return cls(shm, camera_id, variant, is_creator=False)
+
+    def spec(self) -> tuple:
+        return (self.camera_id, self.variant)
+
+    @property
+    def name(self) -> str:
+        return preview_slot_name(self.camera_id, self.variant)
+
+    def write(self, data: bytes, width: int = 0, height: int = 0, ts: float = 0.0) -> bool:
+        """Publish one encoded frame. Returns False if it does not fit."""
+        n = len(data)
+        if n > self.capacity:
+            return False
+        hdr = self._header
+        seq = int(hdr[0]["seq"])
+        hdr["seq"] = seq + 1  # odd: write in progress
+        self._payload[:n] = np.frombuffer(data, dtype=np.uint8)
+        hdr["length"] = n
+        hdr["width"] = width
+        hdr["height"] = height
+        hdr["ts"] = ts
+        hdr["seq"] = seq + 2
+        return True
+
+    @property
+    def seq(self) -> int:
+        return int(self._header[0]["seq"])
+
+    def read(self, since_seq: int = -1, retries: int = 3) -> tuple[int, bytes] | None:
+        """(seq, bytes) of the latest frame if newer than since_seq, else None."""
+        hdr = self._header
+        for _ in range(retries):
+            s1 = int(hdr[0]["seq"])
+            if s1 == 0 or s1 == since_seq:
+                return None
+            if s1 & 1:
+                continue
+            n = int(hdr[0]["length"])
+            if n <= 0 or n > self.capacity:
+                return None
+            data = self._payload[:n].tobytes()
+            if int(hdr[0]["seq"]) == s1:
+                return s1, data
+        return None
+
+    def set_demand(self, viewers: int, interval_sec: float = 0.0, jpeg_quality: int = 0, now: float | None = None):
+        """Dashboard side. Call periodically while viewers > 0 (heartbeat), once with 0 on leave."""
+        hdr = self._header
+        hdr["demand_interval_ms"] = max(0, int(interval_sec * 1000))
+        hdr["demand_quality"] = max(0, int(jpeg_quality))
+        hdr["viewers"] = max(0, int(viewers))
+        hdr["demand_ts"] = time.time() if now is None else now
+
+    def demand(self, now: float | None = None, ttl_sec: float = 5.0) -> tuple[int, float, int]:
+        """Worker side: (viewers, interval_sec, jpeg_quality); viewers is 0 if the heartbeat is stale."""
+        h = self._header[0]
+        now = time.time() if now is None else now
+        viewers = int(h["viewers"])
+        if viewers <= 0 or now - float(h["demand_ts"]) > ttl_sec:
+            return 0, 0.0, 0
+        return viewers, int(h["demand_interval_ms"]) / 1000.0, int(h["demand_quality"])
+
+    def info(self) -> dict:
+        h = self._header[0]
+        return {
+            "seq": int(h["seq"]),
+            "bytes": int(h["length"]),
+            "width": int(h["width"]),
+            "height": int(h["height"]),
+            "ts": float(h["ts"]),
+            "viewers": int(h["viewers"]),
+        }
+
+    def close(self):
+        self._header = None
+        self._payload = None
+        try:
+            self._shm.close()
+        except Exception:
+            pass
+
+    def unlink(self):
+        if self._is_creator:
+            try:
+                self._shm.unlink()
+            except Exception:
+                pass
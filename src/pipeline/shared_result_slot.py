@@ -0,0 +1,311 @@
+"""
+SharedResultSlot: fixed-layout inference results per camera in shared memory.
+
+The InferenceServer writes every result for a camera into that camera's slot
+(face count, boxes, scores, match index, similarity + a sequence number).
+Camera workers read overlays straight from the slot and the main loop reads
+metrics from it, so no per-frame result dict is pickled. Only results that
+contain matches are announced on output_queue (see InferenceServer).
+
+Match indexes refer to a SharedLabelTable (spg_id, name) published by the
+InferenceServer whenever it (re)loads the gallery.
+
+Usage:
+    # At startup (main process):
+    slot = SharedResultSlot.create("cam_01")
+    labels = SharedLabelTable.create("outlet_01")
+
+    # In inference server process:
+    slot = SharedResultSlot.attach(*spec)
+    slot.write(frame_id=..., faces=[...], ...)
+
+    # In camera worker / main process:
+    snap = slot.read(since_seq=last_seq)
+    if snap is not None:
+        faces = snap.faces(labels.snapshot())
+
+    # Cleanup:
+    slot.close()
+    slot.unlink()  # Only in main process
+"""
+
+from __future__ import annotations
+
+import numpy as np
+from dataclasses import dataclass
+from multiprocessing import shared_memory, Lock
+
+
+MAX_FACES = 32
+MAX_LABELS = 4096
+
+# match_index value for faces that did not match anyone in the gallery
+NO_MATCH = -1
+
+_HEADER_DTYPE = np.dtype(
+    [
+        ("seq", "<i8"),
+        ("frame_id", "<i8"),
+        ("capture_ts", "<f8"),
+        ("enqueue_ts", "<f8"),
+        ("inference_done_ts", "<f8"),
+        ("capture_to_inference_ms", "<f8"),
+        ("input_queue_wait_ms", "<f8"),
+        ("inference_time_ms", "<f8"),
+        ("face_count", "<i4"),
+        ("labels_version", "<i4"),
+    ]
+)
+
+_FACES_DTYPE = np.dtype(
+    [
+        ("bbox", "<i4", (4,)),
+        ("det_score", "<f4"),
+        ("face_width_px", "<f4"),
+        ("match_index", "<i4"),
+        ("similarity", "<f4"),
+    ]
+)
+
+_LABEL_HEADER_DTYPE = np.dtype([("version", "<i4"), ("count", "<i4")])
+_LABEL_DTYPE = np.dtype([("spg_id", "S32"), ("name", "S64")])
+
+
+@dataclass(frozen=True)
+class ResultSnapshot:
+    """A copy of one camera's latest result taken under the slot lock."""
+    seq: int
+    frame_id: int
+    capture_ts: float
+    enqueue_ts: float
+    inference_done_ts: float
+    capture_to_inference_ms: float
+    input_queue_wait_ms: float
+    inference_time_ms: float
+    labels_version: int
+    faces_array: np.ndarray
+
+    def faces(self, labels: list[tuple[str, str]]) -> list[dict]:
+        """Decode into the legacy face dicts (bbox, matched, spg_id, name, similarity, ...)."""
+        out = []
+        for row in self.faces_array:
+            idx = int(row["match_index"])
+            spg_id = name = None
+            if 0 <= idx < len(labels):
+                spg_id, name = labels[idx]
+            out.append(
+                {
+                    "bbox": [int(v) for v in row["bbox"]],
+                    "det_score": float(row["det_score"]),
+                    "face_width_px": round(float(row["face_width_px"]), 2),
+                    "matched": spg_id is not None,
+                    "spg_id": spg_id,
+                    "name": name,
+                    "similarity": float(row["similarity"]),
+                }
+            )
+        return out
+
+
+class SharedResultSlot:
+    """
+    One camera's latest inference result.
+
+    Memory layout: _HEADER_DTYPE record followed by MAX_FACES _FACES_DTYPE records.
+    """
+
+    _HEADER_SIZE = _HEADER_DTYPE.itemsize
+    _TOTAL_SIZE = _HEADER_DTYPE.itemsize + MAX_FACES * _FACES_DTYPE.itemsize
+
+    def __init__(self, shm: shared_memory.SharedMemory, name: str, lock: Lock, is_creator: bool = False):
+        self._shm = shm
+        self._name = name
+        self._lock = lock
+        self._is_creator = is_creator
+        self._header = np.ndarray((1,), dtype=_HEADER_DTYPE, buffer=shm.buf, offset=0)
+        self._faces = np.ndarray((MAX_FACES,), dtype=_FACES_DTYPE, buffer=shm.buf, offset=self._HEADER_SIZE)
+
+    @classmethod
+    def create(cls, name: str, lock: Lock | None = None) -> SharedResultSlot:
+        """Create a NEW result slot. Call from main process only."""
+        shm = shared_memory.SharedMemory(name=f"srs_{name}", create=True, size=cls._TOTAL_SIZE)
+        slot = cls(shm, name, lock or Lock(), is_creator=True)
+        slot._header[:] = 0
+        slot._faces[:] = 0
+        return slot
+
+    @classmethod
+    def attach(cls, name: str, lock: Lock | None = None) -> SharedResultSlot:
+        """Attach to an EXISTING result slot. Call from child processes."""
+        shm = shared_memory.SharedMemory(name=f"srs_{name}", create=False)
+        return cls(shm, name, lock or Lock(), is_creator=False)
+
+    def spec(self) -> tuple:
+        return (self._name, self._lock)
+
+    def write(
+        self,
+        frame_id: int,
+        capture_ts: float,
+        enqueue_ts: float,
+        inference_done_ts: float,
+        capture_to_inference_ms: float,
+        input_queue_wait_ms: float,
+        inference_time_ms: float,
+        faces: list[tuple[tuple[int, int, int, int], float, float, int, float]],
+        labels_version: int = 0,
+    ) -> int:
+        """
+        Publish a result. faces = [(bbox, det_score, face_width_px, match_index, similarity), ...]
+        Faces beyond MAX_FACES are dropped. Returns the new sequence number.
+        """
+        n = min(len(faces), MAX_FACES)
+        with self._lock:
+            rows = self._faces
+            for i in range(n):
+                bbox, det_score, face_width_px, match_index, similarity = faces[i]
+                rows[i] = (bbox, det_score, face_width_px, match_index, similarity)
+            hdr = self._header[0]
+            seq = int(hdr["seq"]) + 1
+            self._header[0] = (
+                seq,
+                frame_id,
+                capture_ts,
+                enqueue_ts,
+                inference_done_ts,
+                capture_to_inference_ms,
+                input_queue_wait_ms,
+                inference_time_ms,
+                n,
+                labels_version,
+            )
+        return seq
+
+    @property
+    def seq(self) -> int:
+        with self._lock:
+            return int(self._header[0]["seq"])
+
+    def read(self, since_seq: int = -1) -> ResultSnapshot | None:
+        """Copy the latest result out, or None if seq has not advanced past since_seq."""
+        with self._lock:
+            hdr = self._header[0].copy()
+            if int(hdr["seq"]) <= since_seq:
+                return None
+            n = int(hdr["face_count"])
+            faces = self._faces[:n].copy()
+        return ResultSnapshot(
+            seq=int(hdr["seq"]),
+            frame_id=int(hdr["frame_id"]),
+            capture_ts=float(hdr["capture_ts"]),
+            enqueue_ts=float(hdr["enqueue_ts"]),
+            inference_done_ts=float(hdr["inference_done_ts"]),
+            capture_to_inference_ms=float(hdr["capture_to_inference_ms"]),
+            input_queue_wait_ms=float(hdr["input_queue_wait_ms"]),
+            inference_time_ms=float(hdr["inference_time_ms"]),
+            labels_version=int(hdr["labels_version"]),
+            faces_array=faces,
+        )
+
+    def close(self):
+        """Close this process's view. Safe to call multiple times."""
+        self._header = None
+        self._faces = None
+        try:
+            self._shm.close()
+        except Exception:
+            pass
+
+    def unlink(self):
+        """Remove the shared memory. Only call from the creator (main process)."""
+        if self._is_creator:
+            try:
+                self._shm.unlink()
+            except Exception:
+                pass
+
+
+class SharedLabelTable:
+    """
+    Gallery label table (index -> (spg_id, name)) shared by all result slots.
+
+    Memory layout: _LABEL_HEADER_DTYPE (version, count) followed by MAX_LABELS _LABEL_DTYPE records.
+    spg_id / name are stored UTF-8 encoded and truncated to 32 / 64 bytes.
+    """
+
+    _TOTAL_SIZE = _LABEL_HEADER_DTYPE.itemsize + MAX_LABELS * _LABEL_DTYPE.itemsize
+
+    def __init__(self, shm: shared_memory.SharedMemory, name: str, lock: Lock, is_creator: bool = False):
+        self._shm = shm
+        self._name = name
+        self._lock = lock
+        self._is_creator = is_creator
+        self._header = np.ndarray((1,), dtype=_LABEL_HEADER_DTYPE, buffer=shm.buf, offset=0)
+        self._rows = np.ndarray(
+            (MAX_LABELS,), dtype=_LABEL_DTYPE, buffer=shm.buf, offset=_LABEL_HEADER_DTYPE.itemsize
+        )
+        self._cached_version = -1
+        self._cached: list[tuple[str, str]] = []
+
+    @classmethod
+    def create(cls, name: str, lock: Lock | None = None) -> SharedLabelTable:
+        shm = shared_memory.SharedMemory(name=f"slt_{name}", create=True, size=cls._TOTAL_SIZE)
+        table = cls(shm, name, lock or Lock(), is_creator=True)
+        table._header[:] = 0
+        return table
+
+    @classmethod
+    def attach(cls, name: str, lock: Lock | None = None) -> SharedLabelTable:
+        shm = shared_memory.SharedMemory(name=f"slt_{name}", create=False)
+        return cls(shm, name, lock or Lock(), is_creator=False)
+
+    def spec(self) -> tuple:
+        return (self._name, self._lock)
+
+    def publish(self, labels: list[tuple[str, str]]) -> int:
+        """Replace the table. Labels beyond MAX_LABELS are dropped. Returns the new version."""
+        n = min(len(labels), MAX_LABELS)
+        with self._lock:
+            for i in range(n):
+                spg_id, name = labels[i]
+                self._rows[i] = (
+                    str(spg_id).encode("utf-8")[:32],
+                    str(name or spg_id).encode("utf-8")[:64],
+                )
+            version = int(self._header[0]["version"]) + 1
+            self._header[0] = (version, n)
+        return version
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            return int(self._header[0]["version"])
+
+    def snapshot(self) -> list[tuple[str, str]]:
+        """Decoded labels, cached per version."""
+        with self._lock:
+            version = int(self._header[0]["version"])
+            if version == self._cached_version:
+                return self._cached
+            n = int(self._header[0]["count"])
+            rows = self._rows[:n].copy()
+        self._cached = [
+            (r["spg_id"].decode("utf-8", "replace"), r["name"].decode("utf-8", "replace")) for r in rows
+        ]
+        self._cached_version = version
+        return self._cached
+
+    def close(self):
+        self._header = None
+        self._rows = None
+        try:
+            self._shm.close()
+        except Exception:
+            pass
+
+    def unlink(self):
+        if self._is_creator:
+            try:
+                self._shm.unlink()
+            except Exception:
+                pass
@@ -0,0 +1,166 @@
+"""
+SharedStateSegment: versioned shared-memory copy of a JSON document
+(outlet_state / camera_health) published by the coordinator.
+
+The coordinator used to rewrite outlet_state.json and camera_health.json on every
+publish tick, and the dashboard re-read and re-parsed them on every request;
+on Windows the files could also be caught mid-write or locked. Now the
+coordinator serializes each document once per tick into its segment, and the
+dashboard checks a version number and parses only when it changed. The JSON
+files remain as a low-rate export for external tools.
+
+Same seqlock scheme as SharedPreviewSlot (one writer, readers in an unrelated
+process): `version` is odd while the payload is being copied.
+
+Memory layout:
+    header (_HEADER_DTYPE): version, length, overflow, ts
+    payload: `capacity` bytes of compact UTF-8 JSON
+
+A document larger than the capacity is not published; `overflow` is set so
+readers fall back to the JSON file (which the coordinator then keeps writing).
+
+Segment names derive from the runtime data dir, so the pipeline and the
+dashboard find each other through the same config and several outlets on one
+host do not collide.
+
+Usage:
+    # Coordinator (owner):
+    seg = SharedStateSegment.create(base_data_dir, "state", capacity=1 << 20)
+    seg.publish(json.dumps(state, separators=(",", ":")).encode("utf-8"), ts=time.time())
+
+    # Dashboard:
+    seg = SharedStateSegment.attach(data_dir, "state", track=False)
+    got = seg.read(since_version=last_version)   # (version, bytes, ts) or None
+
+    # Cleanup:
+    seg.close()
+    seg.unlink()  # Only in coordinator
+"""
+
+from __future__ import annotations
+
+import os
+import zlib
+
+import numpy as np
+from multiprocessing import shared_memory
+
+
+STATE_DOCUMENTS = ("state", "health")
+
+_HEADER_DTYPE = np.dtype(
+    [
+        ("version", "<u8"),
+        ("length", "<u4"),
+        ("overflow", "<u4"),
+        ("ts", "<f8"),
+    ]
+)
+
+
+def state_segment_name(data_dir: str, doc: str) -> str:
+    key = zlib.crc32(os.path.abspath(data_dir).encode("utf-8"))
+    return f"sst_{key:08x}_{doc}"
+
+
+class SharedStateSegment:
+    _HEADER_SIZE = _HEADER_DTYPE.itemsize
+
+    def __init__(self, shm: shared_memory.SharedMemory, name: str, is_creator: bool = False):
+        self._shm = shm
+        self._name = name
+        self._is_creator = is_creator
+        self._header = np.ndarray((1,), dtype=_HEADER_DTYPE, buffer=shm.buf, offset=0)
+        self.capacity = shm.size - self._HEADER_SIZE
+        self._payload = np.ndarray((self.capacity,), dtype=np.uint8, buffer=shm.buf, offset=self._HEADER_SIZE)
+
+    @classmethod
+    def create(cls, data_dir: str, doc: str, capacity: int = 1 << 20) -> SharedStateSegment:
+        """Create a NEW segment. Call from the coordinator only."""
+        name = state_segment_name(data_dir, doc)
+        size = cls._HEADER_SIZE + int(capacity)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a previous run that was killed; readers re-attach by name.
+            stale = shared_memory.SharedMemory(name=name, create=False)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        seg = cls(shm, name, is_creator=True)
+        seg._header[:] = 0
+        return seg
+
+    @classmethod
+    def attach(cls, data_dir: str, doc: str, track: bool = True) -> SharedStateSegment:
+        """Attach to an EXISTING segment; the dashboard passes track=False (see SharedPreviewSlot.attach)."""
+        name = state_segment_name(data_dir, doc)
+        shm = shared_memory.SharedMemory(name=name, create=False)
+        if not track:
+            try:
+                from multiprocessing import resource_tracker
+
+                resource_tracker.unregister(shm._name, "shared_memory")
+            except Exception:
+                pass
+        return cls(shm, name, is_creator=False)
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def version(self) -> int:
+        return int(self._header[0]["version"])
+
+    def publish(self, data: bytes, ts: float = 0.0) -> bool:
+        """Copy one serialized document in. Returns False (and flags overflow) if it does not fit."""
+        hdr = self._header
+        version = int(hdr[0]["version"])
+        n = len(data)
+        hdr["version"] = version + 1  # odd: write in progress
+        if n > self.capacity:
+            hdr["overflow"] = 1
+            hdr["length"] = 0
+        else:
+            self._payload[:n] = np.frombuffer(data, dtype=np.uint8)
+            hdr["overflow"] = 0
+            hdr["length"] = n
+        hdr["ts"] = ts
+        hdr["version"] = version + 2
+        return n <= self.capacity
+
+    def read(self, since_version: int = -1, retries: int = 3) -> tuple[int, bytes | None, float] | None:
+        """
+        (version, bytes, ts) if the version differs from since_version, else None.
+        bytes is None when the document overflowed the segment.
+        """
+        hdr = self._header
+        for _ in range(retries):
+            v1 = int(hdr[0]["version"])
+            if v1 == 0 or v1 == since_version:
+                return None
+            if v1 & 1:
+                continue
+            n = int(hdr[0]["length"])
+            overflow = bool(hdr[0]["overflow"])
+            ts = float(hdr[0]["ts"])
+            data = None if overflow or n > self.capacity else self._payload[:n].tobytes()
+            if int(hdr[0]["version"]) == v1:
+                return v1, data, ts
+        return None
+
+    def close(self):
+        self._header = None
+        self._payload = None
+        try:
+            self._shm.close()
+        except Exception:
+            pass
+
+    def unlink(self):
+        if self._is_creator:
+            try:
+                self._shm.unlink()
+            except Exception:
+                pass
@@ -0,0 +1,171 @@
+"""
+StatePublisher: change-driven, rate-limited publication of one coordinator document
+(outlet_state / camera_health).
+
+The coordinator builds the documents every publish tick, but most ticks nothing a
+reader cares about changed. For each call the publisher:
+
+- fingerprints the payload without its volatile keys (timestamps, ages that grow
+  every second, its own metrics) and skips the write when the fingerprint matches,
+- publishes a changed document at most every `min_interval_sec`,
+- republishes an unchanged one after `max_staleness_sec` (heartbeat: the dashboard
+  derives LIVE/OFFLINE and ages from the publish time),
+- serializes once, as compact JSON, and uses those bytes both for the shared
+  memory segment and for the JSON file,
+- exports the JSON file only every `export_interval_sec` when a segment is in use
+  (every publish otherwise),
+- keeps write metrics (`stats()`), reported under `state_publisher` in health.
+
+Usage:
+    pub = StatePublisher("health", health_path, segment=seg, volatile_keys={"timestamp"})
+    pub.publish(payload)    # True if written
+    pub.stats()
+"""
+
+from __future__ import annotations
+
+import json
+import time
+import zlib
+
+from src.settings.logger import logger
+
+
+def _strip(value, volatile_keys: frozenset):
+    if isinstance(value, dict):
+        return {k: _strip(v, volatile_keys) for k, v in value.items() if k not in volatile_keys}
+    if isinstance(value, list):
+        return [_strip(v, volatile_keys) for v in value]
+    return value
+
+
+def write_bytes_retry(filepath: str, payload: bytes, retries: int = 3, retry_sleep_sec: float = 0.05) -> bool:
+    """Direct write with retry on transient locks (Windows: reader has the file open)."""
+    for attempt in range(retries):
+        try:
+            with open(filepath, "wb") as f:
+                f.write(payload)
+            return True
+        except PermissionError:
+            if attempt < retries - 1:
+                time.sleep(retry_sleep_sec)
+        except OSError as e:
+            logger.warning(f"[StatePublisher] Failed writing {filepath}: {e}")
+            return False
+    return False
+
+
+def _ema(prev: float, value: float) -> float:
+    return value if prev <= 0 else (0.2 * value + 0.8 * prev)
+
+
+class StatePublisher:
+    def __init__(
+        self,
+        doc: str,
+        path: str,
+        segment=None,
+        min_interval_sec: float = 0.25,
+        max_staleness_sec: float = 5.0,
+        export_interval_sec: float = 5.0,
+        volatile_keys: set[str] | None = None,
+    ):
+        self.doc = doc
+        self.path = path
+        self.segment = segment
+        self.min_interval_sec = max(0.0, float(min_interval_sec))
+        self.max_staleness_sec = max(self.min_interval_sec, float(max_staleness_sec))
+        self.export_interval_sec = max(0.0, float(export_interval_sec))
+        self.volatile_keys = frozenset(volatile_keys or ())
+
+        self._fingerprint: int | None = None
+        self._exported_fingerprint: int | None = None
+        self._last_publish = float("-inf")
+        self._last_export = float("-inf")
+        self._overflow_warned = False
+
+        self.publishes = 0
+        self.heartbeats = 0
+        self.skipped_unchanged = 0
+        self.skipped_rate_limited = 0
+        self.exports = 0
+        self.last_bytes = 0
+        self.serialize_ms = 0.0
+        self.write_ms = 0.0
+        self.export_ms = 0.0
+
+    def fingerprint(self, payload: dict) -> int:
+        stripped = _strip(payload, self.volatile_keys)
+        return zlib.crc32(json.dumps(stripped, separators=(",", ":"), default=str).encode("utf-8"))
+
+    def publish(self, payload: dict, now: float | None = None) -> bool:
+        now = time.monotonic() if now is None else now
+        since = now - self._last_publish
+        try:
+            fp = self.fingerprint(payload)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"[StatePublisher] Failed fingerprinting {self.doc}: {e}")
+            return False
+
+        changed = fp != self._fingerprint
+        if not changed and since < self.max_staleness_sec:
+            self.skipped_unchanged += 1
+            return False
+        if changed and since < self.min_interval_sec:
+            self.skipped_rate_limited += 1
+            return False
+
+        t0 = time.perf_counter()
+        try:
+            data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False, default=str).encode("utf-8")
+        except (TypeError, ValueError) as e:
+            logger.warning(f"[StatePublisher] Failed serializing {self.doc}: {e}")
+            return False
+        t1 = time.perf_counter()
+        self.serialize_ms = _ema(self.serialize_ms, (t1 - t0) * 1000.0)
+
+        in_shm = False
+        if self.segment is not None:
+            in_shm = self.segment.publish(data, ts=time.time())
+            if not in_shm and not self._overflow_warned:
+                self._overflow_warned = True
+                logger.warning(
+                    f"[SharedMem] {self.doc} document ({len(data)} B) exceeds segment capacity "
+                    f"({self.segment.capacity} B); dashboard falls back to the JSON file"
+                )
+        self.write_ms = _ema(self.write_ms, (time.perf_counter() - t1) * 1000.0)
+
+        self._fingerprint = fp
+        self._last_publish = now
+        self.last_bytes = len(data)
+        self.publishes += 1
+        if not changed:
+            self.heartbeats += 1
+
+        if in_shm:
+            # Low-rate export for external tools: only when it has news, or as a heartbeat.
+            since_export = now - self._last_export
+            if self.export_interval_sec <= 0 or since_export < self.export_interval_sec:
+                return True
+            if fp == self._exported_fingerprint and since_export < max(self.export_interval_sec, self.max_staleness_sec):
+                return True
+        t2 = time.perf_counter()
+        if write_bytes_retry(self.path, data):
+            self._last_export = now
+            self._exported_fingerprint = fp
+            self.exports += 1
+            self.export_ms = _ema(self.export_ms, (time.perf_counter() - t2) * 1000.0)
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "publishes": self.publishes,
+            "heartbeats": self.heartbeats,
+            "skipped_unchanged": self.skipped_unchanged,
+            "skipped_rate_limited": self.skipped_rate_limited,
+            "exports": self.exports,
+            "last_bytes": self.last_bytes,
+            "serialize_ms": round(self.serialize_ms, 3),
+            "shm_write_ms": round(self.write_ms, 3),
+            "export_ms": round(self.export_ms, 3),
+        }
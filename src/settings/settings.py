@@ -1,6 +1,7 @@
 import os
 import yaml
 from pathlib import Path
+from typing import Literal
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 
@@ -40,6 +41,25 @@ class StorageConfig(BaseModel):
     snapshot_retention_days: int
     sim_output_subdir: str = "sim_output"
     gallery_subdir: str = "gallery"
+    # Buffered event writer (run_outlet)
+    event_flush_interval_sec: float = 1.0
+    event_flush_max_bytes: int = 65536
+    event_queue_max_size: int = 10000
+    event_durability: Literal["none", "flush", "fsync"] = "flush"  # applied to alert events
+    event_rotate: Literal["none", "daily", "size"] = "daily"
+    event_rotate_max_bytes: int = 64 * 1024 * 1024
+    event_compress_segments: bool = True
+    event_index_span_bytes: int = 65536
+    # Optional indexed copy of the event timeline (dashboard queries)
+    sqlite_enabled: bool = False
+    sqlite_filename: str = "events.db"  # inside <data_dir>/<sim_output_subdir>
+    # SPG_SEEN compaction into presence intervals (run_outlet)
+    raw_seen_events: bool = False  # also persist every per-frame SPG_SEEN
+    presence_interval_gap_sec: float = 10.0
+    presence_checkpoint_sec: float = 60.0
+    # Per-SPG per-day presence pre-aggregates (/api/analytics/presence)
+    presence_analytics_enabled: bool = True
+    presence_analytics_filename: str = "presence.db"  # inside <data_dir>/<sim_output_subdir>
 
 
 # single-camera
@@ -54,6 +74,9 @@ class CameraEntry(BaseModel):
     id: str
     rtsp_url: str
     roi: tuple[float, float, float, float] | None = None
+    # Per-camera inference resolution cap (defaults to inference.max_frame_*)
+    max_frame_height: int | None = None
+    max_frame_width: int | None = None
 
 
 class OutletConfig(BaseModel):
@@ -66,8 +89,9 @@ class OutletConfig(BaseModel):
 class InferenceConfig(BaseModel):
     """Settings for the centralized Inference Server."""
     frame_skip: int = 0  # Skip N frames between inferences (0 = process every frame)
-    max_frame_height: int = 720  # Max frame height for shared memory buffer
-    max_frame_width: int = 1280  # Max frame width for shared memory buffer
+    max_frame_height: int = 720  # Default max inference frame height (per-camera override in outlet.cameras)
+    max_frame_width: int = 1280  # Default max inference frame width (per-camera override in outlet.cameras)
+    frame_ring_slots: int = 1  # Shared memory slots per camera (>1 = ring for look-back/batching)
 
 
 class DevConfig(BaseModel):
@@ -83,12 +107,42 @@ class NotificationConfig(BaseModel):
     max_retries: int = 3
     retry_backoff_base_sec: int = 2
     retry_after_default_sec: int = 5
+    api_base_url: str = "https://api.telegram.org"
+    # Background dispatcher (run_outlet)
+    outbox_max_size: int = 200
+    dispatcher_max_attempts: int = 5
+    retry_backoff_max_sec: float = 300.0
+    rate_limit_min_interval_sec: float = 1.0
+    rate_limit_per_minute: int = 20
+    # Absence alert coalescing (one digest per burst)
+    alert_coalesce_window_sec: float = 5.0
+    alert_digest_max_items: int = 30
+    # In-memory evidence frames for alert photos (sampled from shared memory)
+    evidence_frames_per_camera: int = 5
+    evidence_interval_sec: float = 2.0
+    evidence_max_width: int = 0  # 0 = full capture resolution
+    evidence_jpeg_quality: int = 85
 
 
 class RuntimeConfig(BaseModel):
     # Loop intervals
     worker_idle_sleep_sec: float = 0.05
-    main_loop_sleep_sec: float = 0.05
+    main_loop_sleep_sec: float = 0.05  # Legacy: main loop now blocks on results/timers
+    # Main loop timer cadences (results are handled as soon as they arrive)
+    supervisor_interval_sec: float = 0.5
+    aggregator_tick_interval_sec: float = 0.5
+    state_publish_interval_sec: float = 0.25
+    # "shm": outlet_state/camera_health published to versioned shm segments each tick,
+    # JSON files exported every state_export_interval_sec (0 = only when shm is unavailable)
+    state_transport: Literal["shm", "file"] = "shm"
+    state_export_interval_sec: float = 5.0
+    # Change-driven publication: changed documents at most every min interval,
+    # unchanged ones republished after max staleness (keep < dashboard.live_window_seconds)
+    state_min_publish_interval_sec: float = 0.25
+    state_max_staleness_sec: float = 5.0
+    state_shm_capacity_bytes: int = 1048576
+    # RTSP connect (runs in a background thread inside the worker)
+    rtsp_open_timeout_sec: float = 10.0
     # Supervisor (self-healing)
     supervisor_restart_cooldown_sec: float = 5.0
     supervisor_max_restarts_per_minute: int = 12
@@ -104,6 +158,14 @@ class RuntimeConfig(BaseModel):
     preview_frame_save_interval_sec: float = 0.2
     preview_frame_width: int = 640
     preview_jpeg_quality: int = 80
+    # "shm": workers publish preview JPEGs to shared-memory slots the dashboard reads directly;
+    # files are then only written every preview_disk_interval_sec (0 = never).
+    preview_transport: Literal["shm", "file"] = "shm"
+    preview_disk_interval_sec: float = 5.0
+    preview_shm_capacity_bytes: int = 1048576
+    # shm transport: only resize/overlay/encode previews while the dashboard has viewers
+    preview_on_demand: bool = True
+    preview_demand_ttl_sec: float = 5.0
 
 
 class DashboardConfig(BaseModel):
@@ -115,6 +177,18 @@ class DashboardConfig(BaseModel):
     stream_frame_interval_sec: float = 0.2
     stream_error_sleep_sec: float = 0.5
     stream_missing_frame_sleep_sec: float = 1.0
+    stream_jpeg_quality: int = 0  # requested from workers; 0 = runtime.preview_jpeg_quality
+    # /api/stream (SSE) and /api/ws push
+    stream_watch_interval_sec: float = 0.5
+    stream_client_queue_size: int = 16
+    stream_keepalive_sec: float = 15.0
+    # /api/state, /api/health, /api/events, /api/cameras, /api/gallery build cache (shared by concurrent requests)
+    api_cache_ttl_sec: float = 0.5
+    # Manage page: gallery thumbnails (<gallery_dir>/.thumbs, LRU by size) and listing page size
+    gallery_thumb_sizes: list[int] = Field(default_factory=lambda: [80, 160])
+    gallery_thumb_cache_mb: int = 64
+    gallery_thumb_jpeg_quality: int = 80
+    gallery_page_size: int = 50
 
 
 class AppConfig(BaseModel):
@@ -0,0 +1,406 @@
+"""
+Event log segments: rotation naming, gzip segments and the ts -> byte-offset sidecar index.
+
+Layout per camera directory:
+    events.jsonl                         active log (appended by EventWriter)
+    events.idx                           index of the active log
+    events.20260101-000012.jsonl.gz      rotated segment (compressed)
+    events.20260101-000012.idx           index of that segment
+
+An index is a text file with one span per line:
+    <start_offset> <end_offset> <min_ts> <max_ts>
+Offsets are byte offsets in the *uncompressed* log. Spans are contiguous and cover
+whole lines; bytes after the last span (the active tail) are simply not indexed yet.
+Because each span records min/max ts, lines do not need to be strictly ts-ordered.
+
+Readers only touch the spans they need:
+    read_range(cam_dir, start_ts, end_ts)  -> events in [start_ts, end_ts]
+    read_recent(cam_dir, limit)            -> last `limit` events (newest segments first)
+    RecentEventReader().recent(...)        -> same, cached per file by (size, mtime)
+
+CLI (rebuild indexes, optionally compress rotated segments):
+    python -m src.app reindex-events --config configs/app.dev.yaml [--compress]
+"""
+
+from __future__ import annotations
+
+import glob
+import gzip
+import heapq
+import itertools
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Iterator
+
+from src.settings.logger import logger
+
+
+ACTIVE_LOG = "events.jsonl"
+ACTIVE_INDEX = "events.idx"
+DEFAULT_SPAN_BYTES = 64 * 1024
+# events.<stamp>.jsonl[.gz], or events.<stamp>-<n>.jsonl[.gz] for a same-second collision
+_SEGMENT_RE = re.compile(r"^events\.(\d{8}-\d{6})(?:-(\d+))?\.jsonl(?:\.gz)?$")
+TAIL_BLOCK_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class IndexSpan:
+    start: int
+    end: int
+    min_ts: float
+    max_ts: float
+
+    def to_line(self) -> str:
+        return f"{self.start} {self.end} {self.min_ts:.3f} {self.max_ts:.3f}\n"
+
+
+def index_path_for(log_path: str) -> str:
+    """events.jsonl -> events.idx, events.<stamp>.jsonl[.gz] -> events.<stamp>.idx"""
+    base = log_path[:-3] if log_path.endswith(".gz") else log_path
+    if base.endswith(".jsonl"):
+        base = base[: -len(".jsonl")]
+    return base + ".idx"
+
+
+def _segment_key(path: str) -> tuple[str, int, str]:
+    name = os.path.basename(path)
+    m = _SEGMENT_RE.match(name)
+    if m is None:
+        return (name, 0, name)
+    # Parsed, not lexical: "-1" would otherwise sort before "." and land ahead of the base segment.
+    return (m.group(1), int(m.group(2) or 0), name)
+
+
+def segment_paths(cam_dir: str) -> list[str]:
+    """Rotated segments, oldest first, each once."""
+    by_stem: dict[str, str] = {}
+    for path in glob.glob(os.path.join(cam_dir, "events.*.jsonl")) + glob.glob(os.path.join(cam_dir, "events.*.jsonl.gz")):
+        stem = path[:-3] if path.endswith(".gz") else path
+        # compress_segment briefly leaves both files; the .gz is complete once it is visible.
+        if stem not in by_stem or path.endswith(".gz"):
+            by_stem[stem] = path
+    return sorted(by_stem.values(), key=_segment_key)
+
+
+def log_paths(cam_dir: str) -> list[str]:
+    """All logs of a camera, oldest first; the active log (if any) is last."""
+    paths = segment_paths(cam_dir)
+    active = os.path.join(cam_dir, ACTIVE_LOG)
+    if os.path.exists(active):
+        paths.append(active)
+    return paths
+
+
+def rotated_path(cam_dir: str, first_ts: float) -> str:
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(first_ts))
+    candidate = os.path.join(cam_dir, f"events.{stamp}.jsonl")
+    n = 1
+    while os.path.exists(candidate) or os.path.exists(candidate + ".gz"):
+        candidate = os.path.join(cam_dir, f"events.{stamp}-{n}.jsonl")
+        n += 1
+    return candidate
+
+
+def open_log(path: str):
+    """Binary reader for a plain or gzip segment (gzip supports forward seek)."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def read_index(idx_path: str) -> list[IndexSpan]:
+    spans: list[IndexSpan] = []
+    try:
+        with open(idx_path, "r", encoding="ascii") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) != 4:
+                    continue
+                try:
+                    spans.append(IndexSpan(int(parts[0]), int(parts[1]), float(parts[2]), float(parts[3])))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return spans
+
+
+def line_ts(line: bytes) -> float | None:
+    try:
+        return float(json.loads(line)["ts"])
+    except Exception:
+        return None
+
+
+def scan_spans(log_path: str, start_offset: int = 0, span_bytes: int = DEFAULT_SPAN_BYTES) -> list[IndexSpan]:
+    """Index complete lines from start_offset to EOF (a trailing partial line is left out)."""
+    spans: list[IndexSpan] = []
+    span_start = offset = start_offset
+    min_ts = max_ts = None
+    with open_log(log_path) as f:
+        if start_offset:
+            f.seek(start_offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            ts = line_ts(line)
+            if ts is not None:
+                min_ts = ts if min_ts is None else min(min_ts, ts)
+                max_ts = ts if max_ts is None else max(max_ts, ts)
+            if offset - span_start >= span_bytes:
+                spans.append(IndexSpan(span_start, offset, min_ts or 0.0, max_ts or 0.0))
+                span_start = offset
+                min_ts = max_ts = None
+    if offset > span_start:
+        spans.append(IndexSpan(span_start, offset, min_ts or 0.0, max_ts or 0.0))
+    return spans
+
+
+def rebuild_index(log_path: str, span_bytes: int = DEFAULT_SPAN_BYTES) -> int:
+    """Rewrite the sidecar index of one log from scratch. Returns the number of spans."""
+    spans = scan_spans(log_path, 0, span_bytes)
+    idx_path = index_path_for(log_path)
+    tmp_path = idx_path + ".tmp"
+    with open(tmp_path, "w", encoding="ascii") as f:
+        f.writelines(s.to_line() for s in spans)
+    os.replace(tmp_path, idx_path)
+    return len(spans)
+
+
+def compress_segment(path: str) -> str:
+    """gzip a rotated segment in place (offsets in its index stay valid). Returns the new path."""
+    if path.endswith(".gz"):
+        return path
+    gz_path = path + ".gz"
+    tmp_path = gz_path + ".tmp"
+    with open(path, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 1024)
+    os.replace(tmp_path, gz_path)
+    os.remove(path)
+    return gz_path
+
+
+def _indexed_end(spans: list[IndexSpan]) -> int:
+    return spans[-1].end if spans else 0
+
+
+def _parse_block(data: bytes) -> list[dict]:
+    out = []
+    for raw in data.split(b"\n"):
+        if not raw.strip():
+            continue
+        try:
+            out.append(json.loads(raw))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+    return out
+
+
+def _read_block(f, start: int, end: int | None) -> bytes:
+    f.seek(start)
+    data = f.read() if end is None else f.read(end - start)
+    if end is None:
+        # Active tail: drop a partially written last line.
+        cut = data.rfind(b"\n")
+        data = data[: cut + 1] if cut >= 0 else b""
+    return data
+
+
+def read_range(cam_dir: str, start_ts: float, end_ts: float) -> Iterator[dict]:
+    """Events with start_ts <= ts <= end_ts, segment by segment (not globally sorted)."""
+    active = os.path.join(cam_dir, ACTIVE_LOG)
+    for path in log_paths(cam_dir):
+        spans = read_index(index_path_for(path))
+        is_active = path == active
+        if spans and not is_active:
+            # Rotated segments are fully indexed: skip them without opening (no gzip decompression).
+            if max(sp.max_ts for sp in spans) < start_ts or min(sp.min_ts for sp in spans) > end_ts:
+                continue
+        blocks = [(s.start, s.end) for s in spans if s.max_ts >= start_ts and s.min_ts <= end_ts]
+        if is_active or not spans:
+            # Unindexed bytes: the active tail, or a segment whose index is missing.
+            blocks.append((_indexed_end(spans), None))
+        if not blocks:
+            continue
+        try:
+            with open_log(path) as f:
+                for start, end in blocks:
+                    for ev in _parse_block(_read_block(f, start, end)):
+                        ts = ev.get("ts", 0)
+                        if start_ts <= ts <= end_ts:
+                            yield ev
+        except OSError as e:
+            logger.warning(f"[EventLog] Failed reading {path}: {e}")
+
+
+def tail_lines(f, size: int, limit: int, block_size: int = TAIL_BLOCK_BYTES) -> tuple[list[bytes], int]:
+    """
+    Last `limit` complete lines of a plain file, seeking backward from EOF in blocks.
+    Returns (lines oldest first, byte offset just past the last complete line).
+    """
+    pos = size
+    buf = b""
+    end = None
+    while pos > 0:
+        step = min(block_size, pos)
+        pos -= step
+        f.seek(pos)
+        buf = f.read(step) + buf
+        if end is None:
+            cut = buf.rfind(b"\n")
+            if cut < 0:
+                continue
+            end = pos + cut + 1
+        if buf.count(b"\n") > limit:
+            break
+    if end is None:
+        return [], 0
+    body = buf[: end - pos]
+    lines = body.split(b"\n")[:-1]
+    if pos > 0:
+        lines = lines[1:]  # first piece may be a partial line
+    return lines[-limit:] if limit > 0 else lines, end
+
+
+def read_file_recent(path: str, limit: int) -> tuple[list[dict], int]:
+    """
+    Last `limit` events of one log, oldest first, plus the offset parsing stopped at.
+    Plain logs are tail-seeked (no index needed); gzip segments go through their index spans.
+    """
+    if not path.endswith(".gz"):
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            lines, end = tail_lines(f, size, limit)
+        return _parse_block(b"\n".join(lines)), end
+
+    spans = read_index(index_path_for(path))
+    collected: list[dict] = []
+    with open_log(path) as f:
+        blocks = [(_indexed_end(spans), None)] + [(s.start, s.end) for s in reversed(spans)]
+        for start, end in blocks:
+            collected = _parse_block(_read_block(f, start, end)) + collected
+            if len(collected) >= limit:
+                break
+    return collected[-limit:] if limit > 0 else collected, _indexed_end(spans)
+
+
+def read_recent(cam_dir: str, limit: int) -> list[dict]:
+    """Last `limit` events of a camera, oldest first, newest log first."""
+    collected: list[dict] = []
+    for path in reversed(log_paths(cam_dir)):
+        try:
+            events, _ = read_file_recent(path, limit - len(collected))
+        except OSError as e:
+            logger.warning(f"[EventLog] Failed reading {path}: {e}")
+            continue
+        collected = events + collected
+        if len(collected) >= limit:
+            break
+    collected.sort(key=lambda ev: ev.get("ts", 0))
+    return collected[-limit:] if limit > 0 else collected
+
+
+class _FileTail:
+    __slots__ = ("size", "mtime_ns", "ino", "offset", "capacity", "events")
+
+    def __init__(self, size: int, mtime_ns: int, ino: int, offset: int, capacity: int, events: list[dict]):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.ino = ino
+        self.offset = offset
+        self.capacity = capacity
+        self.events: deque[dict] = deque(events, maxlen=capacity)
+
+
+class RecentEventReader:
+    """
+    Cached "last N events" across cameras for the dashboard.
+
+    Per log file the parsed tail is cached under (size, mtime, inode). An unchanged file
+    costs one stat(); a grown file only has its newly appended bytes parsed; a replaced
+    (rotated) file is tail-seeked again. Cameras are merged newest-first with a heap,
+    so a request costs O(limit) regardless of how old the logs are.
+    """
+
+    def __init__(self):
+        self._files: dict[str, _FileTail] = {}
+        self._lock = threading.Lock()
+
+    def recent(self, cam_dirs: dict[str, str], limit: int) -> list[dict]:
+        """cam_dirs: camera id -> directory. Returns events newest first, each tagged with `_camera`."""
+        per_camera = []
+        live_paths: set[str] = set()
+        with self._lock:
+            for cam_id, cam_dir in cam_dirs.items():
+                events = self._camera_recent(cam_id, cam_dir, limit, live_paths)
+                if events:
+                    per_camera.append(events)
+            for path in list(self._files.keys()):
+                if path not in live_paths:
+                    del self._files[path]
+        merged = heapq.merge(*per_camera, key=lambda ev: ev.get("ts", 0), reverse=True)
+        return list(itertools.islice(merged, limit))
+
+    def _camera_recent(self, cam_id: str, cam_dir: str, limit: int, live_paths: set[str]) -> list[dict]:
+        collected: list[dict] = []
+        for path in reversed(log_paths(cam_dir)):
+            live_paths.add(path)
+            try:
+                events = self._file_recent(path, cam_id, limit)
+            except OSError:
+                continue
+            collected = events + collected
+            if len(collected) >= limit:
+                break
+        collected.sort(key=lambda ev: ev.get("ts", 0), reverse=True)
+        return collected[:limit]
+
+    def _file_recent(self, path: str, cam_id: str, limit: int) -> list[dict]:
+        st = os.stat(path)
+        cached = self._files.get(path)
+        if cached is not None and cached.capacity >= limit and cached.ino == st.st_ino:
+            if cached.size == st.st_size and cached.mtime_ns == st.st_mtime_ns:
+                return list(cached.events)[-limit:]
+            if st.st_size > cached.offset and not path.endswith(".gz"):
+                self._parse_appended(path, cam_id, cached, st)
+                return list(cached.events)[-limit:]
+
+        events, offset = read_file_recent(path, limit)
+        for ev in events:
+            ev["_camera"] = cam_id
+        self._files[path] = _FileTail(st.st_size, st.st_mtime_ns, st.st_ino, offset, limit, events)
+        return events
+
+    @staticmethod
+    def _parse_appended(path: str, cam_id: str, cached: _FileTail, st: os.stat_result) -> None:
+        with open(path, "rb") as f:
+            f.seek(cached.offset)
+            data = f.read(st.st_size - cached.offset)
+        cut = data.rfind(b"\n")
+        if cut >= 0:
+            for ev in _parse_block(data[: cut + 1]):
+                ev["_camera"] = cam_id
+                cached.events.append(ev)
+            cached.offset += cut + 1
+        cached.size = st.st_size
+        cached.mtime_ns = st.st_mtime_ns
+
+
+def reindex_camera_dir(cam_dir: str, span_bytes: int = DEFAULT_SPAN_BYTES, compress: bool = False) -> dict:
+    """Rebuild every index in a camera directory; optionally gzip uncompressed rotated segments."""
+    result = {"logs": 0, "spans": 0, "compressed": 0}
+    for path in log_paths(cam_dir):
+        is_active = os.path.basename(path) == ACTIVE_LOG
+        result["spans"] += rebuild_index(path, span_bytes)
+        result["logs"] += 1
+        if compress and not is_active and not path.endswith(".gz"):
+            compress_segment(path)
+            result["compressed"] += 1
+    return result
@@ -2,14 +2,20 @@ import json
 
 from pathlib import Path
 from src.domain.events import Event
+from src.storage.event_writer import EventWriter
 
 class EventStore:
-    def __init__(self, data_dir: str):
+    def __init__(self, data_dir: str, writer: EventWriter | None = None):
         self.root = Path(data_dir)
         self.root.mkdir(parents=True, exist_ok=True)
         self.path = self.root / "events.jsonl"
+        # Optional shared background writer; without it append() writes synchronously.
+        self.writer = writer
 
     def append(self, event: Event) -> None:
+        if self.writer is not None:
+            self.writer.submit(str(self.path), event)
+            return
         with open(self.path, "a", encoding="utf-8") as f:
             f.write(json.dumps(event.model_dump(), ensure_ascii=False) + "\n")
 
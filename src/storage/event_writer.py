@@ -0,0 +1,443 @@
+"""
+EventWriter: buffered, batched JSONL writer shared by all EventStores of a process.
+
+EventStore.append used to open, write and close events.jsonl for every event on the
+coordinator thread. With a writer attached, append() only enqueues the Event; a
+daemon thread serializes it, keeps one append handle per file and writes batches
+when the buffer reaches `flush_max_bytes` or `flush_interval_sec` has passed.
+
+Durability policy for alert events (ABSENT_ALERT_FIRED, SPG_ABSENT):
+- "none":  alerts are batched like any other event
+- "flush": the batch containing an alert is written and flushed to the OS immediately
+- "fsync": as "flush", plus os.fsync so the alert survives a power loss
+
+Logs are rotated daily or by size into events.<stamp>.jsonl segments (gzipped in
+the background) and every log carries a ts -> byte-offset sidecar index, written
+as the log grows; see src/storage/event_log.py.
+
+With a SqliteEventStore attached, each flushed batch is also inserted into SQLite
+in one transaction from this same thread (the store's only writer). Likewise a
+PresenceAnalyticsStore receives the batch's SPG_SEEN_INTERVAL records, so daily
+presence totals are updated as events are written, without rescanning the logs.
+
+The queue is bounded; when the disk cannot keep up, new events are dropped and
+counted instead of growing memory or blocking the pipeline.
+
+Usage:
+    writer = EventWriter(flush_interval_sec=1.0, durability="flush")
+    writer.start()
+    store = EventStore(cam_dir, writer=writer)
+    store.append(event)      # non-blocking
+    ...
+    writer.stop()            # drains and closes files
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import BinaryIO, TextIO
+
+from src.domain.events import Event
+from src.storage.event_log import (
+    DEFAULT_SPAN_BYTES,
+    IndexSpan,
+    compress_segment,
+    index_path_for,
+    read_index,
+    rotated_path,
+    scan_spans,
+)
+from src.storage.presence_analytics import INTERVAL_EVENT_TYPE, PresenceAnalyticsStore
+from src.storage.sqlite_event_store import SqliteEventStore
+from src.settings.logger import logger
+
+
+ALERT_EVENT_TYPES = frozenset({"ABSENT_ALERT_FIRED", "SPG_ABSENT"})
+DURABILITY_MODES = ("none", "flush", "fsync")
+ROTATE_MODES = ("none", "daily", "size")
+
+
+class EventWriter:
+    def __init__(
+        self,
+        flush_interval_sec: float = 1.0,
+        flush_max_bytes: int = 64 * 1024,
+        queue_max_size: int = 10000,
+        durability: str = "flush",
+        rotate: str = "daily",
+        rotate_max_bytes: int = 64 * 1024 * 1024,
+        compress_segments: bool = True,
+        index_span_bytes: int = DEFAULT_SPAN_BYTES,
+        sqlite_store: SqliteEventStore | None = None,
+        presence_store: PresenceAnalyticsStore | None = None,
+    ):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"durability must be one of {DURABILITY_MODES}, got {durability!r}")
+        if rotate not in ROTATE_MODES:
+            raise ValueError(f"rotate must be one of {ROTATE_MODES}, got {rotate!r}")
+        self.rotate = rotate
+        self.rotate_max_bytes = max(1024 * 1024, int(rotate_max_bytes))
+        self.compress_segments = bool(compress_segments)
+        self.index_span_bytes = max(4096, int(index_span_bytes))
+        self.sqlite_store = sqlite_store
+        self.presence_store = presence_store
+        self.flush_interval_sec = max(0.05, float(flush_interval_sec))
+        self.flush_max_bytes = max(1024, int(flush_max_bytes))
+        self.durability = durability
+
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, int(queue_max_size)))
+        self._thread: threading.Thread | None = None
+        self._stop_event = threading.Event()
+
+        # Owned by the writer thread only
+        self._files: dict[str, _LogState] = {}
+        self._pending: dict[str, _Batch] = {}
+        self._pending_bytes = 0
+        self._pending_rows: list[tuple] = []
+        self._pending_intervals: list[dict] = []
+        self._last_flush = time.monotonic()
+
+        self._metrics_lock = threading.Lock()
+        self._metrics = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "serialize_errors": 0,
+            "write_errors": 0,
+            "flushes": 0,
+            "fsyncs": 0,
+            "bytes_written": 0,
+            "rotations": 0,
+            "sqlite_rows": 0,
+            "sqlite_errors": 0,
+            "presence_segments": 0,
+            "presence_errors": 0,
+            "last_flush_ms": None,
+            "last_flush_ts": 0.0,
+        }
+        self._last_drop_log = 0.0
+
+    # Public API
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="event_writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_sec: float = 5.0) -> None:
+        """Drain the queue, flush and close all files."""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_sec)
+            if self._thread.is_alive():
+                # Closing under a thread that is still writing would lose or corrupt its batch.
+                logger.warning(
+                    f"[EventWriter] Writer thread still busy after {timeout_sec:.1f}s; "
+                    f"leaving files and stores open ({self._queue.qsize()} event(s) queued)."
+                )
+                return
+            self._thread = None
+        else:
+            while not self._queue.empty():
+                self._drain(block=False)
+                self._flush(force_sync=False)
+        self._close_files()
+        if self.sqlite_store is not None:
+            self.sqlite_store.close()
+        if self.presence_store is not None:
+            self.presence_store.close()
+
+    def submit(self, path: str, event: Event) -> bool:
+        """Queue an event for `path`. Never blocks; returns False if the event was dropped."""
+        try:
+            self._queue.put_nowait((path, event))
+        except queue.Full:
+            now = time.time()
+            with self._metrics_lock:
+                self._metrics["dropped"] += 1
+                dropped = self._metrics["dropped"]
+            if now - self._last_drop_log >= 10.0:
+                self._last_drop_log = now
+                logger.warning(f"[EventWriter] Queue full; {dropped} event(s) dropped so far.")
+            return False
+        with self._metrics_lock:
+            self._metrics["enqueued"] += 1
+        return True
+
+    def stats(self) -> dict:
+        with self._metrics_lock:
+            out = dict(self._metrics)
+        out["queue_depth"] = self._queue.qsize()
+        out["queue_max"] = self._queue.maxsize
+        out["durability"] = self.durability
+        if out["last_flush_ms"] is not None:
+            out["last_flush_ms"] = round(out["last_flush_ms"], 2)
+        return out
+
+    # Writer thread
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            timeout = max(0.0, self.flush_interval_sec - (time.monotonic() - self._last_flush))
+            urgent = False
+            try:
+                item = self._queue.get(timeout=timeout)
+                urgent = self._buffer(*item)
+                urgent = self._drain(block=False) or urgent
+            except queue.Empty:
+                pass
+
+            if (
+                urgent
+                or self._pending_bytes >= self.flush_max_bytes
+                or (time.monotonic() - self._last_flush) >= self.flush_interval_sec
+            ):
+                self._flush(force_sync=urgent)
+
+        while not self._queue.empty():
+            self._drain(block=False)
+            self._flush(force_sync=False)
+        self._flush(force_sync=self.durability != "none")
+
+    def _drain(self, block: bool) -> bool:
+        """Move everything currently queued into the pending buffers. Returns True if an alert was seen."""
+        urgent = False
+        while self._pending_bytes < self.flush_max_bytes:
+            try:
+                item = self._queue.get(block=block, timeout=0.1 if block else None)
+            except queue.Empty:
+                break
+            urgent = self._buffer(*item) or urgent
+        return urgent
+
+    def _buffer(self, path: str, event: Event) -> bool:
+        try:
+            record = event.model_dump()
+            line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        except Exception as e:
+            with self._metrics_lock:
+                self._metrics["serialize_errors"] += 1
+            logger.warning(f"[EventWriter] Failed to serialize {event.event_type}: {e}")
+            return False
+        batch = self._pending.get(path)
+        if batch is None:
+            batch = _Batch()
+            self._pending[path] = batch
+        batch.add(line, float(event.ts))
+        self._pending_bytes += len(line)
+        if self.sqlite_store is not None:
+            self._pending_rows.append(SqliteEventStore.row(event, source=os.path.basename(os.path.dirname(path))))
+        if self.presence_store is not None and event.event_type == INTERVAL_EVENT_TYPE:
+            self._pending_intervals.append(record)
+        return self.durability != "none" and event.event_type in ALERT_EVENT_TYPES
+
+    def _flush(self, force_sync: bool) -> None:
+        self._last_flush = time.monotonic()
+        if not self._pending and not self._pending_rows and not self._pending_intervals:
+            return
+        t0 = time.perf_counter()
+        written = 0
+        nbytes = 0
+        fsyncs = 0
+        for path, batch in self._pending.items():
+            data = b"".join(batch.lines)
+            try:
+                st = self._log_state(path)
+                if self._rotation_due(st):
+                    self._rotate(path, st)
+                    st = self._log_state(path)
+                st.file.write(data)
+                st.file.flush()
+                if force_sync and self.durability == "fsync":
+                    os.fsync(st.file.fileno())
+                    fsyncs += 1
+                st.size += len(data)
+                st.extend_span(batch.min_ts, batch.max_ts)
+                if st.size - st.span_start >= self.index_span_bytes:
+                    st.close_span()
+                written += len(batch.lines)
+                nbytes += len(data)
+            except OSError as e:
+                with self._metrics_lock:
+                    self._metrics["write_errors"] += 1
+                logger.warning(f"[EventWriter] Failed writing {len(batch.lines)} event(s) to {path}: {e}")
+                self._close_file(path)
+        self._pending = {}
+        self._pending_bytes = 0
+        sqlite_rows = 0
+        if self._pending_rows:
+            try:
+                sqlite_rows = self.sqlite_store.insert_many(self._pending_rows)
+            except sqlite3.Error as e:
+                with self._metrics_lock:
+                    self._metrics["sqlite_errors"] += 1
+                logger.warning(f"[EventWriter] SQLite insert of {len(self._pending_rows)} row(s) failed: {e}")
+            self._pending_rows = []
+        presence_segments = 0
+        if self._pending_intervals:
+            try:
+                presence_segments = self.presence_store.ingest_many(self._pending_intervals)
+            except sqlite3.Error as e:
+                # The logs stay authoritative; backfill-presence can replay what was missed.
+                with self._metrics_lock:
+                    self._metrics["presence_errors"] += 1
+                logger.warning(f"[EventWriter] Presence analytics update of {len(self._pending_intervals)} record(s) failed: {e}")
+            self._pending_intervals = []
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        with self._metrics_lock:
+            m = self._metrics
+            m["written"] += written
+            m["bytes_written"] += nbytes
+            m["sqlite_rows"] += sqlite_rows
+            m["presence_segments"] += presence_segments
+            m["flushes"] += 1
+            m["fsyncs"] += fsyncs
+            m["last_flush_ms"] = elapsed_ms
+            m["last_flush_ts"] = time.time()
+
+    # Segments and index
+
+    def _log_state(self, path: str) -> _LogState:
+        st = self._files.get(path)
+        if st is not None:
+            return st
+        idx_path = index_path_for(path)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        spans = read_index(idx_path)
+        indexed_end = spans[-1].end if spans else 0
+        if indexed_end > size:
+            # Index belongs to an older file (e.g. log replaced by hand); start over.
+            spans = []
+            indexed_end = 0
+            open(idx_path, "w").close()
+        if size > indexed_end:
+            # Crash recovery / pre-existing log: index what is already on disk.
+            tail = scan_spans(path, indexed_end, self.index_span_bytes)
+            with open(idx_path, "a", encoding="ascii") as idx:
+                idx.writelines(span.to_line() for span in tail)
+            spans += tail
+            indexed_end = spans[-1].end if spans else 0
+            if indexed_end < size:
+                # Trailing partial line from a crash; terminate it so the next line stays parseable.
+                with open(path, "ab") as f:
+                    f.write(b"\n")
+                size += 1
+
+        st = _LogState(
+            file=open(path, "ab"),
+            index=open(idx_path, "a", encoding="ascii"),
+            size=size,
+            span_start=size,
+            first_ts=spans[0].min_ts if spans else None,
+            opened_day=time.strftime("%Y%m%d", time.localtime(os.path.getmtime(path))) if size else _today(),
+        )
+        self._files[path] = st
+        return st
+
+    def _rotation_due(self, st: _LogState) -> bool:
+        if st.size == 0 or time.monotonic() < st.rotate_retry_at:
+            return False
+        if self.rotate == "daily":
+            return st.opened_day != _today()
+        if self.rotate == "size":
+            return st.size >= self.rotate_max_bytes
+        return False
+
+    def _rotate(self, path: str, st: _LogState) -> None:
+        st.close_span()
+        cam_dir = os.path.dirname(path)
+        target = rotated_path(cam_dir, st.first_ts or time.time())
+        self._close_file(path)
+        try:
+            os.replace(path, target)
+            os.replace(index_path_for(path), index_path_for(target))
+        except OSError as e:
+            # Typically a reader holding the file open on Windows; keep appending, retry later.
+            logger.warning(f"[EventWriter] Rotation of {path} failed: {e}")
+            self._log_state(path).rotate_retry_at = time.monotonic() + 60.0
+            return
+        with self._metrics_lock:
+            self._metrics["rotations"] += 1
+        logger.info(f"[EventWriter] Rotated {path} -> {os.path.basename(target)}")
+        if self.compress_segments:
+            threading.Thread(target=self._compress, args=(target,), name="event_log_compress", daemon=True).start()
+
+    def _compress(self, path: str) -> None:
+        try:
+            compress_segment(path)
+        except OSError as e:
+            logger.warning(f"[EventWriter] Failed to compress {path}: {e}")
+
+    def _close_file(self, path: str) -> None:
+        st = self._files.pop(path, None)
+        if st is not None:
+            st.close_span()
+            for f in (st.file, st.index):
+                try:
+                    f.close()
+                except OSError:
+                    pass
+
+    def _close_files(self) -> None:
+        for path in list(self._files.keys()):
+            self._close_file(path)
+
+
+def _today() -> str:
+    return time.strftime("%Y%m%d")
+
+
+class _Batch:
+    __slots__ = ("lines", "min_ts", "max_ts")
+
+    def __init__(self):
+        self.lines: list[bytes] = []
+        self.min_ts: float | None = None
+        self.max_ts: float | None = None
+
+    def add(self, line: bytes, ts: float) -> None:
+        self.lines.append(line)
+        self.min_ts = ts if self.min_ts is None else min(self.min_ts, ts)
+        self.max_ts = ts if self.max_ts is None else max(self.max_ts, ts)
+
+
+@dataclass
+class _LogState:
+    """Open handles and the not-yet-indexed span of one log. Writer thread only."""
+    file: BinaryIO
+    index: TextIO
+    size: int
+    span_start: int
+    first_ts: float | None
+    opened_day: str
+    span_min: float | None = None
+    span_max: float | None = None
+    rotate_retry_at: float = 0.0
+
+    def extend_span(self, min_ts: float | None, max_ts: float | None) -> None:
+        if min_ts is not None:
+            self.span_min = min_ts if self.span_min is None else min(self.span_min, min_ts)
+            if self.first_ts is None:
+                self.first_ts = min_ts
+        if max_ts is not None:
+            self.span_max = max_ts if self.span_max is None else max(self.span_max, max_ts)
+
+    def close_span(self) -> None:
+        if self.size <= self.span_start:
+            return
+        span = IndexSpan(self.span_start, self.size, self.span_min or 0.0, self.span_max or 0.0)
+        try:
+            self.index.write(span.to_line())
+            self.index.flush()
+        except (OSError, ValueError):
+            return
+        self.span_start = self.size
+        self.span_min = self.span_max = None
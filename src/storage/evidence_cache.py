@@ -0,0 +1,159 @@
+"""
+EvidenceCache: last N encoded frames per camera, kept in memory for alert photos.
+
+The main process samples each camera's shared-memory frame ring at a low rate,
+JPEG-encodes the frame once and keeps the bytes here. When an absence alert fires,
+the photo comes straight from this cache (the camera where the SPG was last seen),
+is written to disk once as the audit copy and handed to the dispatcher as bytes,
+so nothing is decoded and re-encoded from latest_frame.jpg.
+
+A full-resolution encode takes tens of ms, so the periodic sampling hands frames
+to a background thread via submit(): one latest-only pending frame per camera,
+a newer frame replaces one not yet encoded (counted as `dropped`). capture()
+encodes inline and is kept for the alert path, which needs the bytes right away.
+
+Usage:
+    cache = EvidenceCache(frames_per_camera=5, max_width=0, jpeg_quality=85)
+    cache.start()
+
+    # Main loop (low rate, never blocks on encoding):
+    cache.submit("cam_01", frame, frame_id=meta.frame_id, ts=meta.timestamp)
+
+    # Alert path:
+    item = cache.latest("cam_01")
+    if item is not None:
+        path = snapshot_store.save_alert_bytes(outlet_id, item.camera_id, item.jpeg)
+
+    cache.stop()
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+import cv2
+
+from src.settings.logger import logger
+
+
+@dataclass(frozen=True)
+class EvidenceFrame:
+    camera_id: str
+    frame_id: int
+    ts: float
+    jpeg: bytes
+
+
+class EvidenceCache:
+    def __init__(self, frames_per_camera: int = 5, max_width: int = 0, jpeg_quality: int = 85):
+        self.frames_per_camera = max(1, int(frames_per_camera))
+        # 0 keeps the full capture resolution
+        self.max_width = max(0, int(max_width))
+        self.jpeg_quality = min(100, max(1, int(jpeg_quality)))
+        self._frames: dict[str, deque[EvidenceFrame]] = {}
+        self._lock = threading.Lock()
+
+        self._cond = threading.Condition()
+        # camera_id -> (frame, frame_id, ts) waiting for the encoder thread
+        self._pending: dict[str, tuple] = {}
+        self._stopping = False
+        self._thread: threading.Thread | None = None
+        self._dropped = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="evidence_encoder", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout_sec: float = 2.0) -> None:
+        with self._cond:
+            self._stopping = True
+            self._pending.clear()
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout_sec)
+            self._thread = None
+
+    def submit(self, camera_id: str, frame, frame_id: int, ts: float) -> None:
+        """Never blocks: queue a frame for encoding, replacing one not picked up yet.
+
+        The encoder thread owns the frame afterwards. Without start() it encodes inline.
+        """
+        if self._thread is None:
+            self.capture(camera_id, frame, frame_id=frame_id, ts=ts)
+            return
+        with self._cond:
+            if camera_id in self._pending:
+                self._dropped += 1
+            self._pending[camera_id] = (frame, frame_id, ts)
+            self._cond.notify()
+
+    def pending_frame_id(self, camera_id: str) -> int | None:
+        with self._cond:
+            item = self._pending.get(camera_id)
+            return item[1] if item is not None else None
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                camera_id = next(iter(self._pending))
+                frame, frame_id, ts = self._pending.pop(camera_id)
+            try:
+                self.capture(camera_id, frame, frame_id=frame_id, ts=ts)
+            except Exception as e:
+                logger.debug(f"[Evidence] {camera_id} encode failed: {e}")
+
+    def capture(self, camera_id: str, frame, frame_id: int, ts: float) -> EvidenceFrame | None:
+        """Encode a frame once and keep it. Returns None if encoding failed."""
+        if frame is None:
+            return None
+        h, w = frame.shape[:2]
+        if self.max_width and w > self.max_width:
+            scale = self.max_width / float(w)
+            frame = cv2.resize(frame, (self.max_width, max(1, int(h * scale))))
+        ok, buf = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            return None
+        return self.put(camera_id, buf.tobytes(), frame_id=frame_id, ts=ts)
+
+    def put(self, camera_id: str, jpeg: bytes, frame_id: int, ts: float) -> EvidenceFrame:
+        """Store already-encoded JPEG bytes."""
+        item = EvidenceFrame(camera_id=camera_id, frame_id=int(frame_id), ts=float(ts), jpeg=jpeg)
+        with self._lock:
+            ring = self._frames.get(camera_id)
+            if ring is None:
+                ring = deque(maxlen=self.frames_per_camera)
+                self._frames[camera_id] = ring
+            ring.append(item)
+        return item
+
+    def latest(self, camera_id: str) -> EvidenceFrame | None:
+        with self._lock:
+            ring = self._frames.get(camera_id)
+            return ring[-1] if ring else None
+
+    def recent(self, camera_id: str) -> list[EvidenceFrame]:
+        """Cached frames for a camera, oldest first."""
+        with self._lock:
+            return list(self._frames.get(camera_id, ()))
+
+    def last_ts(self, camera_id: str) -> float:
+        item = self.latest(camera_id)
+        return item.ts if item is not None else 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "cameras": len(self._frames),
+                "frames": sum(len(r) for r in self._frames.values()),
+                "bytes": sum(len(i.jpeg) for r in self._frames.values() for i in r),
+                "dropped": self._dropped,
+            }
@@ -0,0 +1,339 @@
+"""
+Presence analytics: per-SPG per-day presence intervals and totals, pre-aggregated.
+
+Daily presence hours used to require rescanning every events.jsonl. Instead each
+SPG_SEEN_INTERVAL record (see PresenceCompactor) is consumed once, when the
+EventWriter flushes it, and folded into a small SQLite database:
+
+    presence_daily      (outlet_id, spg_id, day) -> seconds, hits, intervals, first_ts, last_ts
+    presence_intervals  merged intervals per (outlet_id, spg_id, day)
+    presence_watermark  (outlet_id, spg_id) -> end_ts of the last consumed segment
+
+Days are local calendar days ("YYYY-MM-DD", same clock as log rotation); a
+segment crossing midnight is split. Consecutive segments closer than
+`merge_gap_sec` extend the same interval (checkpointed segments continue
+exactly where the previous one ended). `seconds` sums segment durations, so
+gaps shorter than the merge gap are not counted as presence.
+
+Each SPG's segments are emitted in end_ts order, so the watermark makes ingest
+idempotent: a segment ending at or before it was already consumed. That lets the
+backfill command replay historical logs over an existing database (stop
+run_outlet first so live segments do not move the watermark past the history).
+
+Like SqliteEventStore: one writer (EventWriter thread or the backfill command),
+WAL mode, read-only connections on the dashboard.
+
+Usage:
+    # Pipeline (EventWriter thread only) / backfill:
+    store = PresenceAnalyticsStore(db_path, merge_gap_sec=10.0)
+    store.ingest_many([interval_event.model_dump(), ...])
+
+    # Dashboard:
+    reader = PresenceAnalyticsReader(db_path)
+    reader.presence("2026-01-01", "2026-01-31", spg_id="001", intervals=True)
+
+CLI (replay SPG_SEEN_INTERVAL, or raw SPG_SEEN with --from-seen, from the logs):
+    python -m src.app backfill-presence --config configs/app.dev.yaml [--since 2026-01-01] [--rebuild]
+"""
+
+from __future__ import annotations
+
+import datetime as dt
+import os
+import sqlite3
+import threading
+import time
+
+
+INTERVAL_EVENT_TYPE = "SPG_SEEN_INTERVAL"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS presence_daily (
+    outlet_id TEXT NOT NULL,
+    spg_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    name TEXT,
+    seconds REAL NOT NULL DEFAULT 0,
+    hits INTEGER NOT NULL DEFAULT 0,
+    intervals INTEGER NOT NULL DEFAULT 0,
+    first_ts REAL,
+    last_ts REAL,
+    PRIMARY KEY (outlet_id, spg_id, day)
+);
+CREATE INDEX IF NOT EXISTS idx_presence_daily_day ON presence_daily (day);
+CREATE TABLE IF NOT EXISTS presence_intervals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    outlet_id TEXT NOT NULL,
+    spg_id TEXT NOT NULL,
+    day TEXT NOT NULL,
+    start_ts REAL NOT NULL,
+    end_ts REAL NOT NULL,
+    seconds REAL NOT NULL,
+    hits INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_presence_intervals_key ON presence_intervals (outlet_id, spg_id, day, end_ts);
+CREATE INDEX IF NOT EXISTS idx_presence_intervals_day ON presence_intervals (day);
+CREATE TABLE IF NOT EXISTS presence_watermark (
+    outlet_id TEXT NOT NULL,
+    spg_id TEXT NOT NULL,
+    end_ts REAL NOT NULL,
+    PRIMARY KEY (outlet_id, spg_id)
+);
+"""
+
+
+def day_of(ts: float) -> str:
+    return time.strftime("%Y-%m-%d", time.localtime(ts))
+
+
+def day_start(day: str) -> float:
+    return time.mktime(time.strptime(day, "%Y-%m-%d"))
+
+
+def parse_day(value: str | float | None, default: str) -> str:
+    """"YYYY-MM-DD" or a unix timestamp -> "YYYY-MM-DD". Raises ValueError otherwise."""
+    if value is None or value == "":
+        return default
+    try:
+        return day_of(float(value))
+    except (TypeError, ValueError):
+        return dt.date.fromisoformat(str(value)).isoformat()
+
+
+def split_by_day(start_ts: float, end_ts: float) -> list[tuple[str, float, float]]:
+    """[(day, start, end)] pieces of [start_ts, end_ts] cut at local midnight."""
+    pieces = []
+    cur = start_ts
+    while True:
+        day = day_of(cur)
+        nxt = day_start((dt.date.fromisoformat(day) + dt.timedelta(days=1)).isoformat())
+        if end_ts <= nxt:
+            pieces.append((day, cur, end_ts))
+            return pieces
+        pieces.append((day, cur, nxt))
+        cur = nxt
+
+
+def _segment(record: dict) -> tuple[str, str, str | None, float, float, int] | None:
+    """(outlet_id, spg_id, name, start_ts, end_ts, hits) of an SPG_SEEN_INTERVAL dict."""
+    if record.get("event_type") != INTERVAL_EVENT_TYPE or not record.get("spg_id"):
+        return None
+    details = record.get("details") or {}
+    try:
+        end_ts = float(details.get("end_ts", record.get("ts")))
+        start_ts = float(details.get("start_ts", end_ts))
+    except (TypeError, ValueError):
+        return None
+    if end_ts < start_ts:
+        return None
+    return (
+        str(record.get("outlet_id") or ""),
+        str(record["spg_id"]),
+        record.get("name"),
+        start_ts,
+        end_ts,
+        int(details.get("hits") or 0),
+    )
+
+
+class PresenceAnalyticsStore:
+    """Writer side. Not thread-safe by design: use from one thread (EventWriter or backfill)."""
+
+    def __init__(self, db_path: str, merge_gap_sec: float = 10.0, synchronous: str = "NORMAL", busy_timeout_ms: int = 5000):
+        self.db_path = db_path
+        self.merge_gap_sec = max(0.0, float(merge_gap_sec))
+        self.synchronous = synchronous
+        self.busy_timeout_ms = int(busy_timeout_ms)
+        self._conn: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(
+                self.db_path,
+                timeout=self.busy_timeout_ms / 1000.0,
+                check_same_thread=False,
+                isolation_level=None,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def ingest_many(self, records: list[dict]) -> int:
+        """Fold SPG_SEEN_INTERVAL records in, in one transaction. Returns segments consumed."""
+        segments = [seg for seg in (_segment(r) for r in records) if seg is not None]
+        if not segments:
+            return 0
+        segments.sort(key=lambda s: s[4])
+        conn = self._connect()
+        consumed = 0
+        # IMMEDIATE: the watermark check and the update must not interleave with another writer.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for seg in segments:
+                consumed += self._ingest(conn, *seg)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return consumed
+
+    def _ingest(self, conn: sqlite3.Connection, outlet_id, spg_id, name, start_ts, end_ts, hits) -> int:
+        row = conn.execute(
+            "SELECT end_ts FROM presence_watermark WHERE outlet_id = ? AND spg_id = ?", (outlet_id, spg_id)
+        ).fetchone()
+        if row is not None:
+            if end_ts <= row[0]:
+                return 0
+            start_ts = max(start_ts, row[0])
+
+        pieces = split_by_day(start_ts, end_ts)
+        for i, (day, p_start, p_end) in enumerate(pieces):
+            seconds = max(0.0, p_end - p_start)
+            # Hits are not timestamped inside a segment; book them on the day it ended.
+            p_hits = hits if i == len(pieces) - 1 else 0
+            last = conn.execute(
+                "SELECT id, end_ts FROM presence_intervals WHERE outlet_id = ? AND spg_id = ? AND day = ? "
+                "ORDER BY end_ts DESC LIMIT 1",
+                (outlet_id, spg_id, day),
+            ).fetchone()
+            new_interval = last is None or p_start > last[1] + self.merge_gap_sec
+            if new_interval:
+                conn.execute(
+                    "INSERT INTO presence_intervals (outlet_id, spg_id, day, start_ts, end_ts, seconds, hits) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (outlet_id, spg_id, day, p_start, p_end, seconds, p_hits),
+                )
+            else:
+                conn.execute(
+                    "UPDATE presence_intervals SET end_ts = MAX(end_ts, ?), seconds = seconds + ?, hits = hits + ? "
+                    "WHERE id = ?",
+                    (p_end, seconds, p_hits, last[0]),
+                )
+            conn.execute(
+                "INSERT INTO presence_daily (outlet_id, spg_id, day, name, seconds, hits, intervals, first_ts, last_ts) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (outlet_id, spg_id, day) DO UPDATE SET "
+                "name = COALESCE(excluded.name, name), "
+                "seconds = seconds + excluded.seconds, "
+                "hits = hits + excluded.hits, "
+                "intervals = intervals + excluded.intervals, "
+                "first_ts = MIN(first_ts, excluded.first_ts), "
+                "last_ts = MAX(last_ts, excluded.last_ts)",
+                (outlet_id, spg_id, day, name, seconds, p_hits, int(new_interval), p_start, p_end),
+            )
+        conn.execute(
+            "INSERT INTO presence_watermark (outlet_id, spg_id, end_ts) VALUES (?, ?, ?) "
+            "ON CONFLICT (outlet_id, spg_id) DO UPDATE SET end_ts = excluded.end_ts",
+            (outlet_id, spg_id, end_ts),
+        )
+        return 1
+
+    def clear(self) -> None:
+        conn = self._connect()
+        conn.executescript(
+            "BEGIN; DELETE FROM presence_daily; DELETE FROM presence_intervals; DELETE FROM presence_watermark; COMMIT;"
+        )
+
+    def close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
+
+
+class PresenceAnalyticsReader:
+    """Dashboard side. One read-only connection per thread."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def available(self) -> bool:
+        return os.path.exists(self.db_path)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=1.0, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def presence(
+        self,
+        from_day: str,
+        to_day: str,
+        spg_id: str | None = None,
+        outlet_id: str | None = None,
+        intervals: bool = False,
+    ) -> list[dict]:
+        """Per (outlet, SPG): totals over [from_day, to_day] and one entry per day with presence."""
+        where = ["day >= ?", "day <= ?"]
+        params: list = [from_day, to_day]
+        if spg_id is not None:
+            where.append("spg_id = ?")
+            params.append(spg_id)
+        if outlet_id is not None:
+            where.append("outlet_id = ?")
+            params.append(outlet_id)
+        cond = " AND ".join(where)
+        conn = self._conn()
+        rows = conn.execute(
+            "SELECT outlet_id, spg_id, day, name, seconds, hits, intervals, first_ts, last_ts "
+            f"FROM presence_daily WHERE {cond} ORDER BY outlet_id, spg_id, day",
+            params,
+        ).fetchall()
+
+        by_key: dict[tuple[str, str, str], list[dict]] = {}
+        if intervals:
+            for r in conn.execute(
+                "SELECT outlet_id, spg_id, day, start_ts, end_ts, seconds, hits "
+                f"FROM presence_intervals WHERE {cond} ORDER BY start_ts",
+                params,
+            ):
+                by_key.setdefault((r["outlet_id"], r["spg_id"], r["day"]), []).append(
+                    {
+                        "start_ts": r["start_ts"],
+                        "end_ts": r["end_ts"],
+                        "seconds": round(r["seconds"], 1),
+                        "hits": r["hits"],
+                    }
+                )
+
+        out: dict[tuple[str, str], dict] = {}
+        for r in rows:
+            key = (r["outlet_id"], r["spg_id"])
+            item = out.get(key)
+            if item is None:
+                item = out[key] = {
+                    "outlet_id": r["outlet_id"],
+                    "spg_id": r["spg_id"],
+                    "name": r["name"],
+                    "total_sec": 0.0,
+                    "days": [],
+                }
+            if r["name"]:
+                item["name"] = r["name"]
+            item["total_sec"] += r["seconds"]
+            day = {
+                "day": r["day"],
+                "seconds": round(r["seconds"], 1),
+                "hours": round(r["seconds"] / 3600.0, 2),
+                "hits": r["hits"],
+                "intervals": r["intervals"],
+                "first_ts": r["first_ts"],
+                "last_ts": r["last_ts"],
+            }
+            if intervals:
+                day["interval_list"] = by_key.get((r["outlet_id"], r["spg_id"], r["day"]), [])
+            item["days"].append(day)
+        for item in out.values():
+            item["total_hours"] = round(item["total_sec"] / 3600.0, 2)
+            item["total_sec"] = round(item["total_sec"], 1)
+        return list(out.values())
@@ -1,3 +1,4 @@
+import os
 import time
 import cv2
 from pathlib import Path
@@ -14,10 +15,27 @@ class SnapshotStore:
         cv2.imwrite(str(path), frame)
         return str(path)
 
+    def save_alert_bytes(self, outlet_id: str, camera_id: str, jpeg: bytes, ts: float | None = None) -> str:
+        """Persist an already-encoded alert frame (no decode / re-encode)."""
+        ts_str = time.strftime("%Y%m%d_%H%M%S", time.localtime(ts))
+        filename = f"{ts_str}_absent_{outlet_id}_{camera_id}.jpg".replace(" ", "_")
+        path = self.root / filename
+        path.write_bytes(jpeg)
+        return str(path)
+
     def save_latest_face(self, spg_id: str, frame) -> str:
-        """Saves or overwrites the latest known face for an SPG."""
+        """
+        Saves or overwrites the latest known face for an SPG.
+        Replaced via rename so readers never see a partial file and the directory
+        mtime changes (the dashboard's SnapshotIndex rescans on that).
+        """
         filename = f"latest_{spg_id}.jpg"
         path = self.root / filename
-        cv2.imwrite(str(path), frame)
+        ok, encoded = cv2.imencode(".jpg", frame)
+        if not ok:
+            return str(path)
+        tmp_path = path.with_name(filename + ".tmp")
+        tmp_path.write_bytes(encoded.tobytes())
+        os.replace(tmp_path, path)
         return str(path)
         
\ No newline at end of file
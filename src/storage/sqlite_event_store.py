@@ -0,0 +1,191 @@
+"""
+SQLite event store: indexed copy of the event timeline for dashboard queries.
+
+Optional (storage.sqlite_enabled). The JSONL logs stay the primary record; the
+EventWriter thread additionally inserts every flushed batch here in a single
+transaction, so there is exactly one writer. The database runs in WAL mode, which
+lets the dashboard read concurrently (read-only connections) without blocking it.
+
+Indexes: (ts), (spg_id, ts), (camera_id, ts).
+
+Usage:
+    # Pipeline (EventWriter thread only):
+    store = SqliteEventStore(db_path)
+    store.insert_many([SqliteEventStore.row(event, source="cam_01"), ...])
+
+    # Dashboard (any thread):
+    reader = SqliteEventReader(db_path)
+    reader.recent(limit=50)
+    reader.query(start_ts=..., end_ts=..., spg_id="001")
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+
+from src.domain.events import Event
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    event_type TEXT NOT NULL,
+    outlet_id TEXT,
+    camera_id TEXT,
+    source TEXT,
+    spg_id TEXT,
+    name TEXT,
+    similarity REAL,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS idx_events_spg_ts ON events (spg_id, ts);
+CREATE INDEX IF NOT EXISTS idx_events_camera_ts ON events (camera_id, ts);
+"""
+
+_COLUMNS = "ts, event_type, outlet_id, camera_id, source, spg_id, name, similarity, details"
+
+
+class SqliteEventStore:
+    """Writer side. Not thread-safe by design: use from the EventWriter thread only."""
+
+    def __init__(self, db_path: str, synchronous: str = "NORMAL", busy_timeout_ms: int = 5000):
+        self.db_path = db_path
+        self.synchronous = synchronous
+        self.busy_timeout_ms = int(busy_timeout_ms)
+        self._conn: sqlite3.Connection | None = None
+
+    @staticmethod
+    def row(event: Event, source: str) -> tuple:
+        """`source` is the camera directory the event was filed under (dashboard `_camera`)."""
+        return (
+            float(event.ts),
+            event.event_type,
+            event.outlet_id,
+            event.camera_id,
+            source,
+            event.spg_id,
+            event.name,
+            event.similarity,
+            json.dumps(event.details or {}, ensure_ascii=False),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000.0, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.synchronous}")
+            conn.executescript(_SCHEMA)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def insert_many(self, rows: list[tuple]) -> int:
+        if not rows:
+            return 0
+        conn = self._connect()
+        with conn:
+            conn.executemany(f"INSERT INTO events ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+            self._conn = None
+
+
+class SqliteEventReader:
+    """Dashboard side. One read-only connection per thread; never takes the write lock."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def available(self) -> bool:
+        return os.path.exists(self.db_path)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, timeout=1.0, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> dict:
+        try:
+            details = json.loads(row["details"]) if row["details"] else {}
+        except json.JSONDecodeError:
+            details = {}
+        return {
+            "ts": row["ts"],
+            "event_type": row["event_type"],
+            "outlet_id": row["outlet_id"],
+            "camera_id": row["camera_id"],
+            "spg_id": row["spg_id"],
+            "name": row["name"],
+            "similarity": row["similarity"],
+            "details": details,
+            "_camera": row["source"],
+        }
+
+    def query(
+        self,
+        start_ts: float | None = None,
+        end_ts: float | None = None,
+        spg_id: str | None = None,
+        camera_id: str | None = None,
+        sources: list[str] | None = None,
+        event_type: str | None = None,
+        limit: int = 1000,
+        newest_first: bool = True,
+    ) -> list[dict]:
+        where = []
+        params: list = []
+        if start_ts is not None:
+            where.append("ts >= ?")
+            params.append(float(start_ts))
+        if end_ts is not None:
+            where.append("ts <= ?")
+            params.append(float(end_ts))
+        if spg_id is not None:
+            where.append("spg_id = ?")
+            params.append(spg_id)
+        if camera_id is not None:
+            where.append("camera_id = ?")
+            params.append(camera_id)
+        if sources:
+            where.append(f"source IN ({', '.join('?' for _ in sources)})")
+            params.extend(sources)
+        if event_type is not None:
+            where.append("event_type = ?")
+            params.append(event_type)
+        sql = f"SELECT {_COLUMNS} FROM events"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY ts {'DESC' if newest_first else 'ASC'} LIMIT ?"
+        params.append(max(1, int(limit)))
+        rows = self._conn().execute(sql, params).fetchall()
+        return [self._to_dict(r) for r in rows]
+
+    def recent(self, limit: int = 50, sources: list[str] | None = None) -> list[dict]:
+        """Newest first, like the JSONL-based get_recent_events."""
+        return self.query(sources=sources, limit=limit)
+
+    def by_spg(self, spg_id: str, start_ts: float | None = None, end_ts: float | None = None, limit: int = 1000) -> list[dict]:
+        return self.query(start_ts=start_ts, end_ts=end_ts, spg_id=spg_id, limit=limit)
+
+    def by_camera(
+        self, camera_id: str, start_ts: float | None = None, end_ts: float | None = None, limit: int = 1000
+    ) -> list[dict]:
+        return self.query(start_ts=start_ts, end_ts=end_ts, camera_id=camera_id, limit=limit)
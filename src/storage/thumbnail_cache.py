@@ -0,0 +1,192 @@
+"""
+ThumbnailCache: resized gallery face crops, content-addressed, with an LRU size cap on disk.
+
+The manage page showed every `{spg_id}_last_face.jpg` at capture size in a 40 px
+avatar. Thumbnails are now generated lazily (or warmed right after enrollment)
+and stored as `<cache_dir>/<hash>_<size>.jpg`, where `hash` is a content hash of
+the source crop. A given thumbnail URL therefore never changes content: the
+dashboard puts the hash in the URL (`?v=`) and serves it with a long-lived
+immutable Cache-Control and the hash as ETag. A re-enrolled photo gets a new
+hash, hence a new URL; the old thumbnails simply age out of the LRU.
+
+Source hashes are memoized by (size, mtime_ns), so a listing costs one stat per
+photo. Requested sizes snap up to the nearest configured size to bound the
+number of variants. The cache is trimmed to `max_bytes` by evicting the least
+recently served files (order kept in memory, seeded from file mtimes on start).
+
+Usage:
+    thumbs = ThumbnailCache(os.path.join(gallery_dir, ".thumbs"), sizes=(80, 160))
+    thumbs.content_hash(photo_path)            # "9f1c..." or None
+    entry = thumbs.get(photo_path, size=80)    # ThumbnailEntry(path, content_hash, size) or None
+    entry.etag
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import cv2
+
+from src.settings.logger import logger
+
+
+@dataclass(frozen=True)
+class ThumbnailEntry:
+    path: str
+    content_hash: str
+    size: int
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.content_hash}-{self.size}"'
+
+
+class ThumbnailCache:
+    def __init__(
+        self,
+        cache_dir: str,
+        sizes: tuple[int, ...] | list[int] = (80, 160),
+        max_bytes: int = 64 * 1024 * 1024,
+        jpeg_quality: int = 80,
+    ):
+        self.cache_dir = cache_dir
+        self.sizes = tuple(sorted({max(16, int(s)) for s in sizes})) or (80,)
+        self.max_bytes = max(1024 * 1024, int(max_bytes))
+        self.jpeg_quality = max(1, min(100, int(jpeg_quality)))
+        self._lock = threading.Lock()
+        # source path -> ((size, mtime_ns), hash)
+        self._hashes: dict[str, tuple[tuple[int, int], str]] = {}
+        # thumbnail file name -> bytes, least recently served first
+        self._lru: OrderedDict[str, int] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.generated = 0
+        self.evicted = 0
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            files = []
+            for e in os.scandir(self.cache_dir):
+                if e.is_file() and e.name.endswith(".jpg"):
+                    st = e.stat()
+                    files.append((st.st_mtime_ns, e.name, st.st_size))
+        except OSError as e:
+            logger.warning(f"[Thumbnails] Cannot use cache dir {self.cache_dir}: {e}")
+            return
+        for _, name, size in sorted(files):
+            self._lru[name] = size
+            self._bytes += size
+
+    def snap_size(self, size: int) -> int:
+        for s in self.sizes:
+            if s >= size:
+                return s
+        return self.sizes[-1]
+
+    def content_hash(self, source_path: str) -> str | None:
+        try:
+            st = os.stat(source_path)
+        except OSError:
+            return None
+        fp = (st.st_size, st.st_mtime_ns)
+        with self._lock:
+            cached = self._hashes.get(source_path)
+        if cached is not None and cached[0] == fp:
+            return cached[1]
+        try:
+            with open(source_path, "rb") as f:
+                digest = hashlib.blake2b(f.read(), digest_size=10).hexdigest()
+        except OSError:
+            return None
+        with self._lock:
+            self._hashes[source_path] = (fp, digest)
+        return digest
+
+    def get(self, source_path: str, size: int) -> ThumbnailEntry | None:
+        """Thumbnail of source_path, generated if missing. None if the source is gone or unreadable."""
+        digest = self.content_hash(source_path)
+        if digest is None:
+            return None
+        size = self.snap_size(size)
+        name = f"{digest}_{size}.jpg"
+        path = os.path.join(self.cache_dir, name)
+        with self._lock:
+            if name in self._lru and os.path.exists(path):
+                self._lru.move_to_end(name)
+                self.hits += 1
+                return ThumbnailEntry(path, digest, size)
+        nbytes = self._generate(source_path, path, size)
+        if nbytes is None:
+            return None
+        with self._lock:
+            self._bytes += nbytes - self._lru.pop(name, 0)
+            self._lru[name] = nbytes
+            self.generated += 1
+            self._evict(keep=name)
+        return ThumbnailEntry(path, digest, size)
+
+    def _generate(self, source_path: str, path: str, size: int) -> int | None:
+        img = cv2.imread(source_path)
+        if img is None:
+            return None
+        h, w = img.shape[:2]
+        scale = size / float(max(h, w))
+        if scale < 1.0:
+            img = cv2.resize(img, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), self.jpeg_quality])
+        if not ok:
+            return None
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(buf.tobytes())
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"[Thumbnails] Failed writing {path}: {e}")
+            return None
+        return len(buf)
+
+    def _evict(self, keep: str) -> None:
+        while self._bytes > self.max_bytes and len(self._lru) > 1:
+            name, nbytes = next(iter(self._lru.items()))
+            if name == keep:
+                self._lru.move_to_end(name)
+                continue
+            del self._lru[name]
+            self._bytes -= nbytes
+            self.evicted += 1
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except OSError:
+                pass
+
+    def discard(self, source_path: str) -> None:
+        """Drop the thumbnails of a photo about to be removed."""
+        digest = self.content_hash(source_path)
+        with self._lock:
+            self._hashes.pop(source_path, None)
+            if digest is None:
+                return
+            prefix = f"{digest}_"
+            for name in [n for n in self._lru if n.startswith(prefix)]:
+                self._bytes -= self._lru.pop(name)
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self._lru),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "generated": self.generated,
+            "evicted": self.evicted,
+        }
@@ -0,0 +1,191 @@
+"""
+Dashboard load benchmark: API latency while MJPEG streams are open.
+
+Opens `--streams` MJPEG connections (round-robin over the cameras reported by
+/api/cameras, or `--camera`) and keeps reading them, while `--clients` threads
+poll /api/state, /api/health and /api/events the way the dashboard tab does:
+each client remembers the last ETag per endpoint and sends If-None-Match.
+
+Reports p50/p95/p99/max latency per endpoint, the share of 304 responses, and
+bytes received on the streams. Stdlib only, so it runs from any machine that
+can reach the dashboard.
+
+Usage:
+    python -m src.tools.bench_dashboard --url http://localhost:8000 --streams 20 --duration 30
+    make bench-dashboard STREAMS=20 DURATION=30
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+ENDPOINTS = ("/api/state", "/api/health", "/api/events")
+
+
+def _connect(url: str, timeout: float) -> http.client.HTTPConnection:
+    parts = urlsplit(url)
+    cls = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    return cls(parts.hostname or "localhost", parts.port, timeout=timeout)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+class StreamReader(threading.Thread):
+    def __init__(self, url: str, path: str, stop: threading.Event):
+        super().__init__(daemon=True)
+        self.url = url
+        self.path = path
+        self.stop = stop
+        self.bytes = 0
+        self.error: str | None = None
+
+    def run(self) -> None:
+        try:
+            conn = _connect(self.url, timeout=10.0)
+            conn.request("GET", self.path)
+            resp = conn.getresponse()
+            if resp.status != 200:
+                self.error = f"HTTP {resp.status}"
+                return
+            while not self.stop.is_set():
+                chunk = resp.read1(65536) if hasattr(resp, "read1") else resp.read(65536)
+                if not chunk:
+                    break
+                self.bytes += len(chunk)
+            conn.close()
+        except Exception as e:
+            self.error = str(e)
+
+
+class ApiClient(threading.Thread):
+    def __init__(self, url: str, stop: threading.Event, interval_sec: float, conditional: bool):
+        super().__init__(daemon=True)
+        self.url = url
+        self.stop = stop
+        self.interval_sec = interval_sec
+        self.conditional = conditional
+        self.latencies: dict[str, list[float]] = {p: [] for p in ENDPOINTS}
+        self.not_modified: dict[str, int] = {p: 0 for p in ENDPOINTS}
+        self.errors = 0
+        self._etags: dict[str, str] = {}
+
+    def _request(self, conn: http.client.HTTPConnection, path: str) -> None:
+        headers = {}
+        if self.conditional and path in self._etags:
+            headers["If-None-Match"] = self._etags[path]
+        t0 = time.perf_counter()
+        conn.request("GET", path, headers=headers)
+        resp = conn.getresponse()
+        resp.read()
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        if resp.status == 304:
+            self.not_modified[path] += 1
+        elif resp.status != 200:
+            self.errors += 1
+            return
+        etag = resp.getheader("ETag")
+        if etag:
+            self._etags[path] = etag
+        self.latencies[path].append(elapsed_ms)
+
+    def run(self) -> None:
+        conn = _connect(self.url, timeout=10.0)
+        while not self.stop.is_set():
+            started = time.monotonic()
+            for path in ENDPOINTS:
+                try:
+                    self._request(conn, path)
+                except Exception:
+                    self.errors += 1
+                    conn.close()
+                    conn = _connect(self.url, timeout=10.0)
+            self.stop.wait(max(0.0, self.interval_sec - (time.monotonic() - started)))
+        conn.close()
+
+
+def _camera_ids(url: str) -> list[str]:
+    conn = _connect(url, timeout=10.0)
+    try:
+        conn.request("GET", "/api/cameras")
+        resp = conn.getresponse()
+        cams = json.loads(resp.read() or b"[]") if resp.status == 200 else []
+    finally:
+        conn.close()
+    return [c["id"] for c in cams if isinstance(c, dict) and c.get("id")]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure dashboard API latency while MJPEG streams are open.")
+    parser.add_argument("--url", default="http://localhost:8000", help="Dashboard base URL")
+    parser.add_argument("--streams", type=int, default=20, help="Number of concurrent MJPEG streams")
+    parser.add_argument("--camera", action="append", default=None, help="Camera id to stream (repeatable)")
+    parser.add_argument("--raw", action="store_true", help="Use /stream_raw instead of /stream")
+    parser.add_argument("--clients", type=int, default=4, help="Number of API polling clients")
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between polls per client")
+    parser.add_argument("--duration", type=float, default=30.0, help="Benchmark duration in seconds")
+    parser.add_argument("--no-conditional", action="store_true", help="Do not send If-None-Match")
+    args = parser.parse_args()
+
+    cameras = args.camera or _camera_ids(args.url)
+    if args.streams > 0 and not cameras:
+        print("No cameras found (pass --camera cam_01)", file=sys.stderr)
+        return 1
+
+    stop = threading.Event()
+    prefix = "/stream_raw/" if args.raw else "/stream/"
+    streams = [StreamReader(args.url, prefix + cameras[i % len(cameras)], stop) for i in range(max(0, args.streams))]
+    for s in streams:
+        s.start()
+    # Let the streams connect before measuring.
+    time.sleep(1.0)
+
+    clients = [ApiClient(args.url, stop, args.interval, not args.no_conditional) for _ in range(max(1, args.clients))]
+    for c in clients:
+        c.start()
+    time.sleep(args.duration)
+    stop.set()
+    for c in clients:
+        c.join(timeout=15.0)
+
+    live_streams = sum(1 for s in streams if s.error is None and s.bytes > 0)
+    stream_mb = sum(s.bytes for s in streams) / 1e6
+    print(f"streams: {live_streams}/{len(streams)} receiving, {stream_mb:.1f} MB in {args.duration:.0f}s")
+    for s in streams:
+        if s.error:
+            print(f"  {s.path}: {s.error}")
+
+    print(f"{'endpoint':<14} {'n':>6} {'304%':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)")
+    all_latencies: list[float] = []
+    for path in ENDPOINTS:
+        lat = [v for c in clients for v in c.latencies[path]]
+        nm = sum(c.not_modified[path] for c in clients)
+        all_latencies += lat
+        ratio = 100.0 * nm / len(lat) if lat else 0.0
+        print(
+            f"{path:<14} {len(lat):>6} {ratio:>5.0f}% {_percentile(lat, 50):>8.1f} "
+            f"{_percentile(lat, 95):>8.1f} {_percentile(lat, 99):>8.1f} {max(lat, default=0.0):>8.1f}"
+        )
+    print(f"{'all':<14} {len(all_latencies):>6} {'':>6} {_percentile(all_latencies, 50):>8.1f} "
+          f"{_percentile(all_latencies, 95):>8.1f} {_percentile(all_latencies, 99):>8.1f} "
+          f"{max(all_latencies, default=0.0):>8.1f}")
+    errors = sum(c.errors for c in clients)
+    if errors:
+        print(f"errors: {errors}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())